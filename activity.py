@@ -0,0 +1,102 @@
+########################################################################################################################
+# File: activity.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Switching activity under random stimulus. The power and clock gates are driven with a stream of random
+#              vectors, each input TRUE with its own probability, and the stream is evaluated a batch at a time by
+#              the compiled netlist (see codegen.py), bit i of every word being the value for vector i. A gate
+#              toggles whenever its value differs from the previous vector's, counted with a shift and xor per batch.
+#              Toggle counts and the number of vectors each gate was TRUE for are kept in flat arrays.
+########################################################################################################################
+import random
+from time import perf_counter
+
+from codegen import *
+
+bias_bits = 8  # Biases are rounded to multiples of 1 / 2 ** bias_bits
+
+
+class ActivityReport(NamedTuple):
+    vectors: int
+    toggles: array  # Times each gate's value changed between consecutive vectors
+    ones: array  # Number of vectors each gate was TRUE for
+    null: list[bool]  # Gates which are NULL for every vector, they never toggle
+    seconds: float
+
+    def activity(self, gate: int) -> float:
+        """Fraction of vector changes on which gate toggled"""
+        return self.toggles[gate] / (self.vectors - 1) if self.vectors > 1 else 0.0
+
+    def probability(self, gate: int) -> float:
+        """Fraction of vectors gate was TRUE for"""
+        return self.ones[gate] / self.vectors if self.vectors > 0 else 0.0
+
+    def cold(self) -> list[int]:
+        """Gates which never toggled, NULL gates aren't included"""
+        return [gate for gate in range(len(self.toggles)) if self.toggles[gate] == 0 and not self.null[gate]]
+
+    def summary(self) -> str:
+        live = [gate for gate in range(len(self.toggles)) if not self.null[gate]]
+        average = sum(self.activity(gate) for gate in live) / len(live) if len(live) > 0 else 0.0
+        return "{0} vectors in {1:.2f}s, {2} of {3} gates never toggled, average activity {4:.3f}" \
+            .format(self.vectors, self.seconds, len(self.cold()), len(live), average)
+
+
+def biased_word(generator: random.Random, bias: float, lanes: int) -> int:
+    """Word of lanes bits, each set with probability bias. Bias is built from its binary digits, least significant
+    first: or-ing with a random word adds one half of the probability left, and-ing with one halves it"""
+    steps = round(min(max(bias, 0.0), 1.0) * (1 << bias_bits))
+    if steps == 1 << bias_bits:
+        return (1 << lanes) - 1
+    if steps == 0:
+        return 0
+    digits = bias_bits
+    while steps & 1 == 0:  # Trailing zeros would only halve the empty word
+        steps >>= 1
+        digits -= 1
+    word = 0
+    for _ in range(digits):
+        word = word | generator.getrandbits(lanes) if steps & 1 else word & generator.getrandbits(lanes)
+        steps >>= 1
+    return word
+
+
+def random_activity(netlist: Netlist, count: int, bias: Optional[dict[int, float]] = None, seed: Optional[int] = None,
+                    lanes: int = 4096) -> ActivityReport:
+    """Drives the power and clock gates of netlist with count random vectors and counts every gate's toggles. Each
+    source is TRUE with probability bias[source], by default 0.5"""
+    start = perf_counter()
+    bias = bias if bias is not None else {}
+    generator = random.Random(seed)
+    evaluate = compile_netlist(netlist)
+    null = null_gates(netlist, variable_sources(netlist))
+    sources = [gate for gate, is_variable in enumerate(variable_sources(netlist)) if is_variable]
+    words = list(netlist.values)
+    toggles = array('Q', bytes(8 * netlist.size))
+    ones = array('Q', bytes(8 * netlist.size))
+    last = None  # Value of every gate for the last vector of the previous batch
+
+    for first in range(0, count, lanes):
+        width = min(lanes, count - first)
+        mask = (1 << width) - 1
+        for gate in sources:
+            words[gate] = biased_word(generator, bias.get(gate, 0.5), width)
+        values = evaluate(words, mask)
+        top = width - 1
+        inner = mask >> 1  # Bit i of word ^ (word >> 1) is set if vector i + 1 differs from vector i
+        for gate, word in enumerate(values):
+            if null[gate]:
+                continue
+            toggles[gate] += ((word ^ (word >> 1)) & inner).bit_count()
+            ones[gate] += word.bit_count()
+            if last is not None and last[gate] != word & 1:
+                toggles[gate] += 1
+        last = [(word >> top) & 1 for word in values]
+    return ActivityReport(count, toggles, ones, null, perf_counter() - start)
+
+
+def heat_color(fraction: float) -> str:
+    """Color of an activity from 0 to 1, blue for cold through to red for hot"""
+    fraction = min(max(fraction, 0.0), 1.0)
+    return "#{0:02x}{1:02x}{2:02x}".format(round(255 * fraction), 0, round(255 * (1 - fraction)))
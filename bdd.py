@@ -0,0 +1,329 @@
+########################################################################################################################
+# File: bdd.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Reduced ordered binary decision diagrams, used to check that two circuits compute the same outputs
+#              without enumerating their truth tables. Nodes are ints indexing flat arrays, 0 and 1 are the FALSE and
+#              TRUE terminals. A unique table keeps the diagrams reduced and every operation goes through ite(), whose
+#              results are kept in a fixed size cache where a new result evicts whatever shared its slot.
+#
+#              Circuits are optimised first (see optimize.py), which folds every NULL away except on outputs that are
+#              always NULL. Those outputs have no diagram, they only equal another always NULL output.
+########################################################################################################################
+import sys
+
+from circuit_io import *
+from optimize import *
+
+bdd_orderings = ("dfs", "input", "label", "fanout")
+
+
+class BDD:
+    """A BDD manager over num_vars variables, variable 0 is the top of every diagram"""
+
+    def __init__(self, num_vars: int, cache_size: int = 1 << 16):
+        self.num_vars = num_vars
+        self.var = [num_vars, num_vars]  # Terminals sit below every variable
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.unique = {}  # (var, low, high) -> node
+        self.free = []  # Nodes released by collect(), reused before new ones are allocated
+        self.cache_mask = cache_size - 1  # cache_size must be a power of 2
+        self.cache = [None] * cache_size  # (f, g, h, result), indexed by a hash of f, g and h
+        self.peak = 2  # Most nodes alive at once
+        # ite() recurses once per variable on each branch it follows
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * num_vars + 1000))
+
+    def node(self, var: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is not None:
+            return node
+        if self.free:
+            node = self.free.pop()
+            self.var[node], self.low[node], self.high[node] = key
+        else:
+            node = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.peak = max(self.peak, self.live_count())
+        self.unique[key] = node
+        return node
+
+    def variable(self, var: int) -> int:
+        return self.node(var, 0, 1)
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """If f then g else h"""
+        if f == 1:
+            return g
+        if f == 0:
+            return h
+        if g == h:
+            return g
+        if g == 1 and h == 0:
+            return f
+
+        slot = hash((f, g, h)) & self.cache_mask
+        entry = self.cache[slot]
+        if entry is not None and entry[0] == f and entry[1] == g and entry[2] == h:
+            return entry[3]
+
+        var, low, high = self.var, self.low, self.high
+        top = min(var[f], var[g], var[h])
+        f0, f1 = (low[f], high[f]) if var[f] == top else (f, f)
+        g0, g1 = (low[g], high[g]) if var[g] == top else (g, g)
+        h0, h1 = (low[h], high[h]) if var[h] == top else (h, h)
+        result = self.node(top, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.cache[slot] = (f, g, h, result)
+        return result
+
+    def negate(self, f: int) -> int:
+        return self.ite(f, 0, 1)
+
+    def conjoin(self, f: int, g: int) -> int:
+        return self.ite(f, g, 0)
+
+    def disjoin(self, f: int, g: int) -> int:
+        return self.ite(f, 1, g)
+
+    def exclusive(self, f: int, g: int) -> int:
+        return self.ite(f, self.negate(g), g)
+
+    def live_count(self) -> int:
+        return len(self.var) - len(self.free)
+
+    def collect(self, roots: Iterable[int]) -> None:
+        """Releases every node which can't be reached from roots. The cache is emptied, it may hold released nodes"""
+        marked = [False] * len(self.var)
+        marked[0] = marked[1] = True
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if not marked[node]:
+                marked[node] = True
+                stack.append(self.low[node])
+                stack.append(self.high[node])
+
+        released = set(self.free)
+        for node in range(2, len(self.var)):
+            if not marked[node] and node not in released:
+                del self.unique[(self.var[node], self.low[node], self.high[node])]
+                self.free.append(node)
+        self.cache = [None] * len(self.cache)
+
+    def satisfying(self, f: int) -> Optional[list[int]]:
+        """Returns values for every variable which make f TRUE, or None if f is never TRUE"""
+        if f == 0:
+            return None
+        values = [FALSE] * self.num_vars
+        while f > 1:
+            if self.low[f] != 0:
+                f = self.low[f]
+            else:
+                values[self.var[f]] = TRUE
+                f = self.high[f]
+        return values
+
+    def sat_count(self, f: int) -> int:
+        """Number of assignments of every variable which make f TRUE"""
+        counts = {0: 0, 1: 1 << self.num_vars}
+        stack = [f]
+        while stack:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            low, high = self.low[node], self.high[node]
+            if low in counts and high in counts:
+                counts[node] = (counts[low] + counts[high]) // 2
+                stack.pop()
+            else:
+                stack.extend(child for child in (low, high) if child not in counts)
+        return counts[f]
+
+    def size(self, f: int) -> int:
+        """Number of nodes in the diagram of f, terminals included"""
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                if node > 1:
+                    stack.extend((self.low[node], self.high[node]))
+        return len(seen)
+
+
+def variable_order(netlist: Netlist, sources: list[int], outputs: list[int], heuristic: str = "dfs") -> list[int]:
+    """Orders the sources of netlist, the first is the top variable.
+
+    dfs      Depth first from each output in turn, sources in the order they are reached. Sources which meet in a gate
+             end up close together
+    input    The order of the sources in the netlist
+    label    Sorted by label
+    fanout   Sources which reach the most gates first"""
+    if heuristic == "input":
+        return list(sources)
+    if heuristic == "label":
+        return sorted(sources, key=lambda gate: netlist.labels[gate])
+    if heuristic == "fanout":
+        def reach(source: int) -> int:
+            seen = {source}
+            stack = [source]
+            while stack:
+                for out_id in netlist.outputs_of(stack.pop()):
+                    if out_id not in seen:
+                        seen.add(out_id)
+                        stack.append(out_id)
+            return len(seen)
+        return sorted(sources, key=lambda gate: -reach(gate))
+    if heuristic != "dfs":
+        log_msg(ERROR, "Unknown variable ordering: " + heuristic, ValueError)
+
+    source_set = set(sources)
+    order = {}
+    seen = set()
+    for out_gate in outputs:
+        stack = [out_gate]
+        while stack:
+            gate = stack.pop()
+            if gate in seen:
+                continue
+            seen.add(gate)
+            if gate in source_set:
+                order[gate] = None
+            stack.extend(reversed(netlist.inputs_of(gate)))
+    order.update(dict.fromkeys(sources))  # Sources which reach no output go last
+    return list(order)
+
+
+def build_output_bdds(bdd: BDD, netlist: Netlist, var_of: dict[int, int], outputs: list[int],
+                      roots: Iterable[int] = ()) -> dict[int, Optional[int]]:
+    """Builds the diagram of every gate in outputs, None for outputs which are always NULL. var_of maps each source
+    gate to its variable. Diagrams of gates are dropped once all their outputs are built, and nodes are collected as
+    the manager grows. roots are diagrams built elsewhere which must be kept"""
+    roots = list(roots)
+    output_set = set(outputs)
+    uses = [netlist.fanout_start[gate + 1] - netlist.fanout_start[gate] for gate in range(netlist.size)]
+    diagrams = {}  # Gate -> diagram, None if the gate is always NULL
+    threshold = 1 << 14  # Live nodes at which to collect next
+
+    for gate in netlist.order:
+        func = netlist.funcs[gate]
+        in_ids = netlist.inputs_of(gate)
+        ins = [diagrams[in_id] for in_id in in_ids]
+        if gate in var_of:
+            diagram = bdd.variable(var_of[gate])
+        elif len(in_ids) == 0:
+            diagram = None if netlist.values[gate] == NULL else netlist.values[gate]
+        elif None in ins or len(in_ids) < min_inputs(func):
+            diagram = None
+        elif func in passthrough_funcs:
+            diagram = ins[0]
+        elif func == logic_not:
+            diagram = bdd.negate(ins[0])
+        elif func in (logic_and, logic_nand, logic_or):
+            diagram = ins[0]
+            for other in ins[1:]:
+                diagram = bdd.disjoin(diagram, other) if func == logic_or else bdd.conjoin(diagram, other)
+            if func == logic_nand:
+                diagram = bdd.negate(diagram)
+        elif func == logic_xor:  # TRUE unless every input equals the first
+            diagram = 0
+            for other in ins[1:]:
+                diagram = bdd.disjoin(diagram, bdd.exclusive(ins[0], other))
+        else:
+            log_msg(ERROR, "Gates of type " + func.__name__ + " can't be converted to a BDD", ValueError)
+            return {}
+        diagrams[gate] = diagram
+
+        for in_id in in_ids:
+            uses[in_id] -= 1
+            if uses[in_id] == 0 and in_id not in output_set:
+                del diagrams[in_id]
+        if bdd.live_count() > threshold:
+            bdd.collect([diagram for diagram in itertools.chain(diagrams.values(), roots) if diagram is not None])
+            threshold = max(threshold, 2 * bdd.live_count())
+    return {gate: diagrams[gate] for gate in outputs}
+
+
+class EquivalenceResult(NamedTuple):
+    equivalent: bool
+    output: str  # Label of the first output found to differ, empty if the circuits are equivalent
+    counterexample: Optional[dict[str, int]]  # Input values, by label, which make output differ
+    unmatched: list[str]  # Labels of outputs found in only one of the circuits
+    peak_nodes: int
+    order: list[str]  # Input labels, top variable first
+
+    def summary(self) -> str:
+        if self.equivalent:
+            return "Circuits are equivalent (peak {0} BDD nodes)".format(self.peak_nodes)
+        if len(self.unmatched) > 0:
+            return "Circuits are not equivalent, outputs only in one circuit: " + ", ".join(self.unmatched)
+        return "Circuits are not equivalent, {0} differs for {1} (peak {2} BDD nodes)" \
+            .format(self.output, ", ".join(label + "=" + str(value) for label, value in self.counterexample.items()),
+                    self.peak_nodes)
+
+
+def labeled_gates(netlist: Netlist, funcs: tuple) -> dict[str, int]:
+    """Maps the labels of the top level gates with a function in funcs to the gates, labels must be unique"""
+    gates = {}
+    for gate in range(netlist.gate_count):
+        if netlist.funcs[gate] in funcs:
+            label = netlist.labels[gate]
+            if label == "" or label in gates:
+                log_msg(ERROR, "Inputs and outputs must have unique labels to be matched, found: '" + label + "'",
+                        ValueError)
+            gates[label] = gate
+    return gates
+
+
+def check_equivalence(snapshot_a, snapshot_b, gate_info_repo, heuristic: str = "dfs",
+                      cache_size: int = 1 << 16) -> EquivalenceResult:
+    """Checks that two circuits compute the same value on every output for every input. Power and clock gates are the
+    inputs and output gates the outputs, each matched between the circuits by label"""
+    circuits = []  # (Optimised netlist, input label -> gate, output label -> gate)
+    for snapshot in (snapshot_a, snapshot_b):
+        netlist = Netlist.from_snapshot(snapshot, gate_info_repo)  # Raises if the circuit has a cycle
+        inputs, outputs = labeled_gates(netlist, (power, logic_clock)), labeled_gates(netlist, (output,))
+        optimized, new_id, _ = optimize_netlist(netlist, free=inputs.values())
+        circuits.append((optimized, {label: new_id[gate] for label, gate in inputs.items()},
+                         {label: new_id[gate] for label, gate in outputs.items()}))
+
+    (net_a, inputs_a, outputs_a), (net_b, inputs_b, outputs_b) = circuits
+    unmatched = sorted(set(outputs_a).symmetric_difference(outputs_b))
+    if len(unmatched) > 0:
+        return EquivalenceResult(False, "", None, unmatched, 0, [])
+
+    # Both circuits share one variable order, picked on the first and extended by the inputs only in the second
+    labels = [net_a.labels[gate] for gate in variable_order(net_a, list(inputs_a.values()),
+                                                              list(outputs_a.values()), heuristic)]
+    labels.extend(label for label in inputs_b if label not in inputs_a)
+    level = {label: idx for idx, label in enumerate(labels)}
+
+    bdd = BDD(len(labels), cache_size)
+    diagrams_a = build_output_bdds(bdd, net_a, {gate: level[label] for label, gate in inputs_a.items()},
+                                   list(outputs_a.values()))
+    diagrams_b = build_output_bdds(bdd, net_b, {gate: level[label] for label, gate in inputs_b.items()},
+                                   list(outputs_b.values()),
+                                   roots=[diagram for diagram in diagrams_a.values() if diagram is not None])
+
+    for label in sorted(outputs_a):
+        diagram_a, diagram_b = diagrams_a[outputs_a[label]], diagrams_b[outputs_b[label]]
+        if diagram_a is None or diagram_b is None:
+            difference = 0 if diagram_a == diagram_b else 1  # Always NULL differs from everything else
+        else:
+            difference = bdd.exclusive(diagram_a, diagram_b)
+        if difference != 0:
+            values = bdd.satisfying(difference)
+            return EquivalenceResult(False, label, dict(zip(labels, values)), [], bdd.peak, labels)
+    return EquivalenceResult(True, "", None, [], bdd.peak, labels)
+
+
+def check_files_equivalent(file_a: str, file_b: str, gate_info_repo, heuristic: str = "dfs") -> EquivalenceResult:
+    return check_equivalence(load_circuit(file_a), load_circuit(file_b), gate_info_repo, heuristic)
@@ -0,0 +1,10 @@
+########################################################################################################################
+# File: benchmarks/__init__.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Benchmarks of the simulator's hot paths on generated circuits. Run from the repository root with
+#              python -m benchmarks, see benchmarks/__main__.py for the options.
+########################################################################################################################
+from benchmarks.circuits import *
+from benchmarks.runner import *
@@ -0,0 +1,52 @@
+########################################################################################################################
+# File: benchmarks/__main__.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Command line entry point of the benchmarks. Writes the timings as JSON and, unless the baseline is being
+#              saved, compares them against the baseline and exits with 1 if any benchmark got slower than tolerance,
+#              or if a baseline given with --baseline doesn't exist.
+#
+#              python -m benchmarks [--suite headless|tk|all] [--repeat N] [--only NAME] [--output FILE]
+#                                   [--baseline FILE] [--save-baseline] [--tolerance FRACTION]
+########################################################################################################################
+import argparse
+
+from benchmarks import *
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Times the simulator's hot paths")
+parser.add_argument("--suite", choices=("headless", "tk", "all"), default="headless",
+                    help="tk runs the board operations on a hidden window")
+parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark, the best time is kept")
+parser.add_argument("--only", default=None, help="only run circuits whose name contains this")
+parser.add_argument("--output", default="benchmark_results.json", help="file the JSON results are written to")
+parser.add_argument("--baseline", default=None, help="file of the timings to compare against, by default "
+                                                      "benchmarks/baseline.json")
+parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown allowed before a regression is reported")
+args = parser.parse_args()
+baseline = args.baseline if args.baseline is not None else os.path.join(os.path.dirname(__file__), "baseline.json")
+
+results = {}
+if args.suite in ("headless", "all"):
+    results.update(run_suite("headless", headless_circuits, args.repeat, args.only))
+if args.suite in ("tk", "all"):
+    results.update(run_suite("tk", tk_circuits, args.repeat, args.only))
+for name, seconds in sorted(results.items()):
+    log_msg(INFO, "{0:<45} {1:.6f}s".format(name, seconds))
+write_results(args.output, results)
+
+if args.save_baseline:
+    write_results(baseline, results)
+    log_msg(INFO, "Saved the baseline to " + baseline)
+elif os.path.exists(baseline):
+    regressions = compare(results, read_results(baseline), args.tolerance)
+    for regression in regressions:
+        log_msg(WARNING, "Regression " + regression.summary())
+    if len(regressions) > 0:
+        sys.exit(1)
+    log_msg(INFO, "No regressions against " + baseline)
+else:
+    log_msg(WARNING, "No baseline at " + baseline + ", nothing was compared. Save one with --save-baseline")
+    if args.baseline is not None:  # Asked for a comparison which couldn't be made
+        sys.exit(1)
@@ -0,0 +1,143 @@
+########################################################################################################################
+# File: benchmarks/circuits.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Generators of parameterised circuits for benchmarking. Every generator builds its gates through a
+#              NetlistBuilder, so the result is a laid out CircuitSnapshot which can be compiled, saved or loaded onto
+#              the board like any opened file. Inputs are named a0, b0, ... and outputs after what they compute.
+########################################################################################################################
+import random
+
+from hdl_io import *
+
+BOARD_SIZE = (4000, 3000)  # Size of the board the circuits are laid out on
+CLOCK_RATE = 1.0  # Update rate of the generated clocks, in seconds
+
+
+def half_or_full_adder(builder: NetlistBuilder, bits: list[int]) -> (int, Optional[int]):
+    """Adds one to three bits, returns the sum and the carry, which is None for a single bit"""
+    if len(bits) == 1:
+        return bits[0], None
+    if len(bits) == 2:
+        return builder.add_gate("logic_xor", bits), builder.add_gate("logic_and", bits)
+    half = builder.add_gate("logic_xor", bits[:2])
+    carry = builder.add_gate("logic_or", [builder.add_gate("logic_and", bits[:2]),
+                                          builder.add_gate("logic_and", [half, bits[2]])])
+    return builder.add_gate("logic_xor", [half, bits[2]]), carry
+
+
+def add_outputs(builder: NetlistBuilder, name: str, gates: list[int]) -> None:
+    for idx, gate in enumerate(gates):
+        builder.drive(name + str(idx), gate)
+        builder.add_output(name + str(idx))
+
+
+def ripple_adder(bits: int) -> CircuitSnapshot:
+    """bits wide adder of a and b, one full adder per bit with the carry rippling through them"""
+    builder = NetlistBuilder()
+    a = [builder.add_input("a" + str(idx)) for idx in range(bits)]
+    b = [builder.add_input("b" + str(idx)) for idx in range(bits)]
+    carry = None
+    sums = []
+    for idx in range(bits):
+        total, carry = half_or_full_adder(builder, [a[idx], b[idx]] + ([carry] if carry is not None else []))
+        sums.append(total)
+    add_outputs(builder, "s", sums + [carry])
+    return builder.build(*BOARD_SIZE)
+
+
+def array_multiplier(bits: int) -> CircuitSnapshot:
+    """bits x bits multiplier of a and b, each partial product row is added to the total with a row of adders"""
+    builder = NetlistBuilder()
+    a = [builder.add_input("a" + str(idx)) for idx in range(bits)]
+    b = [builder.add_input("b" + str(idx)) for idx in range(bits)]
+    total = [builder.add_gate("logic_and", [a[idx], b[0]]) for idx in range(bits)]
+    for row in range(1, bits):
+        carry = None
+        for idx in range(bits):
+            weight = idx + row
+            product = builder.add_gate("logic_and", [a[idx], b[row]])
+            addends = [product] + total[weight:weight + 1] + ([carry] if carry is not None else [])
+            digit, carry = half_or_full_adder(builder, addends)
+            if weight < len(total):
+                total[weight] = digit
+            else:
+                total.append(digit)
+        if carry is not None:
+            total.append(carry)
+    add_outputs(builder, "p", total)
+    return builder.build(*BOARD_SIZE)
+
+
+def not_chain(depth: int) -> CircuitSnapshot:
+    """One input inverted depth times"""
+    builder = NetlistBuilder()
+    gate = builder.add_input("a0")
+    for _ in range(depth):
+        gate = builder.add_gate("logic_not", [gate])
+    add_outputs(builder, "y", [gate])
+    return builder.build(*BOARD_SIZE)
+
+
+def and_tree(width: int, fan_in: int = 4) -> CircuitSnapshot:
+    """And of width inputs, as a tree of fan_in input and gates"""
+    builder = NetlistBuilder()
+    level = [builder.add_input("a" + str(idx)) for idx in range(width)]
+    while len(level) > 1:
+        level = [builder.add_gate("logic_and", level[start:start + fan_in]) if len(level[start:start + fan_in]) > 1
+                 else level[start] for start in range(0, len(level), fan_in)]
+    add_outputs(builder, "y", level)
+    return builder.build(*BOARD_SIZE)
+
+
+def random_dag(size: int, depth: int, seed: int = 0) -> CircuitSnapshot:
+    """size random gates in depth layers, each reading two or three gates of the layer before it. Every gate which
+    drives nothing is an output"""
+    generator = random.Random(seed)
+    builder = NetlistBuilder()
+    layer = [builder.add_input("a" + str(idx)) for idx in range(max(2, size // depth))]
+    used = set()
+    gates = []
+    for level in range(depth):
+        next_layer = []
+        for _ in range(max(1, size // depth)):
+            func = generator.choice(("logic_and", "logic_nand", "logic_or", "logic_xor", "logic_not"))
+            in_ids = generator.sample(layer, 1 if func == "logic_not" else min(len(layer), generator.choice((2, 3))))
+            used.update(in_ids)
+            next_layer.append(builder.add_gate(func, in_ids))
+        gates.extend(next_layer)
+        layer = next_layer
+    add_outputs(builder, "y", [gate for gate in gates if gate not in used])
+    return builder.build(*BOARD_SIZE)
+
+
+def clock_farm(clocks: int, fanout: int) -> CircuitSnapshot:
+    """clocks clocks, each xored with the fanout clocks after it into an output"""
+    builder = NetlistBuilder()
+    sources = [builder.add_gate("logic_clock", [], "clk" + str(idx), TRUE) for idx in range(clocks)]
+    add_outputs(builder, "y", [builder.add_gate("logic_xor", [sources[idx], sources[(idx + step) % clocks]])
+                               for idx in range(clocks) for step in range(1, fanout + 1)])
+    snapshot = builder.build(*BOARD_SIZE)
+    return snapshot._replace(gates=tuple(record._replace(rate=CLOCK_RATE) if record.func == "logic_clock" else record
+                                         for record in snapshot.gates))
+
+
+# Name -> (generator, arguments) of the circuits each suite runs, the Tk suite's are smaller because the board
+# re-evaluates a gate's whole input cone on every connection
+headless_circuits = {
+    "ripple_adder": (ripple_adder, (256,)),
+    "array_multiplier": (array_multiplier, (16,)),
+    "not_chain": (not_chain, (5000,)),
+    "and_tree": (and_tree, (4096,)),
+    "random_dag": (random_dag, (5000, 40)),
+    "clock_farm": (clock_farm, (256, 4)),
+}
+tk_circuits = {
+    "ripple_adder": (ripple_adder, (32,)),
+    "array_multiplier": (array_multiplier, (4,)),
+    "not_chain": (not_chain, (300,)),
+    "and_tree": (and_tree, (512,)),
+    "random_dag": (random_dag, (400, 8)),
+    "clock_farm": (clock_farm, (32, 4)),
+}
@@ -0,0 +1,207 @@
+########################################################################################################################
+# File: benchmarks/runner.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Times the project's hot paths on the generated circuits. The headless suite never touches Tk: it
+#              compiles, evaluates, hit-tests, saves and opens circuits through the netlist and file code. The Tk suite
+#              drives a hidden Application through the same calls the board makes when gates are placed, connected,
+#              toggled, clicked on, saved, opened, cleared and ticked. Every timing is the best of several runs, keyed
+#              "suite/circuit/operation", and can be compared against a baseline saved by an earlier run.
+########################################################################################################################
+import json
+import os
+import platform
+import random
+import tempfile
+from time import perf_counter
+from types import SimpleNamespace
+
+from benchmarks.circuits import *
+from codegen import *
+
+hit_tests = 1000  # Points hit-tested per run
+max_toggles = 64  # Sources toggled per propagation run, each toggle re-evaluates the circuit
+
+
+class Regression(NamedTuple):
+    name: str
+    baseline: float
+    seconds: float
+
+    def summary(self) -> str:
+        return "{0}: {1:.6f}s -> {2:.6f}s ({3:+.0%})".format(self.name, self.baseline, self.seconds,
+                                                               self.seconds / self.baseline - 1)
+
+
+def best_time(run: Callable, setup: Optional[Callable] = None, repeat: int = 5) -> float:
+    """Best time of repeat calls of run, given whatever setup returns, setup itself isn't timed"""
+    best = None
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = perf_counter()
+        run(state)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def headless_repo() -> GatesInfoRepo:
+    """Gate repository without images, so nothing needs a Tk root"""
+    repo = GatesInfoRepo()
+    for func in (power, logic_not, logic_and, logic_nand, logic_or, logic_xor, output, logic_clock, chip_pin):
+        repo.register_gate(func, name=None)
+    return repo
+
+
+def random_points(count: int) -> list[(int, int)]:
+    generator = random.Random(0)
+    return [(generator.randrange(BOARD_SIZE[0]), generator.randrange(BOARD_SIZE[1])) for _ in range(count)]
+
+
+def toggle_sources(netlist: Netlist, funcs: tuple) -> list[int]:
+    return [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] in funcs][:max_toggles]
+
+
+def run_headless(snapshot: CircuitSnapshot, directory: str, repeat: int) -> dict[str, float]:
+    repo = headless_repo()
+    netlist = Netlist.from_snapshot(snapshot, repo)
+    inputs = toggle_sources(netlist, (power,))
+    clocks = toggle_sources(netlist, (logic_clock,))
+    text_file = os.path.join(directory, "circuit.cir")
+    binary_file = os.path.join(directory, "circuit" + BINARY_FILE_TYPE)
+    save_circuit(text_file, snapshot)
+    save_circuit(binary_file, snapshot)
+    points = random_points(hit_tests)
+
+    def toggle_each(gates: list[int], evaluate: Callable) -> None:
+        for gate in gates:
+            netlist.values[gate] = int(not netlist.values[gate])
+            evaluate(netlist.values)
+
+    def hit_test(_) -> None:
+        with BinaryCircuit(binary_file) as circuit:
+            for x, y in points:
+                circuit.gates_in_rect((x - 25, y - 25), (x + 25, y + 25))
+
+    times = {
+        "compile": best_time(lambda _: Netlist.from_snapshot(snapshot, repo), repeat=repeat),
+        "codegen": best_time(lambda _: compile_netlist(netlist), compiled_cache.clear, repeat),
+        "hit_test": best_time(hit_test, repeat=repeat),
+        "save": best_time(lambda _: save_circuit(text_file, snapshot), repeat=repeat),
+        "save_binary": best_time(lambda _: save_circuit(binary_file, snapshot), repeat=repeat),
+        "open": best_time(lambda _: load_circuit(text_file), repeat=repeat),
+        "open_binary": best_time(lambda _: load_circuit(binary_file), repeat=repeat),
+    }
+    compiled = compile_netlist(netlist)
+    if len(inputs) > 0:
+        times["propagate"] = best_time(lambda _: toggle_each(inputs, lambda values: netlist.evaluate()), repeat=repeat)
+        times["propagate_compiled"] = best_time(lambda _: toggle_each(inputs, compiled), repeat=repeat)
+    if len(clocks) > 0:  # Only toggles the clocks' outputs, the tk suite's clock_tick times ClockTk's own tick
+        times["clock_toggle"] = best_time(lambda _: toggle_each(clocks, lambda values: netlist.evaluate()),
+                                          repeat=repeat)
+    return times
+
+
+def run_tk(app, snapshot: CircuitSnapshot, directory: str, repeat: int) -> dict[str, float]:
+    """Times the board operations on app, a hidden Application whose GUI has been built"""
+    repo = app.gates
+    netlist = Netlist.from_snapshot(snapshot, repo)
+    funcs = netlist.funcs
+    file_name = os.path.join(directory, "board.cir")
+    points = [SimpleNamespace(x=x, y=y) for x, y in random_points(hit_tests)]
+    edges = [(in_id, gate) for gate in netlist.order for in_id in dict.fromkeys(snapshot.inputs[gate])]
+
+    def place(_) -> list[InputTk]:
+        return [app.create_gate(funcs[idx], (record.x, record.y), record.label, record.state, record.rate)
+                for idx, record in enumerate(snapshot.gates)]
+
+    def placed() -> list[InputTk]:
+        app.clear()
+        return place(None)
+
+    def connect(gates: list[InputTk]) -> None:
+        for in_id, gate in edges:
+            connect_gates(gates[in_id], gates[gate])
+
+    def loaded() -> list[InputTk]:
+        app.clear()
+        return app.load_snapshot(snapshot, netlist)
+
+    def toggle_each(gates: list[InputTk], propagate_cb: Callable = propagate) -> None:
+        for gate in [gate for gate in gates if is_power_gate(gate)][:max_toggles]:
+            gate.out = int(not gate.out)
+            propagate_cb([gate])
+
+    def compiled() -> list[InputTk]:
+        gates = loaded()
+        app.compile_board()
+        return gates
+
+    def hit_test(_) -> None:
+        for point in points:
+            app.intersects_input_gate(point)
+
+    def tick(gates: list[InputTk]) -> None:
+        for gate in [gate for gate in gates if is_clock(gate)][:max_toggles]:
+            gate.toggle()
+
+    times = {
+        "place": best_time(place, app.clear, repeat),
+        "connect": best_time(connect, placed, repeat),
+        "hit_test": best_time(hit_test, loaded, repeat),
+        "save": best_time(lambda _: save_circuit(file_name, snapshot_circuit(app.all_gates())), loaded, repeat),
+        "open": best_time(lambda _: app.load_snapshot(load_circuit(file_name)), app.clear, repeat),
+        "clear": best_time(lambda _: app.clear(), loaded, repeat),
+    }
+    if any(func == power for func in funcs):
+        times["propagate"] = best_time(toggle_each, loaded, repeat)
+        times["propagate_compiled"] = best_time(lambda gates: toggle_each(gates, app.propagate_board), compiled, repeat)
+    if any(func == logic_clock for func in funcs):
+        times["clock_tick"] = best_time(tick, loaded, repeat)
+    app.clear()
+    return times
+
+
+def run_suite(suite: str, circuits: dict[str, tuple], repeat: int = 5, only: Optional[str] = None) \
+        -> dict[str, float]:
+    """Runs every circuit of the "headless" or "tk" suite whose name contains only, returns the timings"""
+    app = None
+    if suite == "tk":
+        from logical import Application
+        app = Application()
+        app.withdraw()
+        app.gui_build_all()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (generator, args) in circuits.items():
+            if only is not None and only not in name:
+                continue
+            log_msg(INFO, "Benchmarking {0}/{1}{2}".format(suite, name, args))
+            snapshot = generator(*args)
+            times = run_headless(snapshot, directory, repeat) if app is None else \
+                run_tk(app, snapshot, directory, repeat)
+            for operation, seconds in times.items():
+                results["{0}/{1}/{2}".format(suite, name, operation)] = seconds
+
+    if app is not None:
+        app.destroy()
+    return results
+
+
+def write_results(file_name: str, results: dict[str, float]) -> None:
+    document = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    with open(file_name, 'w', encoding="utf-8") as result_file:
+        json.dump(document, result_file, indent=2, sort_keys=True)
+
+
+def read_results(file_name: str) -> dict[str, float]:
+    with open(file_name, encoding="utf-8") as result_file:
+        return json.load(result_file)["results"]
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float = 0.25) -> list[Regression]:
+    """Timings more than tolerance slower than the baseline, benchmarks missing from either are skipped"""
+    return [Regression(name, baseline[name], seconds) for name, seconds in sorted(results.items())
+            if name in baseline and baseline[name] > 0 and seconds > baseline[name] * (1 + tolerance)]
@@ -0,0 +1,170 @@
+########################################################################################################################
+# File: chip.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Custom chips, circuits packaged as a single gate. A chip is registered from a .cir file, its power gates
+#              become the chip's input pins and its output gates its output pins. The file is compiled once into a
+#              ChipDefinition shared by every instance. An instance is drawn as one block with a small pin gate for
+#              each output and only keeps an array of its gate values, the chip is flattened into its gates only when
+#              the whole circuit is compiled for simulation.
+########################################################################################################################
+import os
+
+from circuit_io import *
+from netlist import *
+
+chip_definitions = {}  # (Absolute file path, modification time) -> ChipDefinition, shared by every instance
+
+
+def load_chip_definition(file_name: str, gate_info_repo) -> ChipDefinition:
+    """Compiles a .cir file into a chip named after the file, a file which is unchanged since it was last loaded is
+    not compiled again"""
+    file_name = os.path.abspath(file_name)
+    key = (file_name, os.path.getmtime(file_name))
+    if key not in chip_definitions:
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        chip_definitions[key] = ChipDefinition.from_snapshot(name, read_circuit(file_name), gate_info_repo, file_name)
+    return chip_definitions[key]
+
+
+def register_chip(gate_info_repo, file_name: str, callback: Optional[Callable] = None) -> ChipDefinition:
+    """Registers the chip in file_name as a gate type, raises ValueError if the name is already taken"""
+    definition = load_chip_definition(file_name, gate_info_repo)
+    if definition.__name__ in gate_info_repo.funcs_dispatch:
+        log_msg(ERROR, "A gate named " + definition.__name__ + " is already registered", ValueError)
+
+    gate_info_repo.register_gate(definition, name=definition.__name__,
+                                 desc="Custom chip with {0} inputs and {1} outputs, built from {2}."
+                                 .format(definition.num_inputs, definition.num_outputs,
+                                         os.path.basename(file_name)), callback=callback)
+    return definition
+
+
+def is_chip(gate: InputTk) -> bool:
+    return isinstance(gate.get_func(), ChipDefinition)
+
+
+def chip_parts(gates: Iterable[InputTk]) -> list[InputTk]:
+    """Returns gates along with the rest of every chip they are part of, a chip and its pins are always deleted
+    together"""
+    parts = dict.fromkeys(gates)
+    for gate in list(parts):
+        if is_chip_pin(gate) and len(gate.get_input_gates()) == 1:
+            gate = gate.get_input_gates()[0]
+            parts[gate] = None
+        if is_chip(gate):
+            parts.update(dict.fromkeys(gate.pins()))
+    return list(parts)
+
+
+class ChipTk(InputTk):
+    """An instance of a custom chip, drawn as a single block. Gates connected to it drive its input pins in the order
+    they were connected, and its outputs are read through the ChipPinTk gates on its right edge"""
+    block_width = 80
+    pin_spacing = 20  # Vertical distance between pins
+
+    def __init__(self, definition: ChipDefinition, gate_info_repo, label: str = "", canvas: Optional[Canvas] = None,
+                 center: (int, int) = (NULL, NULL)):
+        self.definition = definition
+        self.values = array('b', definition.initial_values)  # Value of every gate inside this instance
+        self.text_id = NULL
+        pin_rows = max(definition.num_inputs, definition.num_outputs, 1) + 1
+        super().__init__(definition, gate_info_repo, label, canvas, center, dims=(self.block_width,
+                                                                                   pin_rows * self.pin_spacing))
+
+    def draw(self) -> int:
+        if self.center == (NULL, NULL):
+            return NULL
+        self.text_id = self.canvas.create_text(self.center[0], self.center[1], text=self.definition.__name__)
+        return self.canvas.create_rectangle(self.top_left()[0], self.top_left()[1], self.bottom_right()[0],
+                                            self.bottom_right()[1], width=2, outline='black', fill='white')
+
+    def canvas_items(self) -> list[int]:
+        return InputTk.canvas_items(self) + ([self.text_id] if self.text_id >= 0 else [])
+
+    def can_drive(self, dest_gate) -> bool:
+        return False  # The chip's outputs are only read through its pins
+
+    def accepts_input(self, src_gate) -> bool:
+        return len(self.inputs) < self.definition.num_inputs
+
+    def output(self) -> int:
+        self.definition.evaluate(self.values, [inp.output() for inp in self.inputs])
+        return self.update_out()
+
+    def evaluate(self) -> int:
+        self.definition.evaluate(self.values, [inp.out for inp in self.inputs])
+        return self.update_out()
+
+    def update_out(self) -> int:
+        self.out = self.pin_value(0) if self.definition.num_outputs > 0 else NULL
+        return self.out
+
+    def pin_value(self, index: int) -> int:
+        return self.values[self.definition.output_nodes[index]]
+
+    def load_values(self, values: list[int], base: int) -> None:
+        """Takes this instance's gate values from a netlist the chip was flattened into, starting at base"""
+        self.values = array('b', values[base:base + len(self.values)])
+        self.update_out()
+
+    def pins(self) -> list:
+        return sorted((gate for gate in self.output_gates if is_chip_pin(gate)), key=lambda pin: pin.pin_index)
+
+    def pin_center(self, index: int) -> (int, int):
+        return self.bottom_right()[0] + ChipPinTk.pin_size // 2 + 1, \
+            self.top_left()[1] + (index + 1) * self.pin_spacing
+
+    def move_items(self, x: int, y: int) -> None:
+        self.canvas.coords(self.input_id, self.top_left()[0], self.top_left()[1], self.bottom_right()[0],
+                           self.bottom_right()[1])
+        self.canvas.coords(self.text_id, x, y)
+        for pin in self.pins():
+            InputTk.move(pin, *self.pin_center(pin.pin_index))
+
+
+class ChipPinTk(InputTk):
+    """Output pin of a chip. Its only input is the chip, connected by a hidden line, and it outputs the value of the
+    chip's output pin_index"""
+    routed = False
+    pin_size = 10
+
+    def __init__(self, gate_info_repo, pin_index: int, label: str = "", canvas: Optional[Canvas] = None,
+                 center: (int, int) = (NULL, NULL), out: int = NULL):
+        self.pin_index = pin_index
+        super().__init__(chip_pin, gate_info_repo, label, canvas, center, out=out,
+                         dims=(self.pin_size, self.pin_size))
+
+    def draw(self) -> int:
+        if self.center == (NULL, NULL):
+            return NULL
+        return self.canvas.create_rectangle(self.top_left()[0], self.top_left()[1], self.bottom_right()[0],
+                                            self.bottom_right()[1], width=1, outline='black', fill='black')
+
+    def chip(self) -> Optional[ChipTk]:
+        return self.inputs[0] if len(self.inputs) == 1 else None
+
+    def accepts_input(self, src_gate) -> bool:
+        return False  # Pins are only connected to their own chip, when it is placed
+
+    def output(self) -> int:
+        return self.evaluate()  # The chip's values are kept up to date whenever its inputs change
+
+    def evaluate(self) -> int:
+        chip = self.chip()
+        self.out = chip.pin_value(self.pin_index) if chip is not None else NULL
+        return self.out
+
+    def move(self, x: int, y: int) -> None:
+        """Pins can't leave their chip, moving a pin moves the whole chip"""
+        chip = self.chip()
+        if chip is None:
+            InputTk.move(self, x, y)
+            return
+        pin_x, pin_y = chip.pin_center(self.pin_index)
+        chip.move(chip.get_center()[0] + x - pin_x, chip.get_center()[1] + y - pin_y)
+
+    def move_items(self, x: int, y: int) -> None:
+        self.canvas.coords(self.input_id, self.top_left()[0], self.top_left()[1], self.bottom_right()[0],
+                           self.bottom_right()[1])
@@ -0,0 +1,435 @@
+########################################################################################################################
+# File: circuit_io.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Reading and writing of circuit (.cir) files. A circuit is first copied into an immutable snapshot of
+#              plain records, which is then streamed to disk, so writing never touches or evaluates the live gates.
+#
+#              Version 2 format:
+#                  LOGICAL 2
+#                  id,function name,x,y,state,clock rate,label     <- One line per gate
+#                  <--CONNECTIONS-->
+#                  id,input id|input id|...                        <- One line per gate with inputs
+#
+#              Version 1 files (no header, "func,(x, y),out,id" gate lines and "id,[in|..],[out|..]" connection
+#              lines) can still be read. A compact binary format, memory mapped when read, is described below.
+########################################################################################################################
+import itertools
+import mmap
+import os
+import struct
+from array import array
+
+from logic_gate import *
+
+FILE_MAGIC = "LOGICAL"
+FILE_VERSION = 2
+FILE_SEPARATOR = "<--CONNECTIONS-->"
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+class GateRecord(NamedTuple):
+    """Everything needed to recreate a gate"""
+    func: str  # Name of the gate's logic function
+    x: int  # Center of the gate on the canvas
+    y: int
+    state: int  # Output of the gate, or the default state if it is a clock
+    rate: float  # Update rate of a clock, 0 for every other gate
+    label: str  # Name of the gate, empty if it has the default name
+
+
+class CircuitSnapshot(NamedTuple):
+    """Immutable copy of a circuit, a gate's id is its index in gates"""
+    gates: tuple[GateRecord, ...]
+    inputs: tuple[tuple[int, ...], ...]  # Ids of the input gates of each gate
+
+    # Columns of the records, as read from a BinaryCircuit without decoding its records
+    def all_func_names(self) -> list[str]:
+        return [record.func for record in self.gates]
+
+    def all_states(self) -> list[int]:
+        return [record.state for record in self.gates]
+
+    def all_labels(self) -> list[str]:
+        return [record.label for record in self.gates]
+
+
+def gate_record(gate: InputTk) -> GateRecord:
+    """Copies a gate into a record without evaluating it"""
+    if is_clock(gate):
+        return GateRecord(gate.get_func().__name__, gate.get_center()[0], gate.get_center()[1], int(gate.default_state),
+                          float(gate.get_rate()), gate.get_label())
+    if is_chip_pin(gate):  # Chip pins store which of the chip's outputs they are
+        return GateRecord(gate.get_func().__name__, gate.get_center()[0], gate.get_center()[1], gate.pin_index, 0.0,
+                          gate.get_label())
+    return GateRecord(gate.get_func().__name__, gate.get_center()[0], gate.get_center()[1], int(gate.out), 0.0,
+                      gate.get_label())
+
+
+def snapshot_circuit(gates: list[InputTk]) -> CircuitSnapshot:
+    """Copies gates and their connections into a snapshot. Ids are resolved through a single map so this is linear in
+    the number of gates and connections"""
+    ids = {gate: idx for idx, gate in enumerate(gates)}
+    return CircuitSnapshot(tuple(gate_record(gate) for gate in gates),
+                           tuple(tuple(ids[in_gate] for in_gate in gate.get_input_gates()) for gate in gates))
+
+
+def write_circuit(file_name: str, snapshot: CircuitSnapshot) -> None:
+    """Streams a snapshot to file_name in the current format version"""
+    with open(file_name, 'w', buffering=WRITE_BUFFER_SIZE) as save_file:
+        save_file.write("{0} {1}\n".format(FILE_MAGIC, FILE_VERSION))
+        for idx, record in enumerate(snapshot.gates):
+            label = record.label.replace('\n', ' ')
+            save_file.write("{0},{1},{2},{3},{4},{5},{6}\n".format(idx, record.func, record.x, record.y, record.state,
+                                                                   record.rate, label))
+
+        save_file.write(FILE_SEPARATOR + "\n")
+        for idx, in_ids in enumerate(snapshot.inputs):
+            if len(in_ids) > 0:
+                save_file.write("{0},{1}\n".format(idx, "|".join(map(str, in_ids))))
+
+
+def read_circuit(file_name: str) -> CircuitSnapshot:
+    """Reads a circuit file of any supported version into a snapshot"""
+    with open(file_name, 'r') as load_file:
+        first_line = load_file.readline()
+        header = first_line.split()
+        if len(header) == 2 and header[0] == FILE_MAGIC:
+            version = int(header[1])
+            if version != FILE_VERSION:
+                log_msg(ERROR, "Unsupported circuit file version: " + header[1], ValueError)
+            return read_circuit_v2(load_file)
+
+        return read_circuit_v1(first_line, load_file)
+
+
+def read_circuit_v2(load_file) -> CircuitSnapshot:
+    gates = []
+    inputs = []
+    for line in load_file:
+        line = line.rstrip('\n')
+        if line == FILE_SEPARATOR:
+            break
+        # idx, func, x, y, state, rate, label, the label is last so it may contain commas
+        fields = line.split(',', 6)
+        gates.append(GateRecord(fields[1], int(fields[2]), int(fields[3]), int(fields[4]), float(fields[5]),
+                                fields[6]))
+        inputs.append(())
+
+    for line in load_file:
+        line = line.strip()
+        if line == "":
+            continue
+        idx, in_ids = line.split(',')
+        inputs[int(idx)] = tuple(int(in_id) for in_id in in_ids.split('|'))
+
+    return CircuitSnapshot(tuple(gates), tuple(inputs))
+
+
+def read_circuit_v1(first_line: str, load_file) -> CircuitSnapshot:
+    """Reads the original format, ids are the line number of each gate and every connection is stored twice, only
+    the input lists are used"""
+    gates = []
+    inputs = []
+    for line in itertools.chain([first_line], load_file):
+        line = line.strip()
+        if line == FILE_SEPARATOR:
+            break
+        if line == "":
+            continue
+
+        line_list = line.split(sep=',')
+        # line_list[0]: Function Name
+        # line_list[1]: Center X of Gate on canvas
+        # line_list[2]: Center Y of Gate on canvas
+        # line_list[3]: Gate Output, or default state if this is a clock
+        # line_list[4]: Update rate if this is a clock
+        # line_list[-1]: Gate Num
+        position_x = int(line_list[1].strip("( "))
+        position_y = int(line_list[2].strip(") "))
+        rate = float(line_list[4]) if line_list[0] == logic_clock.__name__ else 0.0
+        gates.append(GateRecord(line_list[0], position_x, position_y, int(line_list[3]), rate, ""))
+        inputs.append(())
+
+    for line in load_file:
+        line = line.strip()
+        if line == "":
+            continue
+        line_list = line.split(sep=',')
+        # line_list[0]: gate id
+        # line_list[1]: gate input ids
+        # line_list[2]: gate output ids
+        if len(line_list[1]) != 2:
+            inputs[int(line_list[0])] = tuple(int(in_id) for in_id in line_list[1][1:-1].split('|'))
+
+    return CircuitSnapshot(tuple(gates), tuple(inputs))
+
+
+########################################################################################################################
+# Binary format (.cirb), version 2
+#     header                                  BINARY_HEADER
+#     clock rate of each gate                 f64 * n
+#     x, y center of each gate                i32 * n, i32 * n
+#     state of each gate                      i32 * n     (the pin index of chip pins, -1 = NULL)
+#     fanin start of each gate                u32 * (n + 1)
+#     fanin (ids of the input gates)          u32 * m     (CSR: gate i's inputs are fanin[start[i]:start[i + 1]])
+#     label start of each gate                u32 * (n + 1)
+#     opcode of each gate                     u16 * n     (index into the function names)
+#     labels                                  utf-8 bytes
+#     function names                          utf-8 bytes, one name per line, including the names of custom chips
+# Every section starts on an 8 byte boundary and numbers are little-endian, so columns can be viewed in place.
+#
+# Version 1 files, which can still be read, have a header without the function name bytes, u8 opcodes into
+# BINARY_OPCODES_V1, u8 states with 2 for NULL, f32 rates, and sections in the order opcodes, states, x, y, rates,
+# fanin start, fanin, label start and labels, each on a 4 byte boundary
+########################################################################################################################
+BINARY_FILE_TYPE = ".cirb"
+BINARY_MAGIC = b"LGCB"
+BINARY_VERSION = 2
+BINARY_PREFIX = struct.Struct("<4sH")  # magic, version
+# magic, version, reserved, gate count, connection count, label bytes, function name bytes
+BINARY_HEADER = struct.Struct("<4sHHIIII")
+BINARY_HEADER_V1 = struct.Struct("<4sHHIII")
+BINARY_OPCODES_V1 = ("power", "logic_not", "logic_and", "logic_nand", "logic_or", "logic_xor", "output",
+                     "logic_clock")
+BINARY_NULL_STATE_V1 = 2
+BINARY_MAX_FUNCS = 1 << 16  # Distinct functions a file can hold
+
+
+def align4(size: int) -> int:
+    return (size + 3) & ~3
+
+
+def align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def binary_layout(num_gates: int, num_edges: int, label_bytes: int, name_bytes: int,
+                  version: int = BINARY_VERSION) -> dict[str, (int, int)]:
+    """Returns the (offset, size) of every section of a binary file"""
+    if version == 1:
+        sizes = (("opcodes", num_gates), ("states", num_gates), ("x", 4 * num_gates), ("y", 4 * num_gates),
+                 ("rates", 4 * num_gates), ("fanin_start", 4 * (num_gates + 1)), ("fanin", 4 * num_edges),
+                 ("label_start", 4 * (num_gates + 1)), ("labels", label_bytes))
+        align, offset = align4, align4(BINARY_HEADER_V1.size)
+    else:
+        sizes = (("rates", 8 * num_gates), ("x", 4 * num_gates), ("y", 4 * num_gates), ("states", 4 * num_gates),
+                 ("fanin_start", 4 * (num_gates + 1)), ("fanin", 4 * num_edges), ("label_start", 4 * (num_gates + 1)),
+                 ("opcodes", 2 * num_gates), ("labels", label_bytes), ("func_names", name_bytes))
+        align, offset = align8, align8(BINARY_HEADER.size)
+    layout = {}
+    for name, size in sizes:
+        layout[name] = (offset, size)
+        offset = align(offset + size)
+    return layout
+
+
+def little_endian(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_binary_circuit(file_name: str, snapshot: CircuitSnapshot) -> None:
+    """Writes a snapshot in the binary format, the columns are built in memory and written with one call each"""
+    gates = snapshot.gates
+    func_names = list(dict.fromkeys(record.func for record in gates))
+    if len(func_names) > BINARY_MAX_FUNCS:
+        log_msg(ERROR, "A binary circuit can hold at most {0} kinds of gate".format(BINARY_MAX_FUNCS), ValueError)
+    opcodes = {name: code for code, name in enumerate(func_names)}
+    name_data = "\n".join(func_names).encode("utf-8")
+
+    fanin_start = array('I', [0])
+    fanin = array('I')
+    for in_ids in snapshot.inputs:
+        fanin.extend(in_ids)
+        fanin_start.append(len(fanin))
+
+    label_data = bytearray()
+    label_start = array('I', [0])
+    for record in gates:
+        label_data += record.label.encode("utf-8")
+        label_start.append(len(label_data))
+
+    columns = {"rates": little_endian(array('d', [record.rate for record in gates])),
+               "x": little_endian(array('i', [record.x for record in gates])),
+               "y": little_endian(array('i', [record.y for record in gates])),
+               "states": little_endian(array('i', [int(record.state) for record in gates])),
+               "fanin_start": little_endian(fanin_start), "fanin": little_endian(fanin),
+               "label_start": little_endian(label_start),
+               "opcodes": little_endian(array('H', [opcodes[record.func] for record in gates])),
+               "labels": bytes(label_data), "func_names": name_data}
+
+    with open(file_name, 'wb') as save_file:
+        save_file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(gates), len(fanin), len(label_data),
+                                           len(name_data)))
+        for name, (offset, size) in binary_layout(len(gates), len(fanin), len(label_data), len(name_data)).items():
+            save_file.write(bytes(offset - save_file.tell()))  # Padding
+            save_file.write(columns[name])
+
+
+class LazyColumn(Sequence):
+    """Sequence whose items are only computed when accessed"""
+
+    def __init__(self, getter: Callable, size: int):
+        self.getter = getter
+        self.size = size
+
+    def __getitem__(self, idx: int):
+        if not 0 <= idx < self.size:
+            raise IndexError(idx)
+        return self.getter(idx)
+
+    def __len__(self):
+        return self.size
+
+
+class BinaryCircuit:
+    """A binary circuit file mapped into memory. Opening only reads the header; every column is a memoryview over the
+    mapping and a gate's fields are decoded only when they are asked for"""
+
+    def __init__(self, file_name: str):
+        self.file = open(file_name, 'rb')
+        if os.fstat(self.file.fileno()).st_size < BINARY_PREFIX.size:  # Too short for the magic, or empty to mmap
+            self.file.close()
+            log_msg(ERROR, file_name + " is not a supported binary circuit file", ValueError)
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, self.version = BINARY_PREFIX.unpack_from(self.view, 0)
+        if magic != BINARY_MAGIC or self.version not in (1, BINARY_VERSION):
+            self.close()
+            log_msg(ERROR, file_name + " is not a supported binary circuit file", ValueError)
+        if len(self.map) < (BINARY_HEADER_V1 if self.version == 1 else BINARY_HEADER).size:
+            self.close()
+            log_msg(ERROR, file_name + " is truncated", ValueError)
+        if sys.byteorder != "little":
+            self.close()
+            log_msg(ERROR, "Binary circuit files can only be mapped on little-endian machines", ValueError)
+
+        if self.version == 1:
+            _, _, _, self.size, self.num_edges, label_bytes = BINARY_HEADER_V1.unpack_from(self.view, 0)
+            name_bytes = 0
+        else:
+            _, _, _, self.size, self.num_edges, label_bytes, name_bytes = BINARY_HEADER.unpack_from(self.view, 0)
+        layout = binary_layout(self.size, self.num_edges, label_bytes, name_bytes, self.version)
+        if max(offset + size for offset, size in layout.values()) > len(self.map):
+            self.close()
+            log_msg(ERROR, file_name + " is truncated", ValueError)
+        self.opcodes = self.section(layout["opcodes"], 'B' if self.version == 1 else 'H')
+        self.states = self.section(layout["states"], 'B' if self.version == 1 else 'i')
+        self.x = self.section(layout["x"], 'i')
+        self.y = self.section(layout["y"], 'i')
+        self.rates = self.section(layout["rates"], 'f' if self.version == 1 else 'd')
+        self.fanin_start = self.section(layout["fanin_start"], 'I')
+        self.fanin = self.section(layout["fanin"], 'I')
+        self.label_start = self.section(layout["label_start"], 'I')
+        self.labels = self.section(layout["labels"])
+        if self.version == 1:
+            self.func_names = BINARY_OPCODES_V1
+        else:
+            with self.section(layout["func_names"]) as names:
+                self.func_names = tuple(bytes(names).decode("utf-8").split("\n"))
+
+    def section(self, offset_size: (int, int), typecode: str = 'B') -> memoryview:
+        offset, size = offset_size
+        return self.view[offset:offset + size].cast(typecode)
+
+    def func_name(self, gate: int) -> str:
+        return self.func_names[self.opcodes[gate]]
+
+    def state(self, gate: int) -> int:
+        if self.version == 1 and self.states[gate] == BINARY_NULL_STATE_V1:
+            return NULL
+        return self.states[gate]
+
+    def center(self, gate: int) -> (int, int):
+        return self.x[gate], self.y[gate]
+
+    def label(self, gate: int) -> str:
+        return bytes(self.labels[self.label_start[gate]:self.label_start[gate + 1]]).decode("utf-8")
+
+    def inputs_of(self, gate: int) -> memoryview:
+        return self.fanin[self.fanin_start[gate]:self.fanin_start[gate + 1]]
+
+    def record(self, gate: int) -> GateRecord:
+        return GateRecord(self.func_name(gate), self.x[gate], self.y[gate], self.state(gate), self.rates[gate],
+                          self.label(gate))
+
+    def all_func_names(self) -> list[str]:
+        func_names = self.func_names
+        return [func_names[opcode] for opcode in self.opcodes]
+
+    def all_states(self) -> list[int]:
+        if self.version == 1:
+            return [NULL if state == BINARY_NULL_STATE_V1 else state for state in self.states]
+        return self.states.tolist()
+
+    def all_labels(self) -> list[str]:
+        labels, label_start = bytes(self.labels), self.label_start
+        return [labels[label_start[i]:label_start[i + 1]].decode("utf-8") for i in range(self.size)]
+
+    def gates_in_rect(self, tl: (int, int), br: (int, int)) -> list[int]:
+        """Returns the ids of the gates centered in the rectangle (tl, br), only the x and y columns are read"""
+        x, y = self.x, self.y
+        return [i for i in range(self.size) if tl[0] <= x[i] <= br[0] and tl[1] <= y[i] <= br[1]]
+
+    @property
+    def gates(self) -> Sequence[GateRecord]:
+        """Lazy sequence of the gate records, lets a BinaryCircuit be used in place of a CircuitSnapshot"""
+        return LazyColumn(self.record, self.size)
+
+    @property
+    def inputs(self) -> Sequence[memoryview]:
+        return LazyColumn(self.inputs_of, self.size)
+
+    def snapshot(self) -> CircuitSnapshot:
+        """Decodes the whole file into a snapshot"""
+        return CircuitSnapshot(tuple(self.record(i) for i in range(self.size)),
+                               tuple(tuple(self.inputs_of(i)) for i in range(self.size)))
+
+    def close(self) -> None:
+        for name in ("opcodes", "states", "x", "y", "rates", "fanin_start", "fanin", "label_start", "labels"):
+            if hasattr(self, name):
+                getattr(self, name).release()
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def is_binary_file(file_name: str) -> bool:
+    return file_name.endswith(BINARY_FILE_TYPE)
+
+
+def save_circuit(file_name: str, snapshot: CircuitSnapshot) -> None:
+    """Writes a snapshot in the format picked by the file's extension. It is written to a temporary file which then
+    replaces file_name, so a save cut off part way leaves the old file as it was"""
+    temp_name = file_name + ".tmp"
+    try:
+        if is_binary_file(file_name):
+            write_binary_circuit(temp_name, snapshot)
+        else:
+            write_circuit(temp_name, snapshot)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    os.replace(temp_name, file_name)
+
+
+def load_circuit(file_name: str) -> CircuitSnapshot:
+    """Reads a circuit file in the format picked by the file's extension"""
+    if is_binary_file(file_name):
+        with BinaryCircuit(file_name) as circuit:
+            return circuit.snapshot()
+    return read_circuit(file_name)
@@ -0,0 +1,113 @@
+########################################################################################################################
+# File: codegen.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Compiles a netlist into the source of a Python function which evaluates it in one straight line, one
+#              local variable assignment per gate with the gate written as an inline bitwise expression, so no gate
+#              function is called. Functions are cached by a structural hash of the netlist, so compiling the same
+#              circuit again reuses the function.
+#
+#              The power and clock gates are read from the values passed in, every other gate without inputs is
+#              baked in as a constant. Whether a gate is NULL doesn't depend on those values, so NULL gates are also
+#              constants and the others only ever see TRUE and FALSE. The values may also be words of many vectors,
+#              bit i of each being its value for vector i, with mask having a bit set for each vector.
+########################################################################################################################
+import hashlib
+
+from optimize import *
+
+compiled_cache = {}  # Structural hash -> compiled evaluation function
+max_cached_functions = 32
+max_chain = 32  # Longest chain of one operator in an expression, longer chains overflow the compiler's stack
+
+
+def variable_sources(netlist: Netlist) -> list[bool]:
+    """Whether each gate's value is read from the values passed to the compiled function"""
+    return [netlist.funcs[gate] in (power, logic_clock) and netlist.values[gate] != NULL
+            and netlist.fanin_start[gate] == netlist.fanin_start[gate + 1] for gate in range(netlist.size)]
+
+
+def null_gates(netlist: Netlist, variable: list[bool]) -> list[bool]:
+    null = [False] * netlist.size
+    for gate in netlist.order:
+        in_ids = netlist.inputs_of(gate)
+        if len(in_ids) == 0:
+            null[gate] = not variable[gate] and netlist.values[gate] == NULL
+        else:
+            null[gate] = len(in_ids) < min_inputs(netlist.funcs[gate]) or any(null[in_id] for in_id in in_ids)
+    return null
+
+
+def structural_hash(netlist: Netlist) -> str:
+    """Hash of the gate types, connections and constant values of netlist, positions and labels are left out"""
+    variable = variable_sources(netlist)
+    digest = hashlib.sha256()
+    digest.update(",".join(func.__name__ for func in netlist.funcs).encode())
+    digest.update(netlist.fanin_start.tobytes())
+    digest.update(netlist.fanin.tobytes())
+    digest.update(bytes(3 if variable[gate] else netlist.values[gate] + 1 if len(netlist.inputs_of(gate)) == 0 else 4
+                        for gate in range(netlist.size)))
+    return digest.hexdigest()
+
+
+def chain(operator: str, names: list[str]) -> str:
+    """Joins names with operator, grouping long chains into a balanced tree of parenthesised chains"""
+    while len(names) > max_chain:
+        names = ["(" + operator.join(names[start:start + max_chain]) + ")" for start in range(0, len(names), max_chain)]
+    return operator.join(names)
+
+
+def gate_expression(func: Callable, names: list[str]) -> str:
+    """Inline expression of a gate over the variables holding its inputs, which are TRUE or FALSE words"""
+    if func in (output, chip_pin):
+        return names[0]
+    if func == logic_not:
+        return names[0] + " ^ mask"
+    if func == logic_and:
+        return chain(" & ", names)
+    if func == logic_nand:
+        return "(" + chain(" & ", names) + ") ^ mask"
+    if func == logic_or:
+        return chain(" | ", names)
+    if func == logic_xor:  # TRUE unless every input is equal
+        if len(names) == 2:
+            return names[0] + " ^ " + names[1]
+        return "(" + chain(" | ", names) + ") & ((" + chain(" & ", names) + ") ^ mask)"
+    log_msg(ERROR, "Gates of type " + func.__name__ + " can't be compiled", ValueError)
+    return ""
+
+
+def netlist_source(netlist: Netlist, name: str = "evaluate") -> str:
+    """Source of a function name(values, mask=1) which returns the value of every gate of netlist"""
+    variable = variable_sources(netlist)
+    null = null_gates(netlist, variable)
+    lines = ["def {0}(values, mask=1):".format(name)]
+    for gate in netlist.order:
+        in_ids = netlist.inputs_of(gate)
+        if variable[gate]:
+            expression = "values[{0}]".format(gate)
+        elif null[gate]:
+            expression = str(NULL)
+        elif len(in_ids) == 0:
+            expression = "mask" if netlist.values[gate] == TRUE else "0"
+        else:
+            expression = gate_expression(netlist.funcs[gate], ["v" + str(in_id) for in_id in in_ids])
+        lines.append("    v{0} = {1}".format(gate, expression))
+    lines.append("    return [" + ", ".join("v" + str(gate) for gate in range(netlist.size)) + "]")
+    return "\n".join(lines) + "\n"
+
+
+def compile_netlist(netlist: Netlist) -> Callable[[list[int], int], list[int]]:
+    """Returns the function evaluating netlist, compiling it unless an identical netlist was compiled before"""
+    key = structural_hash(netlist)
+    if key in compiled_cache:
+        compiled_cache[key] = compiled_cache.pop(key)  # Most recently used last
+        return compiled_cache[key]
+
+    namespace = {}
+    exec(compile(netlist_source(netlist), "<netlist " + key[:12] + ">", "exec"), namespace)
+    if len(compiled_cache) >= max_cached_functions:
+        del compiled_cache[next(iter(compiled_cache))]
+    compiled_cache[key] = namespace["evaluate"]
+    return compiled_cache[key]
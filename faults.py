@@ -0,0 +1,170 @@
+########################################################################################################################
+# File: faults.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Stuck-at fault simulation. Every gate output may be stuck at FALSE or at TRUE, a fault is detected by
+#              an input vector if some output gate then differs from the fault free circuit. Vectors are simulated in
+#              batches, bit i of a gate's word being its value for vector i of the batch, so one pass of bitwise
+#              operations evaluates the whole batch. Each fault still undetected is then injected and only the gates
+#              whose word it changes are re-evaluated, and a fault is dropped as soon as a batch detects it.
+#
+#              Whether a gate is NULL doesn't depend on the values of the power and clock gates, so gates which are
+#              NULL are NULL for every vector. They and the faults on them are left out.
+########################################################################################################################
+import heapq
+import random
+from time import perf_counter
+
+from netlist import *
+
+
+class FaultReport(NamedTuple):
+    faults: int
+    detected: dict[tuple[int, int], int]  # (gate, stuck value) -> index of the first vector which detects it
+    undetected: list[tuple[int, int]]
+    vectors: int
+    seconds: float
+
+    @property
+    def coverage(self) -> float:
+        return len(self.detected) / self.faults if self.faults > 0 else 1.0
+
+    def summary(self) -> str:
+        return "{0} of {1} stuck-at faults detected by {2} vectors ({3:.1%} coverage) in {4:.3f}s" \
+            .format(len(self.detected), self.faults, self.vectors, self.coverage, self.seconds)
+
+
+def word_func(func: Callable, words: list[int], mask: int) -> int:
+    """Evaluates a gate on words of values, mask has a bit set for each vector in the batch"""
+    if func in (output, chip_pin):
+        return words[0]
+    if func == logic_not:
+        return ~words[0] & mask
+    if func in (logic_and, logic_nand):
+        result = mask
+        for word in words:
+            result &= word
+        return result if func == logic_and else ~result & mask
+    if func == logic_or:
+        result = 0
+        for word in words:
+            result |= word
+        return result
+    if func == logic_xor:  # TRUE unless every input is equal, so some input is TRUE and some is FALSE
+        any_true, all_true = 0, mask
+        for word in words:
+            any_true |= word
+            all_true &= word
+        return any_true & ~all_true
+    log_msg(ERROR, "Gates of type " + func.__name__ + " can't be fault simulated", ValueError)
+    return 0
+
+
+def random_vectors(count: int, width: int, seed: Optional[int] = None) -> list[list[int]]:
+    generator = random.Random(seed)
+    return [[generator.getrandbits(1) for _ in range(width)] for _ in range(count)]
+
+
+def exhaustive_vectors(width: int) -> list[list[int]]:
+    return [[(vector >> bit) & 1 for bit in range(width)] for vector in range(1 << width)]
+
+
+class FaultSimulator:
+    """Fault simulation of netlist. free are the ids of the sources set by the vectors, by default every power and
+    clock gate, and the top level output gates are observed"""
+
+    def __init__(self, netlist: Netlist, free: Optional[Iterable[int]] = None):
+        self.netlist = netlist
+        if free is None:
+            free = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] in (power, logic_clock)]
+        self.free = list(free)
+        free_set = set(self.free)
+
+        # Gates which are NULL with every source set to FALSE are NULL for every vector
+        values = list(netlist.values)
+        for gate in self.free:
+            netlist.values[gate] = FALSE
+        self.null = [value == NULL for value in netlist.evaluate()]
+        netlist.values[:] = values
+        for gate in self.free:
+            self.null[gate] = False
+        self.constants = {gate: netlist.values[gate] for gate in range(netlist.size)
+                          if gate not in free_set and netlist.fanin_start[gate] == netlist.fanin_start[gate + 1]}
+
+        self.observed = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] == output
+                         and not self.null[gate]]
+        self.is_observed = [False] * netlist.size
+        for gate in self.observed:
+            self.is_observed[gate] = True
+        self.position = [0] * netlist.size  # Position of each gate in the topological order
+        for idx, gate in enumerate(netlist.order):
+            self.position[gate] = idx
+        self.faults = [(gate, value) for gate in netlist.order if not self.null[gate] for value in (FALSE, TRUE)]
+
+    def good_words(self, vectors: list[Sequence[int]], mask: int) -> list[int]:
+        """Fault free value word of every gate for a batch of vectors"""
+        netlist = self.netlist
+        words = [0] * netlist.size
+        for column, gate in enumerate(self.free):
+            word = 0
+            for bit, vector in enumerate(vectors):
+                word |= vector[column] << bit
+            words[gate] = word
+        for gate in netlist.order:
+            if self.null[gate] or gate in self.constants:
+                words[gate] = mask if self.constants.get(gate) == TRUE else 0
+            elif netlist.fanin_start[gate] != netlist.fanin_start[gate + 1]:
+                words[gate] = word_func(netlist.funcs[gate], [words[in_id] for in_id in netlist.inputs_of(gate)], mask)
+        return words
+
+    def detects(self, fault: tuple[int, int], good: list[int], mask: int) -> int:
+        """Word with a bit set for each vector of the batch which detects fault"""
+        netlist = self.netlist
+        gate, value = fault
+        stuck = mask if value == TRUE else 0
+        if stuck == good[gate]:  # No vector of the batch sets the gate to the other value
+            return 0
+
+        faulty = {gate: stuck}  # Value word of every gate the fault changes
+        detected = (stuck ^ good[gate]) if self.is_observed[gate] else 0
+        queue = [(self.position[out_id], out_id) for out_id in netlist.outputs_of(gate)]
+        heapq.heapify(queue)
+        queued = set(netlist.outputs_of(gate))
+        while queue:  # Gates in topological order, so every input is final when a gate is evaluated
+            _, current = heapq.heappop(queue)
+            if self.null[current]:
+                continue
+            word = word_func(netlist.funcs[current], [faulty.get(in_id, good[in_id])
+                                                      for in_id in netlist.inputs_of(current)], mask)
+            if word == good[current]:
+                continue
+            faulty[current] = word
+            if self.is_observed[current]:
+                detected |= word ^ good[current]
+            for out_id in netlist.outputs_of(current):
+                if out_id not in queued:
+                    queued.add(out_id)
+                    heapq.heappush(queue, (self.position[out_id], out_id))
+        return detected
+
+    def run(self, vectors: list[Sequence[int]], batch_size: int = 256) -> FaultReport:
+        """Simulates every fault against vectors, each a value for every free source in order"""
+        start = perf_counter()
+        remaining = list(self.faults)
+        detected = {}
+        for first in range(0, len(vectors), batch_size):
+            if len(remaining) == 0:
+                break
+            batch = vectors[first:first + batch_size]
+            mask = (1 << len(batch)) - 1
+            good = self.good_words(batch, mask)
+            undetected = []
+            for fault in remaining:
+                word = self.detects(fault, good, mask)
+                if word:
+                    detected[fault] = first + (word & -word).bit_length() - 1  # Lowest set bit is the first vector
+                else:
+                    undetected.append(fault)
+            remaining = undetected
+        return FaultReport(len(self.faults), detected, remaining, len(vectors), perf_counter() - start)
@@ -0,0 +1,352 @@
+########################################################################################################################
+# File: fuzz.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Differential fuzzing of the evaluation engines against the reference Input class. Random circuits of a
+#              few gates, with random arities and some sources left NULL, are evaluated for several input vectors by
+#              Input.output() and by every engine, which must give each gate the same value. The engines cover the
+#              interpreted and compiled netlists, the optimizer, the timing and fault simulators, the bit-parallel
+#              sweep and switching activity, and the BDD and SAT engines, which are asked for each gate's value under
+#              the sources of a vector. A mismatch is shrunk, by dropping vectors, gates and connections and by
+#              clearing source values for as long as it still fails, and the minimal circuit is saved as a .cir file.
+#
+#              python fuzz.py [--cases N] [--seed N] [--out DIRECTORY]
+#
+#              Exits with 1 if any engine disagrees with the reference.
+########################################################################################################################
+import argparse
+import os
+import random
+from time import perf_counter
+
+from activity import *
+from bdd import *
+from faults import *
+from hdl_io import *
+from sat import *
+from sweep import *
+from timing import *
+
+source_funcs = (power, logic_clock)
+gate_funcs = (logic_not, logic_and, logic_nand, logic_or, logic_xor, output)
+unsteady = -2  # Value the activity engine gives a gate which toggled while its sources were held
+
+
+class FuzzCase(NamedTuple):
+    funcs: list[Callable]
+    inputs: list[list[int]]  # Distinct ids of each gate's inputs, all lower than the gate's own
+    vectors: list[list[int]]  # Value of every source for each vector, NULL for gates which aren't sources
+
+    def sources(self) -> list[int]:
+        return [gate for gate, func in enumerate(self.funcs) if func in source_funcs and len(self.inputs[gate]) == 0]
+
+    def free_sources(self) -> list[int]:
+        """Sources which aren't NULL, they are the same for every vector"""
+        return [gate for gate in self.sources() if self.vectors[0][gate] != NULL]
+
+    def netlist(self, vector: int = 0) -> Netlist:
+        return Netlist(self.funcs, self.vectors[vector], self.inputs)
+
+
+class Mismatch(NamedTuple):
+    engine: str
+    case: FuzzCase
+    vector: int
+    gate: int
+    expected: int
+    actual: int
+
+    def summary(self) -> str:
+        return "{0}: gate {1} ({2}) is {3} for vector {4}, the reference gives {5}" \
+            .format(self.engine, self.gate, self.case.funcs[self.gate].__name__, self.actual, self.vector,
+                    self.expected)
+
+
+def random_case(generator: random.Random, max_gates: int = 12, max_vectors: int = 8) -> FuzzCase:
+    """Random circuit whose sources are NULL, or TRUE and FALSE across the vectors. Every vector leaves the same
+    sources NULL, as the bit-parallel engines need"""
+    funcs, inputs = [], []
+    for gate in range(generator.randint(1, max_gates)):
+        if gate == 0 or generator.random() < 0.25:
+            funcs.append(generator.choice(source_funcs))
+            inputs.append([])
+            continue
+        func = generator.choice(gate_funcs)
+        arity = generator.choice((0, 1, 1, 1, 1)) if func in (logic_not, output) else generator.randint(0, 4)
+        funcs.append(func)
+        inputs.append(generator.sample(range(gate), min(arity, gate)))
+
+    null_sources = {gate for gate in range(len(funcs)) if funcs[gate] in source_funcs and generator.random() < 0.2}
+    vectors = [[(NULL if gate in null_sources else generator.randint(FALSE, TRUE)) if funcs[gate] in source_funcs
+                else NULL for gate in range(len(funcs))] for _ in range(generator.randint(1, max_vectors))]
+    return FuzzCase(funcs, inputs, vectors)
+
+
+def reference_values(case: FuzzCase, vector: int) -> list[int]:
+    """Values of every gate from the Input class, which re-evaluates each gate's whole input cone"""
+    gates = []
+    for gate, func in enumerate(case.funcs):
+        gates.append(Input(func, [gates[in_id] for in_id in case.inputs[gate]], case.vectors[vector][gate]))
+    return [gate.output() for gate in gates]
+
+
+# Engines ##############################################################################################################
+# Each returns the value of every gate for every vector of a case, None where the engine doesn't compute a gate
+def netlist_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    return [list(case.netlist(vector).evaluate()) for vector in range(len(case.vectors))]
+
+
+def compiled_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    evaluate = compile_netlist(case.netlist())
+    return [evaluate(case.vectors[vector]) for vector in range(len(case.vectors))]
+
+
+def compiled_words_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """All vectors at once, bit i of each source's word is its value for vector i"""
+    netlist = case.netlist()
+    mask = (1 << len(case.vectors)) - 1
+    words = list(netlist.values)
+    for gate in case.sources():
+        if words[gate] != NULL:
+            words[gate] = sum(vector[gate] << bit for bit, vector in enumerate(case.vectors))
+    values = compile_netlist(netlist)(words, mask)
+    return [[NULL if word == NULL else (word >> bit) & 1 for word in values] for bit in range(len(case.vectors))]
+
+
+def optimized_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    netlist = case.netlist()
+    free = case.free_sources()
+    optimized, new_id, _ = optimize_netlist(netlist, free=free, keep=range(netlist.size))
+    results = []
+    for vector in case.vectors:
+        for gate in free:
+            optimized.values[new_id[gate]] = vector[gate]
+        values = optimized.evaluate()
+        results.append([values[new_id[gate]] if new_id[gate] != NULL else None for gate in range(netlist.size)])
+    return results
+
+
+def timing_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Settles the first vector, then applies each next one as changes with random gate delays"""
+    netlist = case.netlist()
+    delays = random.Random(len(case.funcs)).choices(range(4), k=netlist.size)
+    simulator = TimingSimulator(netlist, delays)
+    results = [list(simulator.values)]
+    for vector in case.vectors[1:]:
+        simulator.set_inputs({gate: vector[gate] for gate in case.sources()})
+        simulator.run()
+        results.append(list(simulator.values))
+    return results
+
+
+def fault_free_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Fault free values of the fault simulator, which leaves out gates that are always NULL"""
+    netlist = case.netlist()
+    free = case.free_sources()
+    simulator = FaultSimulator(netlist, free)
+    words = simulator.good_words([[vector[gate] for gate in free] for vector in case.vectors],
+                                 (1 << len(case.vectors)) - 1)
+    return [[NULL if simulator.null[gate] else (words[gate] >> bit) & 1 for gate in range(netlist.size)]
+            for bit in range(len(case.vectors))]
+
+
+def vector_index(case: FuzzCase, vector: int) -> int:
+    """Number of a vector in a sweep of the free sources, free source i is bit i"""
+    return sum(case.vectors[vector][gate] << bit for bit, gate in enumerate(case.free_sources()))
+
+
+def sweep_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Looks every vector up in the truth tables of a sweep of the free sources, on one worker"""
+    netlist = case.netlist()
+    result = sweep(netlist, case.free_sources(), list(range(netlist.size)), workers=1)
+    results = []
+    for vector in range(len(case.vectors)):
+        index = vector_index(case, vector)
+        results.append([NULL if gate in result.null_outputs else (result.tables[gate][index >> 3] >> (index & 7)) & 1
+                         for gate in range(netlist.size)])
+    return results
+
+
+def sweep_hits_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Sweeps for the vectors which make each gate TRUE, a gate is TRUE for a vector if it is one of them"""
+    netlist = case.netlist()
+    free = case.free_sources()
+    results = [[None] * netlist.size for _ in case.vectors]
+    for gate in range(netlist.size):
+        result = sweep(netlist, free, [], {gate: TRUE}, workers=1)
+        hits = set(result.hits)
+        for vector in range(len(case.vectors)):
+            if gate in result.null_outputs:
+                results[vector][gate] = NULL
+            else:
+                results[vector][gate] = TRUE if vector_index(case, vector) in hits else FALSE
+    return results
+
+
+def activity_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Holds the sources at each vector with biases of 0 and 1 over three vectors, in batches of two so the vector
+    carried between batches is compared too. Every gate must be TRUE for all three or none and never toggle"""
+    netlist = case.netlist()
+    results = []
+    for vector in case.vectors:
+        report = random_activity(netlist, 3, {gate: float(vector[gate]) for gate in case.free_sources()}, 0, lanes=2)
+        results.append([NULL if report.null[gate] else
+                        report.ones[gate] // 3 if report.toggles[gate] == 0 and report.ones[gate] % 3 == 0 else
+                        unsteady for gate in range(netlist.size)])
+    return results
+
+
+def bdd_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Builds the diagram of every gate over the free sources, a gate is TRUE for a vector if its diagram and the
+    cube of the vector have a satisfying assignment"""
+    netlist = case.netlist()
+    free = case.free_sources()
+    bdd = BDD(len(free))
+    diagrams = build_output_bdds(bdd, netlist, {gate: var for var, gate in enumerate(free)}, list(range(netlist.size)))
+    results = []
+    for vector in case.vectors:
+        cube = 1
+        for var, gate in enumerate(free):
+            literal = bdd.variable(var)
+            cube = bdd.conjoin(cube, literal if vector[gate] == TRUE else bdd.negate(literal))
+        results.append([NULL if diagrams[gate] is None else int(bdd.sat_count(bdd.conjoin(diagrams[gate], cube)) > 0)
+                        for gate in range(netlist.size)])
+    return results
+
+
+def sat_engine(case: FuzzCase) -> list[list[Optional[int]]]:
+    """Asks the solver whether each gate can be TRUE, then FALSE, with the free sources held at a vector. A gate
+    which can be neither is NULL"""
+    netlist = case.netlist()
+    free = case.free_sources()
+    results = []
+    for vector in case.vectors:
+        held = {gate: vector[gate] for gate in free}
+        values = []
+        for gate in range(netlist.size):
+            value = NULL
+            for target in (TRUE, FALSE):
+                if gate in held and held[gate] != target:  # A held source is its own target
+                    continue
+                if solve_for_values(netlist, {**held, gate: target}, free).satisfiable:
+                    value = target
+                    break
+            values.append(value)
+        results.append(values)
+    return results
+
+
+engines = {
+    "netlist": netlist_engine,
+    "compiled": compiled_engine,
+    "compiled_words": compiled_words_engine,
+    "optimized": optimized_engine,
+    "timing": timing_engine,
+    "fault_free": fault_free_engine,
+    "sweep": sweep_engine,
+    "sweep_hits": sweep_hits_engine,
+    "activity": activity_engine,
+    "bdd": bdd_engine,
+    "sat": sat_engine,
+}
+
+
+def find_mismatch(case: FuzzCase, engine_names: Iterable[str]) -> Optional[Mismatch]:
+    expected = [reference_values(case, vector) for vector in range(len(case.vectors))]
+    for name in engine_names:
+        actual = engines[name](case)
+        for vector in range(len(case.vectors)):
+            for gate, value in enumerate(actual[vector]):
+                if value is not None and value != expected[vector][gate]:
+                    return Mismatch(name, case, vector, gate, expected[vector][gate], value)
+    return None
+
+
+# Shrinking ############################################################################################################
+def without_gate(case: FuzzCase, removed: int) -> FuzzCase:
+    def renumber(in_id: int) -> int:
+        return in_id - 1 if in_id > removed else in_id
+
+    keep = [gate for gate in range(len(case.funcs)) if gate != removed]
+    return FuzzCase([case.funcs[gate] for gate in keep],
+                    [[renumber(in_id) for in_id in case.inputs[gate] if in_id != removed] for gate in keep],
+                    [[vector[gate] for gate in keep] for vector in case.vectors])
+
+
+def smaller_cases(case: FuzzCase) -> Iterator[FuzzCase]:
+    """Every case one step simpler than case"""
+    if len(case.vectors) > 1:
+        for vector in case.vectors:
+            yield case._replace(vectors=[vector])
+    for gate in reversed(range(len(case.funcs))):
+        yield without_gate(case, gate)
+    for gate, in_ids in enumerate(case.inputs):
+        for in_id in in_ids:
+            yield case._replace(inputs=[[other for other in other_ids if (gate_id, other) != (gate, in_id)]
+                                        for gate_id, other_ids in enumerate(case.inputs)])
+    for gate in case.sources():  # Every vector gets the same value, so the NULL sources stay the same across them
+        for value in (FALSE, NULL):
+            if any(vector[gate] != value for vector in case.vectors):
+                yield case._replace(vectors=[vector[:gate] + [value] + vector[gate + 1:] for vector in case.vectors])
+
+
+def shrink(mismatch: Mismatch) -> Mismatch:
+    """Greedily simplifies the case of mismatch while the same engine still disagrees with the reference"""
+    shrinking = True
+    while shrinking:
+        shrinking = False
+        for case in smaller_cases(mismatch.case):
+            if len(case.funcs) == 0:
+                continue
+            smaller = find_mismatch(case, (mismatch.engine,))
+            if smaller is not None:
+                mismatch = smaller
+                shrinking = True
+                break
+    return mismatch
+
+
+def case_snapshot(case: FuzzCase, vector: int = 0) -> CircuitSnapshot:
+    """Laid out circuit of a case, its sources hold the values of one vector"""
+    builder = NetlistBuilder()
+    for gate, func in enumerate(case.funcs):
+        builder.add_gate(func.__name__, list(case.inputs[gate]), None, case.vectors[vector][gate])
+    snapshot = builder.build(1000, 800)
+    return snapshot._replace(gates=tuple(record._replace(rate=1.0) if record.func == logic_clock.__name__ else record
+                                         for record in snapshot.gates))
+
+
+def fuzz(cases: int, seed: int, engine_names: Iterable[str] = tuple(engines)) -> list[Mismatch]:
+    """Runs cases random cases, returns the shrunk mismatches"""
+    generator = random.Random(seed)
+    engine_names = list(engine_names)
+    mismatches = []
+    for _ in range(cases):
+        mismatch = find_mismatch(random_case(generator), engine_names)
+        if mismatch is not None:
+            mismatches.append(shrink(mismatch))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the evaluation engines")
+    parser.add_argument("--cases", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None, help="random by default, printed so a run can be repeated")
+    parser.add_argument("--out", default="fuzz_failures", help="directory the shrunk circuits are saved to")
+    parser.add_argument("--engines", nargs="+", choices=tuple(engines), default=tuple(engines))
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    start = perf_counter()
+    found = fuzz(args.cases, seed, args.engines)
+    elapsed = perf_counter() - start
+    log_msg(INFO, "{0} cases with seed {1} in {2:.2f}s ({3:.0f} cases/s), {4} mismatches"
+            .format(args.cases, seed, elapsed, args.cases / elapsed if elapsed > 0 else 0, len(found)))
+    if len(found) > 0:
+        os.makedirs(args.out, exist_ok=True)
+    for number, mismatch in enumerate(found):
+        file_name = os.path.join(args.out, "{0}_{1}_{2}.cir".format(mismatch.engine, seed, number))
+        save_circuit(file_name, case_snapshot(mismatch.case, mismatch.vector))
+        log_msg(WARNING, mismatch.summary() + ", saved to " + file_name)
+    sys.exit(1 if len(found) > 0 else 0)
@@ -0,0 +1,562 @@
+########################################################################################################################
+# File: hdl_io.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Import and export of gate level netlists in BLIF (.blif) and structural Verilog (.v). Files are parsed
+#              one line or statement at a time into a NetlistBuilder, which maps every cell onto the board's gates and
+#              lays the gates out in columns by logic level. The result is a CircuitSnapshot, loaded through the same
+#              bulk path as a .cir file. Exporting writes a compiled Netlist, so custom chips are written flattened.
+#
+#              Primary inputs become power gates and primary outputs become output gates. Both formats are two valued,
+#              so a NULL in the board is not represented. Latches and library cells are not supported.
+########################################################################################################################
+import re
+
+from circuit_io import *
+from netlist import *
+
+BLIF_FILE_TYPE = ".blif"
+VERILOG_FILE_TYPE = ".v"
+LAYOUT_MARGIN = 60  # Distance between the edge of the board and the first gates
+LAYOUT_SPACING = (110, 70)  # Largest horizontal/vertical distance between generated gates
+
+
+class NetlistBuilder:
+    """Collects gates which read and drive named nets, in any order, and resolves them into a snapshot. A reference to
+    a signal is either a net name or the id of a gate"""
+
+    def __init__(self):
+        self.funcs = []  # Function name of each gate
+        self.states = []
+        self.in_refs = []  # References to the signals each gate reads
+        self.labels = []
+        self.drivers = {}  # Net name -> id of the gate driving it
+        self.aliases = {}  # Net name -> reference to the signal it is connected to, from buffers and assigns
+        self.outputs = []  # Names of the primary outputs
+        self.inverters = {}  # Reference -> id of the not gate inverting it, shared by every complemented use
+        self.constants = {}  # Value -> id of the power gate holding it
+
+    def add_gate(self, func: str, in_refs: list, out_net: Optional[str] = None, state: int = NULL) -> int:
+        gate = len(self.funcs)
+        self.funcs.append(func)
+        self.states.append(state)
+        self.in_refs.append(in_refs)
+        self.labels.append(out_net if out_net is not None else "")
+        if out_net is not None:
+            self.drive(out_net, gate)
+        return gate
+
+    def drive(self, net: str, ref) -> None:
+        """Connects net to the signal ref"""
+        if net in self.drivers or net in self.aliases:
+            log_msg(ERROR, "Net " + net + " has more than one driver", ValueError)
+        if isinstance(ref, int):
+            if self.labels[ref] == "":
+                self.labels[ref] = net
+            self.drivers[net] = ref
+        else:
+            self.aliases[net] = ref
+
+    def add_input(self, net: str) -> int:
+        return self.add_gate("power", [], net, FALSE)
+
+    def add_output(self, net: str) -> None:
+        self.outputs.append(net)
+
+    def invert(self, ref) -> int:
+        if ref not in self.inverters:
+            self.inverters[ref] = self.add_gate("logic_not", [ref])
+        return self.inverters[ref]
+
+    def constant(self, value: int) -> int:
+        if value not in self.constants:
+            self.constants[value] = self.add_gate("power", [], state=value)
+            self.labels[self.constants[value]] = "const" + str(value)
+        return self.constants[value]
+
+    def resolve(self, ref) -> int:
+        """Returns the gate driving ref, following buffers"""
+        seen = []
+        while not isinstance(ref, int):
+            if ref in self.drivers:
+                ref = self.drivers[ref]
+            elif ref in self.aliases:
+                seen.append(ref)
+                if len(seen) > len(self.aliases):
+                    log_msg(ERROR, "Net " + ref + " is connected to itself through buffers", ValueError)
+                ref = self.aliases[ref]
+            else:
+                log_msg(ERROR, "Net " + ref + " is used but never driven", ValueError)
+        for net in seen:  # Shorten the chain for the next lookup
+            self.aliases[net] = ref
+        return ref
+
+    def build(self, width: int, height: int) -> CircuitSnapshot:
+        """Resolves every net and lays the gates out in columns by logic level, fitted into width x height"""
+        for net in self.outputs:
+            self.add_gate("output", [net], None)
+            self.labels[-1] = net
+        inputs = [tuple(dict.fromkeys(self.resolve(ref) for ref in refs)) for refs in self.in_refs]
+
+        # Level of every gate, found with a topological sort
+        size = len(self.funcs)
+        fanout = [[] for _ in range(size)]
+        in_degree = [len(in_ids) for in_ids in inputs]
+        for gate, in_ids in enumerate(inputs):
+            for in_id in in_ids:
+                fanout[in_id].append(gate)
+        levels = [0] * size
+        ready = [gate for gate in range(size) if in_degree[gate] == 0]
+        head = 0
+        while head < len(ready):
+            gate = ready[head]
+            head += 1
+            for out_id in fanout[gate]:
+                levels[out_id] = max(levels[out_id], levels[gate] + 1)
+                in_degree[out_id] -= 1
+                if in_degree[out_id] == 0:
+                    ready.append(out_id)
+        if len(ready) != size:
+            log_msg(ERROR, "Netlist contains a combinational cycle", ValueError)
+
+        # Outputs go in the last column. Columns and rows shrink to fit the board if there are too many gates
+        last_level = max(levels, default=0) + 1
+        for gate in range(size):
+            if self.funcs[gate] == "output":
+                levels[gate] = last_level
+        column_sizes = [0] * (last_level + 1)
+        for level in levels:
+            column_sizes[level] += 1
+        step_x = min(LAYOUT_SPACING[0], (width - 2 * LAYOUT_MARGIN) / max(last_level, 1))
+        step_y = min(LAYOUT_SPACING[1], (height - 2 * LAYOUT_MARGIN) / max(max(column_sizes) - 1, 1))
+
+        rows = [0] * (last_level + 1)
+        records = []
+        for gate in range(size):
+            level = levels[gate]
+            records.append(GateRecord(self.funcs[gate], int(LAYOUT_MARGIN + level * step_x),
+                                      int(LAYOUT_MARGIN + rows[level] * step_y), self.states[gate], 0.0,
+                                      self.labels[gate]))
+            rows[level] += 1
+        return CircuitSnapshot(tuple(records), tuple(inputs))
+
+
+# BLIF #################################################################################################################
+def blif_lines(load_file) -> Iterator[list[str]]:
+    """Yields the tokens of each logical line, comments are dropped and continued lines joined"""
+    pending = []
+    for line in load_file:
+        line = line.split('#', 1)[0].strip()
+        if line.endswith('\\'):
+            pending.extend(line[:-1].split())
+            continue
+        tokens = pending + line.split()
+        pending = []
+        if len(tokens) > 0:
+            yield tokens
+    if len(pending) > 0:
+        yield pending
+
+
+def blif_cover(builder: NetlistBuilder, in_nets: list[str], out_net: str, rows: list[(str, str)]) -> None:
+    """Maps the single output cover of a .names block onto gates. Common covers become one gate, anything else is
+    built as a sum of products"""
+    num_inputs = len(in_nets)
+    on_set = len(rows) == 0 or rows[0][1] == '1'
+    cubes = [cube for cube, _ in rows]
+    if num_inputs == 0 or len(cubes) == 0:  # Constant
+        builder.drive(out_net, builder.constant(int(on_set and len(cubes) > 0)))
+        return
+
+    # Covers with one literal per cube, each on a different input, are an or of the literals
+    literals = {(i, bit) for cube in cubes if cube.count('-') == num_inputs - 1
+                for i, bit in enumerate(cube) if bit != '-'}
+    single_literals = len(cubes) == num_inputs and len({i for i, _ in literals}) == num_inputs
+    if num_inputs == 1 and len(cubes) == 1 and cubes[0] in ('0', '1'):  # Buffer or inverter
+        if (cubes[0] == '1') == on_set:
+            builder.drive(out_net, in_nets[0])
+        else:
+            builder.drive(out_net, builder.invert(in_nets[0]))
+    elif num_inputs >= 2 and cubes == ['1' * num_inputs]:
+        builder.add_gate("logic_and" if on_set else "logic_nand", in_nets, out_net)
+    elif num_inputs >= 2 and single_literals and on_set and all(bit == '1' for _, bit in literals):
+        builder.add_gate("logic_or", in_nets, out_net)
+    elif num_inputs >= 2 and single_literals and on_set and all(bit == '0' for _, bit in literals):
+        builder.add_gate("logic_nand", in_nets, out_net)
+    elif num_inputs == 2 and sorted(cubes) == ['01', '10'] and on_set:
+        builder.add_gate("logic_xor", in_nets, out_net)
+    elif num_inputs >= 2 and sorted(cubes) == ['0' * num_inputs, '1' * num_inputs] and not on_set:
+        builder.add_gate("logic_xor", in_nets, out_net)  # Powered unless every input is the same, as exported
+    elif num_inputs == 2 and sorted(cubes) == ['01', '10']:
+        builder.drive(out_net, builder.invert(builder.add_gate("logic_xor", in_nets)))
+    else:
+        terms = []
+        for cube in cubes:
+            literals = [in_nets[i] if bit == '1' else builder.invert(in_nets[i])
+                        for i, bit in enumerate(cube) if bit != '-']
+            if len(literals) == 0:
+                terms.append(builder.constant(TRUE))
+            else:
+                terms.append(literals[0] if len(literals) == 1 else builder.add_gate("logic_and", literals))
+        result = terms[0] if len(terms) == 1 else builder.add_gate("logic_or", terms)
+        builder.drive(out_net, result if on_set else builder.invert(result))
+
+
+def read_blif(file_name: str, width: int = 4000, height: int = 3000) -> CircuitSnapshot:
+    """Reads the first model of a BLIF file"""
+    builder = NetlistBuilder()
+    cover = None  # (input nets, output net, rows) of the .names block being read
+    with open(file_name, 'r') as load_file:
+        for tokens in blif_lines(load_file):
+            if not tokens[0].startswith('.'):
+                if cover is None:
+                    log_msg(ERROR, "Cover line outside of a .names block: " + " ".join(tokens), ValueError)
+                cover[2].append((tokens[0], tokens[1]) if len(tokens) == 2 else ("", tokens[0]))
+                continue
+
+            if cover is not None:
+                blif_cover(builder, *cover)
+                cover = None
+            directive = tokens[0]
+            if directive == ".inputs":
+                for net in tokens[1:]:
+                    builder.add_input(net)
+            elif directive == ".outputs":
+                for net in tokens[1:]:
+                    builder.add_output(net)
+            elif directive == ".names":
+                cover = (tokens[1:-1], tokens[-1], [])
+            elif directive == ".end":
+                break
+            elif directive in (".latch", ".subckt", ".gate", ".mlatch"):
+                log_msg(ERROR, directive + " is not supported, only combinational logic can be imported", ValueError)
+            # .model, .default_input_arrival and other attributes don't affect the logic
+        if cover is not None:
+            blif_cover(builder, *cover)
+    return builder.build(width, height)
+
+
+# Verilog ##############################################################################################################
+# Escaped identifier, identifier with an optional bit select, sized constant, number or a single character
+VERILOG_TOKEN = re.compile(r"\s*(?:(\\\S+)|([A-Za-z_][\w$]*(?:\s*\[\s*\d+\s*\])?)|(\d*'[bBdDhH][0-9a-fA-F]+)|"
+                           r"(\d+)|(.))")
+VERILOG_PRIMITIVES = {"and": ("logic_and", False), "nand": ("logic_nand", False), "or": ("logic_or", False),
+                      "nor": ("logic_or", True), "xor": ("logic_xor", False), "xnor": ("logic_xor", True),
+                      "not": ("logic_not", False), "buf": (None, False)}  # Cell -> (gate, output inverted)
+
+
+def verilog_statements(load_file) -> Iterator[str]:
+    """Yields each statement of a Verilog file with the comments and compiler directives removed, endmodule, which
+    doesn't end in a semicolon, is yielded by itself"""
+    statement = []
+    in_comment = False
+    for line in load_file:
+        if not in_comment and line.lstrip().startswith('`'):
+            continue
+        while line:
+            if in_comment:
+                end = line.find("*/")
+                if end < 0:
+                    line = ""
+                    continue
+                line, in_comment = line[end + 2:], False
+            start_block, start_line = line.find("/*"), line.find("//")
+            if start_line >= 0 and (start_block < 0 or start_line < start_block):
+                line = line[:start_line]
+                continue
+            if start_block >= 0:
+                statement.append(line[:start_block] + " ")
+                line, in_comment = line[start_block + 2:], True
+                continue
+            *complete, line = line.split(';')
+            for part in complete:
+                statement.append(part)
+                yield " ".join(statement).strip()
+                statement = []
+            if line.strip() == "endmodule":
+                yield line.strip()
+                line = ""
+            statement.append(line)
+            line = ""
+    if "".join(statement).strip():
+        yield " ".join(statement).strip()
+
+
+def verilog_tokens(text: str) -> list[str]:
+    tokens = []
+    for match in VERILOG_TOKEN.finditer(text):
+        escaped, name, sized, number, other = match.groups()
+        if escaped is not None:
+            tokens.append(escaped[1:])
+        elif name is not None:
+            tokens.append(re.sub(r"\s+", "", name))
+        elif sized is not None:
+            tokens.append(sized)
+        elif number is not None:
+            tokens.append(number)
+        elif other is not None and not other.isspace():
+            tokens.append(other)
+    return tokens
+
+
+def verilog_names(tokens: list[str]) -> list[str]:
+    """Expands a declaration's tokens, such as [3:0] a, b, into the names of its single bit nets"""
+    names = []
+    bus = None
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == '[':  # Range, tokens are '[' msb ':' lsb ']'
+            msb, lsb = int(tokens[i + 1]), int(tokens[i + 3])
+            bus = range(msb, lsb - 1, -1) if msb >= lsb else range(msb, lsb + 1)
+            i += 5
+            continue
+        if tokens[i] not in (',', "wire", "reg", "signed"):
+            names.extend(tokens[i] + "[" + str(bit) + "]" for bit in bus) if bus is not None \
+                else names.append(tokens[i])
+        i += 1
+    return names
+
+
+class VerilogExpression:
+    """Recursive descent parser for the right hand side of an assign. Precedence from lowest is | ^ & ~"""
+
+    def __init__(self, builder: NetlistBuilder, tokens: list[str]):
+        self.builder = builder
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def parse(self):
+        ref = self.binary(0)
+        if self.peek() is not None:
+            log_msg(ERROR, "Unexpected " + self.peek() + " in assign", ValueError)
+        return ref
+
+    def binary(self, level: int):
+        """Parses a chain of one operator, a & b & c becomes a single and gate"""
+        operators = ('|', '^', '&')
+        if level == len(operators):
+            return self.unary()
+        operands = [self.binary(level + 1)]
+        while self.peek() == operators[level]:
+            self.take()
+            operands.append(self.binary(level + 1))
+        if len(operands) == 1:
+            return operands[0]
+        if operators[level] == '^':  # Xor gates compare neighbours, so only chain two inputs at a time
+            ref = operands[0]
+            for operand in operands[1:]:
+                ref = self.builder.add_gate("logic_xor", [ref, operand])
+            return ref
+        return self.builder.add_gate("logic_or" if operators[level] == '|' else "logic_and", operands)
+
+    def unary(self):
+        token = self.take() if self.peek() is not None else None
+        if token in ('~', '!'):
+            ref = self.unary()
+            # ~(a & b) is a single nand gate if the and gate isn't used anywhere else
+            if isinstance(ref, int) and self.builder.funcs[ref] == "logic_and" and self.builder.labels[ref] == "" \
+                    and ref not in self.builder.inverters:
+                self.builder.funcs[ref] = "logic_nand"
+                return ref
+            return self.builder.invert(ref)
+        if token == '(':
+            ref = self.binary(0)
+            if self.take() != ')':
+                log_msg(ERROR, "Missing ) in assign", ValueError)
+            return ref
+        if token is not None and "'" in token:
+            return self.builder.constant(int(int(token.split("'")[1][1:], 16) != 0))
+        if token is not None and token.isdigit():
+            return self.builder.constant(int(int(token) != 0))
+        if token is None or token in ('(', ')', '|', '^', '&', '=', ','):
+            log_msg(ERROR, "Unexpected " + str(token) + " in assign", ValueError)
+        return token
+
+
+def verilog_instance(builder: NetlistBuilder, cell: str, tokens: list[str]) -> None:
+    """Adds a primitive gate instance, cell name (output, input, ...) with an optional instance name"""
+    if '(' not in tokens:
+        log_msg(ERROR, "Malformed " + cell + " instance", ValueError)
+    ports = [token for token in tokens[tokens.index('(') + 1:] if token not in (',', ')')]
+    if len(ports) < 2 or any(port.startswith('.') for port in ports):
+        log_msg(ERROR, "Only positional " + cell + " primitives are supported", ValueError)
+    func, inverted = VERILOG_PRIMITIVES[cell]
+    out_net, in_nets = ports[0], ports[1:]
+    if func is None:  # Buffer
+        builder.drive(out_net, in_nets[0])
+    elif func == "logic_not":
+        builder.drive(out_net, builder.invert(in_nets[0]))
+    elif func == "logic_and" and len(in_nets) == 1:
+        builder.drive(out_net, in_nets[0])
+    elif func == "logic_xor" and len(in_nets) > 2:  # Chain so that it is the parity of all the inputs
+        ref = in_nets[0]
+        for in_net in in_nets[1:]:
+            ref = builder.add_gate("logic_xor", [ref, in_net])
+        builder.drive(out_net, builder.invert(ref) if inverted else ref)
+    elif inverted:
+        builder.drive(out_net, builder.invert(builder.add_gate(func, in_nets)))
+    else:
+        builder.add_gate(func, in_nets, out_net)
+
+
+def read_verilog(file_name: str, width: int = 4000, height: int = 3000) -> CircuitSnapshot:
+    """Reads the first module of a structural Verilog file made of primitive gates and assigns"""
+    builder = NetlistBuilder()
+    with open(file_name, 'r') as load_file:
+        for statement in verilog_statements(load_file):
+            tokens = verilog_tokens(statement)
+            if len(tokens) == 0 or tokens[0] == "module":
+                continue
+            keyword = tokens[0]
+            if keyword == "endmodule":
+                break
+            if keyword == "input":
+                for net in verilog_names(tokens[1:]):
+                    builder.add_input(net)
+            elif keyword == "output":
+                for net in verilog_names(tokens[1:]):
+                    builder.add_output(net)
+            elif keyword == "assign":
+                if '=' not in tokens:
+                    log_msg(ERROR, "Malformed assign: " + statement, ValueError)
+                split = tokens.index('=')
+                builder.drive("".join(tokens[1:split]), VerilogExpression(builder, tokens[split + 1:]).parse())
+            elif keyword in VERILOG_PRIMITIVES:
+                verilog_instance(builder, keyword, tokens[1:])
+            elif keyword not in ("wire", "reg"):
+                log_msg(ERROR, "Unsupported Verilog statement: " + statement[:80], ValueError)
+    return builder.build(width, height)
+
+
+# Export ###############################################################################################################
+def netlist_names(netlist: Netlist, escape: Callable[[str], str]) -> list[str]:
+    """Picks a unique net name for every gate from its label, output gates are named first so their ports keep their
+    labels"""
+    names = [""] * netlist.size
+    used = set()
+    order = sorted(range(netlist.size), key=lambda gate: netlist.funcs[gate] != output or gate >= netlist.gate_count)
+    for gate in order:
+        name = escape(netlist.labels[gate]) if netlist.labels[gate] != "" else ""
+        if name == "" or name in used:
+            name = escape((netlist.labels[gate] + "_" if name != "" else "") + "n" + str(gate))
+        used.add(name)
+        names[gate] = name
+    return names
+
+
+def netlist_ports(netlist: Netlist) -> (list[int], list[int]):
+    """Returns the gates which are the primary inputs and the primary outputs"""
+    inputs = [gate for gate in range(netlist.gate_count)
+              if netlist.funcs[gate] in (power, logic_clock) and len(netlist.inputs_of(gate)) == 0]
+    outputs = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] == output]
+    return inputs, outputs
+
+
+def blif_name(label: str) -> str:
+    """Returns label as a BLIF name, every character other tools may not accept is replaced, such as '#' which
+    starts a comment"""
+    return re.sub(r"[^A-Za-z0-9_\[\]]", "_", label)
+
+
+def write_blif(file_name: str, netlist: Netlist, model: str = "logical") -> None:
+    """Writes a netlist as a BLIF model, each gate becomes one .names block"""
+    names = netlist_names(netlist, blif_name)
+    inputs, outputs = netlist_ports(netlist)
+    input_set = set(inputs)
+    with open(file_name, 'w', buffering=WRITE_BUFFER_SIZE) as save_file:
+        save_file.write(".model " + blif_name(model) + "\n")
+        save_file.write(".inputs " + " ".join(names[gate] for gate in inputs) + "\n")
+        save_file.write(".outputs " + " ".join(names[gate] for gate in outputs) + "\n")
+        for gate in range(netlist.size):
+            func, in_ids = netlist.funcs[gate], netlist.inputs_of(gate)
+            if gate in input_set or isinstance(func, ChipDefinition):  # Chips were flattened into other gates
+                continue
+            count = len(in_ids)
+            save_file.write(".names " + " ".join([names[in_id] for in_id in in_ids] + [names[gate]]) + "\n")
+            if count == 0:  # Constant, NULL is written as 0
+                save_file.write("1\n" if netlist.values[gate] == TRUE else "")
+            elif func == logic_and:
+                save_file.write("1" * count + " 1\n")
+            elif func == logic_nand:
+                save_file.write("".join("-" * i + "0" + "-" * (count - i - 1) + " 1\n" for i in range(count)))
+            elif func == logic_or:
+                save_file.write("".join("-" * i + "1" + "-" * (count - i - 1) + " 1\n" for i in range(count)))
+            elif func == logic_not:
+                save_file.write("0 1\n")
+            elif func == logic_xor:  # Powered unless every input is the same
+                save_file.write("0" * count + " 0\n" + "1" * count + " 0\n")
+            else:  # Output gates, chip pins and the chips' input pins pass their input through
+                save_file.write("1 1\n")
+        save_file.write(".end\n")
+
+
+def verilog_name(label: str) -> str:
+    """Returns label as a Verilog identifier, escaping it if it isn't a simple one"""
+    if re.fullmatch(r"[A-Za-z_][\w$]*", label):
+        return label
+    return "\\" + re.sub(r"\s+", "_", label) + " "
+
+
+def write_verilog(file_name: str, netlist: Netlist, model: str = "logical") -> None:
+    """Writes a netlist as a structural Verilog module of primitive gates"""
+    names = netlist_names(netlist, verilog_name)
+    inputs, outputs = netlist_ports(netlist)
+    input_set = set(inputs)
+    port_set = input_set | set(outputs)
+    with open(file_name, 'w', buffering=WRITE_BUFFER_SIZE) as save_file:
+        save_file.write("module " + verilog_name(re.sub(r"\W", "_", model)) + "(" +
+                        ", ".join(names[gate] for gate in inputs + outputs) + ");\n")
+        for gate in inputs:
+            save_file.write("  input " + names[gate] + ";\n")
+        for gate in outputs:
+            save_file.write("  output " + names[gate] + ";\n")
+        for gate in range(netlist.size):
+            if gate not in port_set and not isinstance(netlist.funcs[gate], ChipDefinition):
+                save_file.write("  wire " + names[gate] + ";\n")
+
+        for gate in range(netlist.size):
+            func, in_ids = netlist.funcs[gate], netlist.inputs_of(gate)
+            if gate in input_set or isinstance(func, ChipDefinition):
+                continue
+            in_names = [names[in_id] for in_id in in_ids]
+            primitive = {logic_and: "and", logic_nand: "nand", logic_or: "or", logic_not: "not"}.get(func)
+            if len(in_ids) == 0:  # Constant, NULL is written as 0
+                save_file.write("  assign " + names[gate] + " = 1'b" + str(int(netlist.values[gate] == TRUE)) + ";\n")
+            elif primitive is not None:
+                save_file.write("  " + primitive + " g" + str(gate) + "(" + ", ".join([names[gate]] + in_names) +
+                                ");\n")
+            elif func == logic_xor and len(in_ids) == 2:
+                save_file.write("  xor g" + str(gate) + "(" + ", ".join([names[gate]] + in_names) + ");\n")
+            elif func == logic_xor:  # Powered unless every input is the same
+                save_file.write("  assign " + names[gate] + " = (" + " | ".join(in_names) + ") & ~(" +
+                                " & ".join(in_names) + ");\n")
+            else:  # Output gates, chip pins and the chips' input pins pass their input through
+                save_file.write("  assign " + names[gate] + " = " + in_names[0] + ";\n")
+        save_file.write("endmodule\n")
+
+
+def is_netlist_file(file_name: str) -> bool:
+    return file_name.endswith(BLIF_FILE_TYPE) or file_name.endswith(VERILOG_FILE_TYPE)
+
+
+def read_netlist(file_name: str, width: int = 4000, height: int = 3000) -> CircuitSnapshot:
+    """Reads a BLIF or Verilog file, picked by the file's extension"""
+    if file_name.endswith(BLIF_FILE_TYPE):
+        return read_blif(file_name, width, height)
+    return read_verilog(file_name, width, height)
+
+
+def write_netlist(file_name: str, netlist: Netlist, model: str = "logical") -> None:
+    """Writes a BLIF or Verilog file, picked by the file's extension"""
+    if file_name.endswith(BLIF_FILE_TYPE):
+        write_blif(file_name, netlist, model)
+    else:
+        write_verilog(file_name, netlist, model)
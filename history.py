@@ -0,0 +1,112 @@
+########################################################################################################################
+# File: history.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Undo/redo history of board edits. Each entry is a tuple of small command tuples which can be applied
+#              forwards (redo) or backwards (undo), nothing is copied from the board except the gates an entry creates
+#              or deletes. Gate records are immutable and shared between an entry and anything else holding them.
+#
+#              ("place", gates, edges)    Gates were created, gates is ((uid, GateRecord), ...) and edges is
+#              ("delete", gates, edges)   or deleted. edges is ((source uid, destination uid, input index), ...),
+#                                         every connection the gates had and which input of the destination it was
+#              ("move", uid, (x, y), (x, y))                      Old and new center
+#              ("connect", source uid, destination uid, input index)
+#              ("disconnect", source uid, destination uid, input index)
+#              ("rename", uid, old label, new label)
+#              ("clock", uid, old rate, old state, new rate, new state)
+########################################################################################################################
+from collections import deque
+
+from circuit_io import *
+
+
+def capture_gates(gates: list[InputTk]) -> (tuple, tuple):
+    """Returns the records and connections needed to recreate gates, as used by place and delete commands"""
+    gate_set = set(gates)
+    records = tuple((gate.uid, gate_record(gate)) for gate in gates)
+    edges = [(in_gate.uid, gate.uid, index) for gate in gates for index, in_gate in enumerate(gate.get_input_gates())]
+    edges.extend((gate.uid, out_gate.uid, out_gate.get_input_gates().index(gate)) for gate in gates
+                 for out_gate in gate.get_output_gates() if out_gate not in gate_set)
+    return records, tuple(edges)
+
+
+def restore_connections(edges: Iterable[tuple[int, int, int]], gates_by_uid: dict) -> None:
+    """Reconnects the edges of a place or delete command, each at the input of its destination it was. Edges whose
+    gates aren't in gates_by_uid are skipped"""
+    # Inserting in order of index puts every input back where it was among the inputs which were kept
+    for src_uid, dest_uid, index in sorted(edges, key=lambda edge: edge[2]):
+        if src_uid not in gates_by_uid or dest_uid not in gates_by_uid:
+            continue
+        src, dest = gates_by_uid[src_uid], gates_by_uid[dest_uid]
+        if is_chip_pin(dest):  # Pins refuse every input but their own chip
+            dest.add_line(src, index)
+        else:
+            connect_gates(src, dest, index)
+
+
+def command_cost(command: tuple) -> int:
+    """Rough size of a command, used to bound the memory held by the history"""
+    if command[0] in ("place", "delete"):
+        return 1 + len(command[1]) + len(command[2])
+    return 1
+
+
+class EditHistory:
+    """Undo and redo stacks. The total cost of the entries is kept under limit by evicting the oldest undo entries,
+    the newest entry is always kept"""
+
+    def __init__(self, limit: int = 100000):
+        self.limit = limit
+        self.undo_entries = deque()  # (cost, entry), newest on the right
+        self.redo_entries = []  # (cost, entry), next to redo last
+        self.cost = 0
+
+    def record(self, *commands: tuple) -> None:
+        """Records an edit made by the user as one entry, undone and redone together. This discards everything that
+        could be redone"""
+        if len(commands) > 0:
+            self.push(commands)
+
+    def push(self, entry: tuple) -> None:
+        for cost, _ in self.redo_entries:
+            self.cost -= cost
+        self.redo_entries.clear()
+
+        cost = sum(command_cost(command) for command in entry)
+        self.undo_entries.append((cost, entry))
+        self.cost += cost
+        self.evict()
+
+    def evict(self) -> None:
+        while self.cost > self.limit and len(self.undo_entries) > 1:
+            cost, _ = self.undo_entries.popleft()
+            self.cost -= cost
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        self.evict()
+
+    def undo(self) -> Optional[tuple]:
+        """Returns the entry to undo, its commands must be applied backwards in reverse order"""
+        if len(self.undo_entries) == 0:
+            return None
+        cost, entry = self.undo_entries.pop()
+        self.redo_entries.append((cost, entry))
+        return entry
+
+    def redo(self) -> Optional[tuple]:
+        """Returns the entry to redo, its commands must be applied forwards in order"""
+        if len(self.redo_entries) == 0:
+            return None
+        cost, entry = self.redo_entries.pop()
+        self.undo_entries.append((cost, entry))
+        return entry
+
+    def clear(self) -> None:
+        self.undo_entries.clear()
+        self.redo_entries.clear()
+        self.cost = 0
+
+    def __len__(self):
+        return len(self.undo_entries)
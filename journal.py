@@ -0,0 +1,229 @@
+########################################################################################################################
+# File: journal.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Append-only journal of board edits used for autosave and crash recovery. Every edit is appended to the
+#              journal of the current generation as it happens. Periodically the application takes an immutable
+#              snapshot of the board, the journal moves on to the next generation, and a worker thread writes the
+#              snapshot to disk and deletes the older generations. Recovery loads the newest complete snapshot and
+#              replays the journals written after it.
+#
+#              Each running instance journals in a session directory of its own, which it holds a lock on until it
+#              exits. A session directory nobody holds a lock on, but which still has journals, was left by a crash.
+#              A journal without a directory journals nothing and only runs saves, as when timing startup.
+#
+#              autosave/session.<n>/lock                   Locked by the instance journaling in the session
+#              autosave/session.<n>/journal.<gen>          One JSON edit per line, made after snapshot <gen> was taken
+#              autosave/session.<n>/snapshot.<gen>.cir     The board when generation <gen> started (0 is empty)
+#              autosave/session.<n>/snapshot.<gen>.uids    The uid of each gate in snapshot.<gen>.cir
+########################################################################################################################
+import json
+import os
+import platform
+import queue
+import threading
+
+from circuit_io import *
+
+if platform.system() == "Windows":
+    import msvcrt
+else:
+    import fcntl
+
+max_sessions = 64  # Instances which can journal at the same time
+
+
+def lock_file(lock: IO) -> bool:
+    """Takes an exclusive lock on an open file without waiting, returns False if another process holds it. The lock
+    is released when the file is closed, or when the process ends however it ends"""
+    try:
+        if platform.system() == "Windows":
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def has_journal(directory: str) -> bool:
+    return os.path.isdir(directory) and any(name.startswith("journal.") for name in os.listdir(directory))
+
+
+class JournalRecovery(NamedTuple):
+    """What is needed to rebuild the board after a crash"""
+    snapshot: Optional[CircuitSnapshot]  # None if the journals start from an empty board
+    uids: list[int]  # Uid of each gate in snapshot
+    entries: list[dict]  # Edits to replay, in order
+
+
+class EditJournal:
+    """Writes edits to the journal on the calling (Tk) thread and does all snapshot and save writing on a worker
+    thread, so neither blocks editing"""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = None  # Session directory this instance holds the lock of, under directory, None if disabled
+        self.lock = None
+        self.generation = 0
+        self.journal_file = None
+        self.dirty = False  # True if edits were made since the last snapshot
+        self.tasks = queue.Queue()  # Work for the writer thread, (function, args) or None to stop
+        self.failures = queue.SimpleQueue()  # (function, args, exception) of each task which failed, for the Tk thread
+        self.worker = threading.Thread(target=self.work, name="journal-writer", daemon=True)
+        self.worker.start()
+
+        if directory is not None:
+            self.claim_session(directory)
+
+    def claim_session(self, directory: str) -> None:
+        """Locks a session directory under directory, one left behind by a crash is taken first so it is recovered"""
+        sessions = [os.path.join(directory, "session.{0}".format(n)) for n in range(max_sessions)]
+        sessions.sort(key=lambda session: not has_journal(session))
+        for session in sessions:
+            os.makedirs(session, 0o744, exist_ok=True)
+            lock = open(os.path.join(session, "lock"), 'a+')
+            if lock_file(lock):
+                self.directory = session
+                self.lock = lock
+                return
+            lock.close()
+        log_msg(ERROR, "Every autosave session in {0} is in use".format(directory), RuntimeError)
+
+    def path(self, kind: str, generation: int) -> str:
+        if kind == "journal":
+            return os.path.join(self.directory, "journal.{0}".format(generation))
+        return os.path.join(self.directory, "snapshot.{0}.{1}".format(generation, kind))
+
+    def generations(self, kind: str) -> list[int]:
+        """Returns the generations which have a file of kind, oldest first"""
+        prefix = "journal." if kind == "journal" else "snapshot."
+        suffix = "" if kind == "journal" else "." + kind
+        found = []
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith(prefix) and file_name.endswith(suffix):
+                number = file_name[len(prefix):len(file_name) - len(suffix)]
+                if number.isdigit():
+                    found.append(int(number))
+        return sorted(found)
+
+    # Tk thread ########################################################################################################
+    def start(self) -> None:
+        """Starts journaling an empty board, any previous journals of the session are deleted"""
+        if self.directory is None:
+            return
+        self.remove_files()
+        self.generation = 0
+        self.journal_file = open(self.path("journal", 0), 'a', encoding="utf-8")
+        self.dirty = False
+
+    def append(self, op: str, **data) -> None:
+        """Appends one edit to the journal"""
+        if self.journal_file is None:
+            return
+        data["op"] = op
+        self.journal_file.write(json.dumps(data) + "\n")
+        self.journal_file.flush()
+        self.dirty = True
+
+    def compact(self, snapshot: CircuitSnapshot, uids: list[int]) -> None:
+        """Starts the next generation from snapshot, which must be an immutable copy of the board taken now. The
+        snapshot is written by the worker thread"""
+        if self.journal_file is None:
+            return
+        self.journal_file.close()
+        self.generation += 1
+        self.journal_file = open(self.path("journal", self.generation), 'a', encoding="utf-8")
+        self.dirty = False
+        self.submit(self.write_snapshot, self.generation, snapshot, uids)
+
+    def submit(self, func: Callable, *args) -> None:
+        """Runs func(*args) on the worker thread"""
+        self.tasks.put((func, args))
+
+    def take_failures(self) -> list[tuple[Callable, tuple, Exception]]:
+        """Returns the tasks which failed since the last call"""
+        failures = []
+        while not self.failures.empty():
+            failures.append(self.failures.get())
+        return failures
+
+    def close(self, discard: bool = True) -> None:
+        """Waits for pending writes and stops the worker. Discarding deletes the journal, as after a clean exit"""
+        self.tasks.put(None)
+        self.worker.join()
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+        if discard and self.directory is not None:
+            self.remove_files()
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+    def recover(self) -> Optional[JournalRecovery]:
+        """Returns the state left behind by a session that did not exit cleanly, or None if there is none"""
+        if self.directory is None:
+            return None
+        journals = self.generations("journal")
+        if len(journals) == 0:
+            return None
+
+        # Start from the newest generation with a complete snapshot, every journal after it must exist
+        complete = set(self.generations("uids")) & set(self.generations("cir"))
+        base = 0
+        for generation in journals:
+            if generation in complete:
+                base = generation
+        replay = [generation for generation in journals if generation >= base]
+
+        snapshot, uids = None, []
+        if base in complete:
+            snapshot = read_circuit(self.path("cir", base))
+            with open(self.path("uids", base), 'r') as uids_file:
+                uids = json.load(uids_file)
+
+        entries = []
+        for generation in replay:
+            with open(self.path("journal", generation), 'r', encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:  # The last line may be cut off by the crash
+                        break
+
+        if snapshot is None and len(entries) == 0:
+            return None
+        return JournalRecovery(snapshot, uids, entries)
+
+    # Worker thread ####################################################################################################
+    def work(self) -> None:
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            func, args = task
+            try:
+                func(*args)
+            except Exception as err:
+                log_msg(WARNING, "Background write failed: {0}: {1}".format(type(err).__name__, err))
+                self.failures.put((func, args, err))
+
+    def write_snapshot(self, generation: int, snapshot: CircuitSnapshot, uids: list[int]) -> None:
+        """Writes the snapshot starting generation and deletes every older generation"""
+        write_circuit(self.path("cir", generation) + ".tmp", snapshot)
+        os.replace(self.path("cir", generation) + ".tmp", self.path("cir", generation))
+        with open(self.path("uids", generation) + ".tmp", 'w') as uids_file:
+            json.dump(uids, uids_file)
+        os.replace(self.path("uids", generation) + ".tmp", self.path("uids", generation))
+
+        for kind in ("journal", "cir", "uids"):
+            for old in self.generations(kind):
+                if old < generation:
+                    os.remove(self.path(kind, old))
+
+    def remove_files(self) -> None:
+        for kind in ("journal", "cir", "uids"):
+            for generation in self.generations(kind):
+                os.remove(self.path(kind, generation))
@@ -0,0 +1,160 @@
+########################################################################################################################
+# File: latency.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Latency of the Tk event handlers. Callbacks bound through the monitor, and callbacks scheduled through
+#              its after, are wrapped so that each call records how long the handler ran and how long its event waited
+#              in the queue first. Samples go into fixed size ring buffers per handler, so recording never allocates
+#              and the memory used is bounded however long the application runs.
+#
+#              Tk timestamps events with the X server's clock, which can't be compared with perf_counter directly.
+#              The smallest difference seen between the two is taken as an event which waited for no time at all, and
+#              every other event's queue delay is measured from it. A callback scheduled with after waited for however
+#              long it ran after the time it was due, and a heartbeat scheduled every few milliseconds measures how
+#              long the event loop is kept busy in between.
+########################################################################################################################
+import json
+import platform
+from array import array
+
+from logic_gate import *
+
+ring_size = 1024  # Samples kept per handler
+heartbeat_interval = 100  # Milliseconds between the heartbeats of the event loop
+
+
+class RingBuffer:
+    """The last size values appended"""
+
+    def __init__(self, size: int = ring_size):
+        self.samples = array('d', bytes(8 * size))
+        self.next = 0
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.samples[self.next] = value
+        self.next = (self.next + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def values(self) -> list[float]:
+        """Values from oldest to newest"""
+        if self.count < len(self.samples):
+            return list(self.samples[:self.count])
+        return list(self.samples[self.next:]) + list(self.samples[:self.next])
+
+    def percentiles(self, fractions: Iterable[float]) -> list[float]:
+        """Nearest rank percentiles of the values, 0.0 while empty"""
+        ordered = sorted(self.samples[:self.count])
+        return [ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if len(ordered) > 0 else 0.0
+                for fraction in fractions]
+
+
+class HandlerLatency(NamedTuple):
+    name: str
+    calls: int
+    p50: float  # Milliseconds spent in the handler
+    p99: float
+    worst: float
+    delay_p50: float  # Milliseconds events waited in the queue before the handler ran
+    delay_p99: float
+
+    def summary(self) -> str:
+        return "{0}: {1} calls, p50 {2:.2f}ms, p99 {3:.2f}ms, worst {4:.2f}ms, queued p50 {5:.2f}ms, p99 {6:.2f}ms" \
+            .format(*self)
+
+
+class LatencyMonitor:
+    def __init__(self, size: int = ring_size):
+        self.enabled = True  # Wrapped callbacks are called straight through when False
+        self.size = size
+        self.durations = {}  # Handler name -> RingBuffer of milliseconds spent in the handler
+        self.delays = {}  # Handler name -> RingBuffer of milliseconds its events waited in the queue
+        self.calls = {}  # Handler name -> number of calls, including those no longer in the buffers
+        self.event_offset = None  # Smallest perf_counter - event timestamp seen, in milliseconds
+
+    def record(self, name: str, duration: float, delay: Optional[float] = None) -> None:
+        if name not in self.durations:
+            self.durations[name] = RingBuffer(self.size)
+            self.delays[name] = RingBuffer(self.size)
+            self.calls[name] = 0
+        self.durations[name].append(duration)
+        if delay is not None:
+            self.delays[name].append(delay)
+        self.calls[name] += 1
+
+    def event_delay(self, event: Any, now: float) -> Optional[float]:
+        """Milliseconds event waited in the queue, None for events without a timestamp"""
+        if not isinstance(getattr(event, "time", None), int):
+            return None
+        lag = now - event.time
+        if self.event_offset is None or lag < self.event_offset:
+            self.event_offset = lag
+        return lag - self.event_offset
+
+    def timed(self, name: str, callback: Callable) -> Callable:
+        """Wraps callback so every call is recorded under name, an event passed to it gives the queue delay"""
+
+        def timed_callback(*args):
+            if not self.enabled:
+                return callback(*args)
+            start = perf_counter() * 1000
+            result = callback(*args)
+            self.record(name, perf_counter() * 1000 - start,
+                        self.event_delay(args[0], start) if len(args) == 1 else None)
+            return result
+
+        return timed_callback
+
+    def bind(self, widget: Misc, sequence: str, callback: Callable, add: Optional[str] = None) -> str:
+        """widget.bind with the callback timed, under the name of the callback"""
+        return widget.bind(sequence, self.timed(callback.__name__, callback), add)
+
+    def after(self, widget: Misc, ms: int, callback: Callable, *args, name: Optional[str] = None) -> str:
+        """widget.after with the callback timed, how late it ran is its queue delay"""
+        name = name if name is not None else callback.__name__
+        due = perf_counter() * 1000 + ms
+
+        def timed_callback() -> None:
+            if not self.enabled:
+                callback(*args)
+                return
+            start = perf_counter() * 1000
+            callback(*args)
+            self.record(name, perf_counter() * 1000 - start, max(start - due, 0.0))
+
+        return widget.after(ms, timed_callback)
+
+    def heartbeat(self, widget: Misc, interval: int = heartbeat_interval) -> None:
+        """Keeps an empty callback scheduled every interval, its queue delay is how long the event loop was busy"""
+        self.after(widget, interval, self.heartbeat, widget, interval, name="event loop")
+
+    def latencies(self) -> list[HandlerLatency]:
+        """Latency of every handler called so far, slowest p99 first"""
+        latencies = []
+        for name, durations in self.durations.items():
+            p50, p99, worst = durations.percentiles((0.5, 0.99, 1.0))
+            delay_p50, delay_p99 = self.delays[name].percentiles((0.5, 0.99))
+            latencies.append(HandlerLatency(name, self.calls[name], p50, p99, worst, delay_p50, delay_p99))
+        return sorted(latencies, key=lambda latency: latency.p99, reverse=True)
+
+    def write_json(self, file_name: str) -> None:
+        """Writes the percentiles and the samples still in the buffers of every handler"""
+        handlers = {latency.name: dict(latency._asdict(), durations=self.durations[latency.name].values(),
+                                       delays=self.delays[latency.name].values())
+                    for latency in self.latencies()}
+        document = {"python": platform.python_version(), "platform": platform.platform(), "time": time(),
+                    "ring_size": self.size, "handlers": handlers}
+        with open(file_name, 'w', encoding="utf-8") as latency_file:
+            json.dump(document, latency_file, indent=2)
+
+    def clear(self) -> None:
+        self.durations.clear()
+        self.delays.clear()
+        self.calls.clear()
+
+
+latency_monitor = LatencyMonitor()  # Shared by every widget of the application
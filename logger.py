@@ -0,0 +1,173 @@
+########################################################################################################################
+# File: logger.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Backend of log_msg. Messages are timestamped on the calling thread and put on a queue, a writer thread
+#              formats them and writes them out, so logging from the Tk thread or a clock thread never waits on the
+#              terminal. Errors are written straight away, after everything queued before them, since they are
+#              followed by an exception or by exiting.
+#
+#              Each call site of log_msg is rate limited with a token bucket: it may log a burst of messages at once,
+#              then only a few per second, and the number of messages dropped is added to its next message. A call site
+#              which goes quiet after dropping messages has its last dropped message written, with the number dropped
+#              before it, once it has been quiet for a second or when the log is flushed, such as at exit. Messages
+#              are written as text or as one JSON object per line, and every subsystem, the module that logged the
+#              message, can have its own lowest level.
+########################################################################################################################
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from time import monotonic, time
+from typing import *
+
+INFO = 0
+WARNING = 1
+ERROR = 2
+
+level_names = ("INFO", "WARNING", "ERROR")
+rate_burst = 20  # Messages a call site may log at once before it is rate limited
+rate_per_second = 5.0  # Messages a call site may log per second after its burst
+flush_timeout = 2.0  # Seconds to wait for the writer thread to catch up
+quiet_interval = 1.0  # Seconds a call site must be quiet before the messages it dropped are reported
+
+
+class LogRecord(NamedTuple):
+    time: float
+    level: int
+    subsystem: str
+    msg: str
+    thread: str
+    suppressed: int  # Messages from the same call site dropped by the rate limit since the last one written
+
+
+class QueueLogger:
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream  # Written to sys.stdout when None, whatever it is at the time
+        self.json_output = False
+        self.default_level = INFO
+        self.levels = {}  # Subsystem -> lowest level written
+        self.buckets = {}  # Call site -> [tokens, time of the last call, messages dropped, last LogRecord dropped]
+        self.subsystems = {}  # File name -> subsystem
+        self.lock = threading.Lock()
+        self.records = queue.SimpleQueue()  # LogRecords for the writer thread, or an Event to set once written
+        self.writer = None
+
+    def enabled(self, level: int, subsystem: str) -> bool:
+        return level >= self.levels.get(subsystem, self.default_level)
+
+    def allow(self, site: Any, record: LogRecord) -> Optional[int]:
+        """Takes a token from the bucket of site, returns how many messages were dropped before record, or None if
+        record is dropped too"""
+        now = monotonic()
+        with self.lock:
+            bucket = self.buckets.get(site)
+            if bucket is None:
+                bucket = self.buckets[site] = [float(rate_burst), now, 0, None]
+            bucket[0] = min(float(rate_burst), bucket[0] + (now - bucket[1]) * rate_per_second)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                bucket[3] = record
+                return None
+            bucket[0] -= 1.0
+            suppressed, bucket[2], bucket[3] = bucket[2], 0, None
+            return suppressed
+
+    def take_dropped(self, quiet: float = 0.0) -> list[LogRecord]:
+        """Takes the last message dropped by every call site which has been quiet for at least quiet seconds, each
+        with the number of messages dropped before it"""
+        now = monotonic()
+        records = []
+        with self.lock:
+            for bucket in self.buckets.values():
+                if bucket[2] > 0 and now - bucket[1] >= quiet:
+                    records.append(bucket[3]._replace(suppressed=bucket[2] - 1))
+                    bucket[2], bucket[3] = 0, None
+        return sorted(records)
+
+    def subsystem(self, file_name: str) -> str:
+        """Subsystem of the module in file_name, its name without the extension"""
+        if file_name not in self.subsystems:
+            self.subsystems[file_name] = os.path.splitext(os.path.basename(file_name))[0]
+        return self.subsystems[file_name]
+
+    def log(self, level: int, msg: str, file_name: str, line: int) -> None:
+        """Logs msg from the call site at line of file_name"""
+        subsystem = self.subsystem(file_name)
+        if not self.enabled(level, subsystem):
+            return
+        record = LogRecord(time(), level, subsystem, msg, threading.current_thread().name, 0)
+        suppressed = self.allow((file_name, line), record) if level < ERROR else 0  # Errors are never dropped
+        if suppressed is None:
+            return
+        record = record._replace(suppressed=suppressed)
+        if level >= ERROR:
+            self.flush()
+            self.write([record])
+            return
+        self.start()
+        self.records.put(record)
+
+    def start(self) -> None:
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread(target=self.work, name="log-writer", daemon=True)
+                    self.writer.start()
+
+    def format(self, record: LogRecord) -> str:
+        if self.json_output:
+            return json.dumps(dict(record._asdict(), level=level_names[record.level]))
+        stamp = datetime.fromtimestamp(record.time).strftime("%H:%M:%S.%f")[:-3]
+        return "{0} [{1}] {2}: {3}{4}".format(stamp, level_names[record.level], record.subsystem,
+                                              record.msg.replace("\n", "\n    "),  # Indents the lines of reports
+                                              " ({0} similar messages dropped)".format(record.suppressed)
+                                              if record.suppressed > 0 else "")
+
+    def write(self, records: list[LogRecord]) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        if stream is None:  # No console, as in a windowed build
+            return
+        stream.write("".join(self.format(record) + "\n" for record in records))
+        stream.flush()
+
+    def work(self) -> None:
+        """Writes records as they are queued, everything already waiting is written at once. Messages dropped by call
+        sites which went quiet are written at least every quiet_interval"""
+        while True:
+            try:
+                batch = [self.records.get(timeout=quiet_interval)]
+            except queue.Empty:
+                batch = []
+            while not self.records.empty():
+                batch.append(self.records.get())
+            self.write([item for item in batch if isinstance(item, LogRecord)] + self.take_dropped(quiet_interval))
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def flush(self) -> None:
+        """Waits until every record queued so far, and the last message dropped by each call site, has been
+        written"""
+        if self.writer is None or threading.current_thread() is self.writer:
+            return
+        for record in self.take_dropped():
+            self.records.put(record)
+        written = threading.Event()
+        self.records.put(written)
+        written.wait(flush_timeout)
+
+    def configure(self, json_output: Optional[bool] = None, levels: Optional[dict[str, int]] = None) -> None:
+        if json_output is not None:
+            self.json_output = json_output
+        if levels is not None:
+            self.levels = dict(levels)
+
+
+message_log = QueueLogger()
+atexit.register(message_log.flush)
@@ -7,20 +7,19 @@
 #              Constructs the InputTK class which is what each gate is made of. Consists of a function which returns
 #              TRUE/FALSE/NULL, a picture
 ########################################################################################################################
+import itertools
 import sys
 import threading
 from time import *
 from tkinter import *
 from typing import *
 
+from logger import *
+
 NULL = -1  # Value which represents a gate which has not received a valid input yet
 TRUE = int(True)
 FALSE = int(False)
 
-INFO = 0
-WARNING = 1
-ERROR = 2
-
 INFO_PRINT_ON = True  # Set false to disable informational prints
 
 
@@ -35,17 +34,16 @@ def turn_info_print_on():
 
 
 def log_msg(level: int, msg: str, err_type=None) -> None:
-    global INFO, WARNING, ERROR
-    if INFO_PRINT_ON and level == INFO:
-        print("[INFO]:", msg)
-    elif level == WARNING:
-        print("[WARNING]:", msg)
-    elif level == ERROR:
-        print("[ERROR]:", msg)
+    """Queues msg for the log writer, see logger.py. The subsystem is the module of the caller"""
+    if level == INFO and not INFO_PRINT_ON:
+        return
+    caller = sys._getframe(1)
+    message_log.log(level, msg, caller.f_code.co_filename, caller.f_lineno)
+    if level == ERROR:
         if err_type is None:
             sys.exit(-1)
         else:
-            raise err_type()
+            raise err_type(msg)
 
 
 def list_contains(ls: list[Any], val: Any) -> (bool, int):
@@ -102,6 +100,11 @@ def logic_xor(input_gates: list[int]) -> int:
     return result
 
 
+def chip_pin(value: list[int]) -> int:
+    """Output pin of a custom chip, passes through the value of the chip's output it is mapped to"""
+    return value[0]
+
+
 def logic_clock(gate) -> int:
     if not gate.get_event().is_set() and not ClockTk.clocks_paused:  # Might be broke
         # call f() again in 60 seconds
@@ -219,16 +222,23 @@ class InputTk:
     line_fill_true = "green"
     line_fill_false = "red"
     line_fill_null = "black"
+    wire_router = None  # Routes lines around gates when set, otherwise lines are drawn straight
+    uid_counter = itertools.count()  # Source of the unique ids used to refer to gates in the edit journal
+    routed = True  # False for gates whose input lines are internal and drawn hidden, such as chip pins
+    profiler = None  # Times every gate evaluation and recolor when set, see profiler.py
 
     def __init__(self, func, gate_info_repo, label: str = "", canvas: Optional[Canvas] = None,
                  center: (int, int) = (NULL, NULL), ins: Optional[list] = None,
                  out: int = NULL, dims: (int, int) = (0, 0)):
         self.func = func
+        self.uid = next(InputTk.uid_counter)
         self.label = label  # Gate Name
         self.inputs = ins if ins is not None else []
         self.out = out  # Output value
         self.output_gates = []
-        self.img = PhotoImage(file=gate_info_repo[func]["image_file"])
+        # Share the gate type's decoded image rather than decoding the file again for every gate. Gate types drawn
+        # without an image, like custom chips, have none
+        self.img = gate_info_repo[func]["image"]
         self.center = center
         self.border_width = 1  # Width of border when gate is selected
         # If this is an output gate, make the border box larger to increase visibility
@@ -238,22 +248,41 @@ class InputTk:
         self.input_line_ids = []
         self.output_line_ids = []
         self.width, self.height = dims[0], dims[1]
-        if func != output:
-            self.input_id = self.canvas.create_image(self.center[0], self.center[1], image=self.img) \
-                if center != (NULL, NULL) else NULL
-        else:
-            # If this is an output gate, create a rectangle for the gate instead of using an image, allows rectangle
-            # to change color when the output value changes
-            self.input_id = self.canvas.create_rectangle(self.top_left()[0],
-                                                         self.top_left()[1],
-                                                         self.bottom_right()[0],
-                                                         self.bottom_right()[1],
-                                                         width=2, outline='black')
+        self.input_id = self.draw()
 
         bbox = self.canvas.bbox(self.input_id)
         if bbox is not None:  # Bbox is not None when the gate is placed on the canvas
             self.width, self.height = bbox[2] - bbox[0], bbox[3] - bbox[1]
 
+        if InputTk.wire_router is not None and center != (NULL, NULL):
+            InputTk.wire_router.update_gate(self)
+
+    def draw(self) -> int:
+        """Creates the gate's canvas item and returns its id"""
+        if self.func != output:
+            return self.canvas.create_image(self.center[0], self.center[1], image=self.img) \
+                if self.center != (NULL, NULL) else NULL
+
+        # If this is an output gate, create a rectangle for the gate instead of using an image, allows rectangle
+        # to change color when the output value changes. Gates which aren't placed, like the one picked to be placed
+        # next, aren't drawn at all
+        if self.center == (NULL, NULL):
+            return NULL
+        return self.canvas.create_rectangle(self.top_left()[0], self.top_left()[1], self.bottom_right()[0],
+                                            self.bottom_right()[1], width=2, outline='black')
+
+    def canvas_items(self) -> list[int]:
+        """Returns the ids of every canvas item drawn for this gate, not including its lines"""
+        return [item for item in (self.input_id, self.rect_id) if item >= 0]
+
+    def can_drive(self, dest_gate) -> bool:
+        """Returns False if this gate's output may not be connected to dest_gate"""
+        return True
+
+    def accepts_input(self, src_gate) -> bool:
+        """Returns False if src_gate may not be connected to an input of this gate"""
+        return True
+
     def output(self) -> int:
         if len(self.inputs) == 0:
             return self.out
@@ -265,8 +294,15 @@ class InputTk:
 
         return self.out
 
-    def add_input(self, inp) -> None:
-        self.inputs.append(inp)
+    def evaluate(self) -> int:
+        """Recomputes the output from the current outputs of the input gates without re-evaluating them"""
+        if len(self.inputs) > 0 and self.func != logic_clock:
+            self.out = self.func([inp.out for inp in self.inputs])
+        return self.out
+
+    def add_input(self, inp, index: Optional[int] = None) -> None:
+        """Adds inp after the last input, or before input index"""
+        self.inputs.insert(len(self.inputs) if index is None else index, inp)
 
     def add_output(self, inp) -> None:
         self.output_gates.append(inp)
@@ -298,7 +334,15 @@ class InputTk:
         return self.output_gates
 
     def update_line_colors(self) -> None:
-        output_val = self.output()
+        if InputTk.profiler is None:
+            self.color_lines(self.output())
+        else:
+            InputTk.profiler.color_lines(self, InputTk.profiler.evaluate(self, self.output))
+        for output_gate in self.output_gates:
+            output_gate.update_line_colors()
+
+    def color_lines(self, output_val: int) -> None:
+        """Colors this gate's outgoing lines, and its border if it is an output gate, without touching other gates"""
         fill = get_line_fill(output_val)
         if is_output_gate(self):
             # If line colors are off, still color output gate
@@ -308,9 +352,8 @@ class InputTk:
 
             self.canvas.itemconfig(self.input_id, outline=fill)
 
-        for i in range(len(self.output_line_ids)):
-            self.canvas.itemconfig(self.output_line_ids[i], fill=fill)
-            self.output_gates[i].update_line_colors()
+        for line_id in self.output_line_ids:
+            self.canvas.itemconfig(line_id, fill=fill)
 
     def add_rect(self) -> int:
         if self.rect_id < 0:
@@ -321,29 +364,33 @@ class InputTk:
                                                         width=self.border_width, outline='black')
         return self.rect_id
 
-    def add_line(self, src_gate) -> int:
+    def add_line(self, src_gate, index: Optional[int] = None) -> int:
+        """Connects src_gate to this gate's input index, or after the last input"""
         if self.func == power:
             return -1
 
         src_pos, dest_pos = (src_gate.bottom_right()[0], src_gate.get_center()[1]), \
             (self.top_left()[0], self.get_center()[1])
 
-        self.add_input(src_gate)
+        self.add_input(src_gate, index)
         src_gate.add_output(self)
         src_out = src_gate.output()
 
         line_color = get_line_fill(src_out)
 
-        line_id = self.canvas.create_line(src_pos[0], src_pos[1], dest_pos[0], dest_pos[1], width=4, fill=line_color)
-        self.add_input_line(line_id)
+        line_id = self.canvas.create_line(src_pos[0], src_pos[1], dest_pos[0], dest_pos[1], width=4, fill=line_color,
+                                          state=NORMAL if self.routed else HIDDEN)
+        self.add_input_line(line_id, index)
         src_gate.add_output_line(line_id)
+        if InputTk.wire_router is not None and self.routed:
+            InputTk.wire_router.add_line(line_id, src_gate, self)
 
         self.update_line_colors()
 
         return line_id
 
-    def add_input_line(self, line_id: int) -> None:
-        self.input_line_ids.append(line_id)
+    def add_input_line(self, line_id: int, index: Optional[int] = None) -> None:
+        self.input_line_ids.insert(len(self.input_line_ids) if index is None else index, line_id)
 
     def add_output_line(self, line_id: int) -> None:
         self.output_line_ids.append(line_id)
@@ -383,6 +430,8 @@ class InputTk:
 
     def remove_line(self, line_id: int) -> None:
         self.canvas.delete(line_id)
+        if InputTk.wire_router is not None:
+            InputTk.wire_router.remove_line(line_id)
 
         if list_contains(self.input_line_ids, line_id)[0]:
             self.input_line_ids.remove(line_id)
@@ -397,19 +446,7 @@ class InputTk:
             self.remove_line(line_id)
 
     def delete(self) -> None:
-        self.canvas.delete(self.input_id)
-        self.canvas.delete(self.rect_id)
-
-        for input_gate in self.inputs:
-            input_gate.remove_output(self)
-
-        for output_gate in self.output_gates:
-            output_gate.remove_input(self)
-            output_gate.set_output(NULL)
-
-        self.remove_all_lines()
-
-        self.input_id = self.rect_id = -1
+        delete_gates([self])
 
     def set_id(self, new_id: int) -> None:
         self.input_id = new_id
@@ -433,11 +470,10 @@ class InputTk:
                            self.top_left()[1] - self.border_offset,
                            self.bottom_right()[0] + self.border_offset, self.bottom_right()[1] + self.border_offset)
 
-        if not is_output_gate(self):
-            self.canvas.coords(self.input_id, x, y)
-        else:
-            self.canvas.coords(self.input_id, self.top_left()[0], self.top_left()[1],
-                               self.bottom_right()[0], self.bottom_right()[1])
+        self.move_items(x, y)
+        if InputTk.wire_router is not None:  # Only re-route the lines affected by this move
+            InputTk.wire_router.update_gate(self)
+            return
         # Update all incoming lines to new position
         left_center_pos = (self.top_left()[0], self.get_center()[1])  # Left-Center Point to connect src gates
         for i in range(len(self.inputs)):
@@ -450,6 +486,14 @@ class InputTk:
             self.canvas.coords(self.output_line_ids[i], dest_pos[0], dest_pos[1],
                                right_center_pos[0], right_center_pos[1])
 
+    def move_items(self, x: int, y: int) -> None:
+        """Moves the gate's canvas item to its new center"""
+        if not is_output_gate(self):
+            self.canvas.coords(self.input_id, x, y)
+        else:
+            self.canvas.coords(self.input_id, self.top_left()[0], self.top_left()[1],
+                               self.bottom_right()[0], self.bottom_right()[1])
+
     def get_center(self) -> (int, int):
         return self.center
 
@@ -590,6 +634,10 @@ def is_not_gate(gate: InputTk) -> bool:
     return gate.get_func() == logic_not
 
 
+def is_chip_pin(gate: InputTk) -> bool:
+    return gate.get_func() == chip_pin
+
+
 def is_clock(gate: InputTk) -> bool:
     # return gate.get_func() == logic_clock
     return isinstance(gate, ClockTk)
@@ -599,16 +647,122 @@ def gate_id(gate: InputTk) -> int:
     return gate.get_id()
 
 
-def connect_gates(src_gate: InputTk, dest_gate: InputTk) -> None:
+def connect_gates(src_gate: InputTk, dest_gate: InputTk, index: Optional[int] = None) -> bool:
+    """Connects src_gate to input index of dest_gate, or after its last input, returns True if the connection was
+    made"""
     # Only allow one input to a not gate
     # Clocks/Power sources can only be outputs, so return if one is set as a destination gate
     if (is_not_gate(dest_gate) and len(dest_gate.get_input_gates()) == 1) or \
             (is_output_gate(dest_gate) and len(dest_gate.get_input_gates()) == 1) or is_output_gate(src_gate) \
-            or is_clock(dest_gate):
-        return
+            or is_clock(dest_gate) or not src_gate.can_drive(dest_gate) or not dest_gate.accepts_input(src_gate):
+        return False
 
     if not is_parent(dest_gate, src_gate) and dest_gate not in src_gate.get_output_gates():
-        dest_gate.add_line(src_gate)
+        dest_gate.add_line(src_gate, index)
+        return True
+    return False
+
+
+def propagate(gates: Iterable[InputTk]) -> None:
+    """Re-evaluates gates and everything downstream of them, each exactly once and in topological order, then recolors
+    their lines"""
+    cone = set()  # Every gate reachable from gates
+    stack = list(gates)
+    while stack:
+        gate = stack.pop()
+        if gate not in cone:
+            cone.add(gate)
+            stack.extend(gate.get_output_gates())
+
+    in_degree = dict.fromkeys(cone, 0)
+    for gate in cone:
+        for output_gate in gate.get_output_gates():
+            in_degree[output_gate] += 1
+
+    profiler = InputTk.profiler
+    ready = [gate for gate in cone if in_degree[gate] == 0]
+    while ready:
+        gate = ready.pop()
+        if profiler is None:
+            gate.color_lines(gate.evaluate())
+        else:
+            profiler.propagate_gate(gate)
+        for output_gate in gate.get_output_gates():
+            in_degree[output_gate] -= 1
+            if in_degree[output_gate] == 0:
+                ready.append(output_gate)
+
+
+def delete_gates(gates: Iterable[InputTk]) -> None:
+    """Deletes many gates at once. The connection lists of each surviving neighbour are filtered once, every canvas
+    item is deleted in a single call and the surviving gates are re-evaluated with a single propagation"""
+    doomed = set(gates)
+    if len(doomed) == 0:
+        return
+
+    canvas = next(iter(doomed)).canvas
+    items = []  # Canvas items to delete
+    neighbours = set()  # Surviving gates connected to a deleted gate
+    for gate in doomed:
+        if is_clock(gate):
+            gate.timer.cancel()
+        items.extend(gate.canvas_items())
+        items.extend(gate.input_line_ids)
+        items.extend(gate.output_line_ids)
+        neighbours.update(other for other in gate.get_input_gates() if other not in doomed)
+        neighbours.update(other for other in gate.get_output_gates() if other not in doomed)
+
+    lost_input = []  # Neighbours which had an input deleted, their output must be recomputed
+    for gate in neighbours:
+        if any(other in doomed for other in gate.inputs):
+            kept = [(other, line_id) for other, line_id in zip(gate.inputs, gate.input_line_ids) if other not in doomed]
+            gate.inputs = [other for other, _ in kept]
+            gate.input_line_ids = [line_id for _, line_id in kept]
+            gate.out = NULL
+            lost_input.append(gate)
+        if any(other in doomed for other in gate.output_gates):
+            kept = [(other, line_id) for other, line_id in zip(gate.output_gates, gate.output_line_ids)
+                    if other not in doomed]
+            gate.output_gates = [other for other, _ in kept]
+            gate.output_line_ids = [line_id for _, line_id in kept]
+
+    if len(items) > 0:
+        canvas.delete(*items)
+
+    router = InputTk.wire_router
+    for gate in doomed:
+        if router is not None:
+            for line_id in gate.input_line_ids + gate.output_line_ids:
+                router.remove_line(line_id)
+            router.remove_gate(gate)
+        gate.input_id = gate.rect_id = -1
+
+    propagate(lost_input)
+
+
+def connect_gates_bulk(edges: list[(InputTk, InputTk)]) -> None:
+    """Connects many (source, destination) pairs at once. The gates must already hold their final outputs, so every
+    line is created with its final color and nothing is re-evaluated. The connections aren't checked like those of
+    connect_gates, circuits read from files are checked by Netlist.from_snapshot"""
+    router = InputTk.wire_router
+    output_gates = set()
+    for src_gate, dest_gate in edges:
+        src_pos, dest_pos = (src_gate.bottom_right()[0], src_gate.get_center()[1]), \
+            (dest_gate.top_left()[0], dest_gate.get_center()[1])
+        line_id = dest_gate.canvas.create_line(src_pos[0], src_pos[1], dest_pos[0], dest_pos[1], width=4,
+                                               fill=get_line_fill(src_gate.out),
+                                               state=NORMAL if dest_gate.routed else HIDDEN)
+        dest_gate.add_input(src_gate)
+        src_gate.add_output(dest_gate)
+        dest_gate.add_input_line(line_id)
+        src_gate.add_output_line(line_id)
+        if router is not None and dest_gate.routed:
+            router.add_line(line_id, src_gate, dest_gate)
+        if is_output_gate(dest_gate):
+            output_gates.add(dest_gate)
+
+    for gate in output_gates:
+        gate.color_lines(gate.out)
 
 
 def connection_exists(gate1: InputTk, gate2: InputTk) -> bool:
@@ -621,14 +775,15 @@ def is_parent(parent: InputTk, child: InputTk) -> bool:
 
 class GateInfo:
     def __init__(self, func: Callable, name: Optional[str] = None, desc: str = "", image_file: Optional[str] = None,
-                 callback: Optional[Callable] = None):
+                 callback: Optional[Callable] = None, delay: int = 0):
         self.info = {
             "func": func,
             "name": name if name is not None else func.__name__,
             "desc": desc if desc is not None else "",
             "callback": callback,
             "image_file": image_file if image_file is not None else "",
-            "image": PhotoImage(file=image_file) if image_file is not None else None
+            "image": None,  # Decoded from image_file when it is first used
+            "delay": delay  # Propagation delay in time steps, used by the timing simulation
         }
         self.active_gates = []
 
@@ -642,10 +797,16 @@ class GateInfo:
         if gate in self.active_gates:
             self.active_gates.remove(gate)
 
+    def remove_gates(self, gates: set[InputTk]) -> None:
+        """Removes every gate in gates with a single pass over the active gates"""
+        self.active_gates = [gate for gate in self.active_gates if gate not in gates]
+
     def keys(self):
         return self.info.keys()
 
     def __getitem__(self, item: str) -> Union[str | Callable | PhotoImage]:
+        if item == "image" and self.info["image"] is None and self.info["image_file"] != "":
+            self.info["image"] = PhotoImage(file=self.info["image_file"])
         return self.info[item]
 
     def __setitem__(self, key: str, value: Union[str | Callable | PhotoImage]) -> None:
@@ -668,6 +829,19 @@ class GatesInfoRepo:
             self.register_gate(gate.get_func(), name=None, desc=None, callback=None)
             self.gate_infos[gate.get_func()].add_active_gate(gate)
 
+    def remove_gates(self, gates: Iterable[InputTk]) -> None:
+        """Removes many gates from the repo, each gate type's list is only filtered once"""
+        gates = set(gates)
+        for func in {gate.get_func() for gate in gates}:
+            if func in self.gate_infos.keys():
+                self.gate_infos[func].remove_gates(gates)
+
+    def get_delay(self, func: Callable) -> int:
+        """Propagation delay of a gate type, unregistered types have none"""
+        if func in self.gate_infos.keys():
+            return self.gate_infos[func]["delay"]
+        return 0
+
     def get_gates(self, func: Callable) -> Optional[list[InputTk]]:
         if func in self.gate_infos.keys():
             return self.gate_infos[func].get_active_gates()
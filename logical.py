@@ -6,18 +6,42 @@
 # Description:
 ########################################################################################################################
 # TODO:
-#   - Scrolling/Resizing for canvas
 #   - Zoom In/Out
 #   - Proper resizing of side pane on font changes
-#   - Method of creating custom circuits to be place and used as other gates
 ########################################################################################################################
+import itertools
+import multiprocessing
 import os
 import platform
+import shutil
+from time import perf_counter
 from tkinter import filedialog as fd
+from tkinter import messagebox
+from tkinter import simpledialog
+from tkinter import ttk
+from types import SimpleNamespace
 
 import tomlkit
 
+from activity import *
+from bdd import *
+from chip import *
+from circuit_io import *
+from codegen import *
+from faults import *
+from hdl_io import *
+from history import *
+from journal import *
+from latency import *
+from memory import *
+from netlist import *
+from optimize import *
+from profiler import *
+from sat import *
+from sweep import *
+from timing import *
 from tk_widgets import *
+from wire_router import *
 
 
 def capitalize(string: str) -> str:
@@ -71,8 +95,15 @@ class Application(Tk):
     img_width = 75
     img_height = 50
     max_selectable_gates = 100
+    exhaustive_fault_inputs = 12  # Circuits with at most this many inputs are fault simulated with every vector
+    random_fault_vectors = 4096
+    max_sweep_inputs = 30  # Circuits with more inputs are too slow to sweep
+    sweep_poll_interval = 100  # Milliseconds between checks whether a background sweep has finished
+    activity_vectors = 1000000  # Random vectors driven through the circuit to measure switching activity
     border_width = 3  # Width of border separating canvas from the right pane
     input_selection_screen_width = 250  # Width of the right pane
+    board_width = 4000  # Width of the scrollable area gates can be placed on
+    board_height = 3000  # Height of the scrollable area gates can be placed on
     # Fonts #####################
     font_family = "Helvetica"
     font_size = 12
@@ -95,6 +126,8 @@ class Application(Tk):
                 height = int(sys.argv[i + 1])
                 if height < 600:
                     log_msg(ERROR, sys.argv[i + 1] + ": height must be an integer >", ValueError)
+        # Phase name -> seconds since launch, with -startup-time the application exits once its first frame is drawn
+        self.startup_times = {} if "-startup-time" in sys.argv else None
 
         self.width = width
         self.height = height
@@ -104,6 +137,7 @@ class Application(Tk):
         self.icon = PhotoImage(file=join_folder_file(IMG_FOLDER, "icon.png"))
 
         self.title("Logical")
+        self.protocol("WM_DELETE_WINDOW", self.exit_app)  # Closing the window finishes pending saves like exiting
         self.geometry(str(self.width) + "x" + str(self.height))
         self.resizable(False, False)
         self.config(background=self.background_color.get())
@@ -124,7 +158,7 @@ class Application(Tk):
 
         self.active_input = None  # The input object to be placed when the user clicks the mouse
         self.active_input_pi = None  # Photoimage for active gate
-        self.active_input_img_index = 0  # Canvas image index of active gate
+        self.active_input_img_index = 0  # Canvas image index of active gate, previewed under the mouse
         # Fonts #####################
         self.active_font = font.Font(family=Application.font_family, size=Application.font_size, weight=font.NORMAL,
                                      slant=font.ROMAN)
@@ -137,6 +171,18 @@ class Application(Tk):
         self.icb_is_gate_active = False  # If True, shows input gate as cursor is dragged around
         self.icb_selected_gates = []  # Holds references to all currently selected gates when performing operations
         self.icb_click_drag_gate = None  # The gate currently being moved by the mouse
+        self.icb_drag_start = None  # Center of the dragged gate before it was moved, journaled on release
+        self.icb_highlighted_lines = []  # Lines of the critical path, widened until the next deselection
+        self.icb_heat_gates = []  # Gates whose lines show their switching activity until the next deselection
+        self.stimulus_bias = {}  # Uid of a power gate -> probability it is TRUE under random stimulus
+        self.profile = None  # GateProfiler of the last profiling run
+        self.profile_window = None  # Table of the last profiling run
+        self.performance_window = None  # Live table of the event handler latencies
+        self.performance_table = None
+        self.performance_refresh = 500  # Milliseconds between updates of the performance window
+        self.performance_job = None  # Pending after id of the next update of the performance window
+        self.leak_check_gates = 10000  # Gates placed and deleted by each run of the leak check
+        self.icb_minimap = None  # Overview of the whole board, used to navigate
         #############################
         # Prompt Widgets ############
         self.screen_exit_prompt = None  # Toplevel popup window for prompt
@@ -160,11 +206,32 @@ class Application(Tk):
         #############################
         # Saving/Loading Vars #######
         self.filename = ""
-        self.file_separator = "<--CONNECTIONS-->"
         self.file_type = ".cir"
+        self.file_types = [("Circuit Diagram", "*" + self.file_type),
+                           ("Binary Circuit Diagram", "*" + BINARY_FILE_TYPE)]
+        self.netlist_file_types = [("BLIF Netlist", "*" + BLIF_FILE_TYPE), ("Verilog Netlist", "*" + VERILOG_FILE_TYPE)]
         self.open_filename = ""
         self.preference_path = ""
         self.save_path = ""
+        self.chip_path = ""  # Circuits in this directory are registered as custom chips on startup
+        #############################
+        # Autosave Vars #############
+        self.journal = None  # Journal of every edit, used to autosave and recover after a crash
+        self.autosave_interval = 30000  # Milliseconds between autosave snapshots
+        self.write_check_interval = 250  # Milliseconds between checks for saves which failed in the background
+        self.replaying = False  # True while edits from the journal are being replayed, so they aren't journaled again
+        #############################
+        # Undo Vars #################
+        self.undo_limit = 100000  # Rough bound on the size of the undo history, see history.command_cost
+        self.history = EditHistory(self.undo_limit)
+        self.undoing = False  # True while an undo or redo is applied, so it isn't recorded as a new edit
+        self.gates_by_uid = {}  # Every gate on the board by uid, the undo history refers to gates by uid
+        #############################
+        # Compiled Evaluation Vars ##
+        self.compile_delay = 500  # Milliseconds without structural edits before the board is compiled
+        self.sweep_thread = None  # Thread running an exhaustive sweep, None when no sweep is running
+        self.compile_job = None
+        self.compiled_board = None  # (gates, netlist, compiled function) while the board is unchanged since compiling
         #############################
         # Preference Vars ###########
         self.preference_toplevel = None
@@ -176,14 +243,15 @@ class Application(Tk):
         self.line_colors_checkbox = None
         self.font_family_listbox = None
         self.font_size_listbox = None
-        self.font_families = [*set(list(font.families()))]
-        self.font_families.sort()
+        self.font_families = None  # Listed when the preference prompt first opens, listing them is slow
         #############################
         # Help Vars ###########
         self.help_window = None
         #############################
 
         self.init_file_paths()
+        self.load_chips()
+        self.startup_phase("application created")
 
     def build_gate_repo(self):
         """Compiles repository for gates, the active ones, their names, and descriptions.  When adding new functions,
@@ -194,26 +262,26 @@ class Application(Tk):
                                  image_file=join_folder_file(IMG_FOLDER, "power.png"))
         self.gates.register_gate(logic_not, name=None,
                                  desc="The NOT gate inverts what it receives as input. It requires one input.",
-                                 callback=self.set_active_fn_not,
+                                 callback=self.set_active_fn_not, delay=1,
                                  image_file=join_folder_file(IMG_FOLDER, "not.png"))
         self.gates.register_gate(logic_and, name=None,
                                  desc="The AND gate outputs power only if all of its inputs are powered as well. "
                                       "It requires at least two inputs.",
-                                 callback=self.set_active_fn_and,
+                                 callback=self.set_active_fn_and, delay=2,
                                  image_file=join_folder_file(IMG_FOLDER, "and.png"))
         self.gates.register_gate(logic_nand, name=None,
                                  desc="The NAND gate outputs power if not every input is powered. "
                                       "It requires at least two inputs.",
-                                 callback=self.set_active_fn_nand,
+                                 callback=self.set_active_fn_nand, delay=1,
                                  image_file=join_folder_file(IMG_FOLDER, "nand.png"))
         self.gates.register_gate(logic_or, name=None,
                                  desc="The OR gate outputs power if at least one input is powered. "
-                                      "It requires at least two inputs.", callback=self.set_active_fn_or,
+                                      "It requires at least two inputs.", callback=self.set_active_fn_or, delay=2,
                                  image_file=join_folder_file(IMG_FOLDER, "or.png"))
         self.gates.register_gate(logic_xor, name=None,
                                  desc="The XOR gate outputs power if at least one, but not all, inputs are powered. "
                                       "It requires at least two inputs",
-                                 callback=self.set_active_fn_xor,
+                                 callback=self.set_active_fn_xor, delay=3,
                                  image_file=join_folder_file(IMG_FOLDER, "xor.png"))
         self.gates.register_gate(output, name=None, desc="The output gate has the same output as its input. "
                                                          "This gate requires one input and has no outputs.",
@@ -222,8 +290,61 @@ class Application(Tk):
         self.gates.register_gate(logic_clock, name=None, desc="This clock turns on/off at a constant rate. "
                                                               "It has no inputs.", callback=self.set_active_fn_clock,
                                  image_file=join_folder_file(IMG_FOLDER, "clock.png"))
+        # Placed along with a custom chip, so it has no button
+        self.gates.register_gate(chip_pin, name=None, desc="Output pin of a custom chip.")
+
+    def load_chips(self) -> None:
+        """Registers every circuit in the chip directory as a custom chip. A chip built from other chips can only be
+        compiled once they are registered, so the chips which fail are retried until a pass loads none of them"""
+        pending = [os.path.join(self.chip_path, file_name) for file_name in sorted(os.listdir(self.chip_path))
+                   if file_name.endswith(self.file_type)]
+        while len(pending) > 0:
+            failed = [file_name for file_name in pending if self.add_chip(file_name, warn=False) is None]
+            if len(failed) == len(pending):
+                break
+            pending = failed
+        for file_name in pending:  # Warns why each of them can't be loaded
+            self.add_chip(file_name)
+
+    def add_chip(self, file_name: str, warn: bool = True) -> Optional[ChipDefinition]:
+        """Registers a custom chip, returns None if the file could not be compiled"""
+        try:
+            definition = register_chip(self.gates, file_name)
+        except (ValueError, KeyError, IndexError, OSError) as err:
+            if warn:
+                log_msg(WARNING, "Could not load chip " + file_name + ": " + repr(err))
+            return None
+        self.gates[definition]["callback"] = lambda: self.set_active_fn_chip(definition)
+        log_msg(INFO, "Loaded chip: " + definition.__name__)
+        return definition
+
+    def import_chip(self) -> None:
+        """Copies a circuit into the chip directory and adds a button for it"""
+        file_name = fd.askopenfilename(initialdir=self.save_path, filetypes=self.file_types[:1])
+        if file_name == "":
+            return
+        chip_file = os.path.join(self.chip_path, os.path.basename(file_name))
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        if name in self.gates.funcs_dispatch:
+            log_msg(WARNING, "A gate named " + name + " is already registered")
+            return
+        copied = os.path.abspath(file_name) != os.path.abspath(chip_file)
+        if copied:
+            if os.path.exists(chip_file):  # Never overwrite a chip, even one which failed to load
+                log_msg(WARNING, os.path.basename(chip_file) + " is already in the chip directory")
+                return
+            try:
+                shutil.copyfile(file_name, chip_file)
+            except OSError as err:
+                log_msg(WARNING, "Could not copy " + file_name + " into the chip directory: " + repr(err))
+                return
+        definition = self.add_chip(chip_file)
+        if definition is not None:
+            self.gui_add_gate_button(definition, len(self.is_buttons))
+        elif copied:
+            os.remove(chip_file)  # Don't leave a chip which can't be compiled to fail on every launch
 
-    def update_font(self, family: str, size: int) -> None:
+    def set_fonts(self, family: str, size: int) -> None:
         self.font_family = family
         self.font_size = size
         self.active_font = font.Font(family=self.font_family, size=self.font_size, weight=font.NORMAL,
@@ -231,6 +352,8 @@ class Application(Tk):
         self.font_top = font.Font(family=self.font_family, size=self.font_size - 1, weight=font.NORMAL,
                                   slant=font.ROMAN)
 
+    def update_font(self, family: str, size: int) -> None:
+        self.set_fonts(family, size)
         self.gui_build_top_menu()
         self.is_edit_table.set_font(self.active_font)
         self.is_edit_table.set_focus_widget(self.screen_icb)
@@ -248,6 +371,7 @@ class Application(Tk):
         else:  # If on Mac or some other OS, then just write settings to directory in user home
             self.preference_path = os.path.join(self.user_home_dir, "logical")
             self.save_path = os.path.join(self.preference_path, "circuits")
+        self.chip_path = os.path.join(self.preference_path, "chips")
 
         log_msg(INFO, "Preference Path: " + self.preference_path)
         log_msg(INFO, "Circuit Save Path: " + self.save_path)
@@ -259,9 +383,15 @@ class Application(Tk):
         if not os.path.exists(self.save_path):
             os.mkdir(self.save_path, 0o744)
             os.chmod(self.save_path, 0o744)
+        if not os.path.exists(self.chip_path):
+            os.mkdir(self.chip_path, 0o744)
+            os.chmod(self.chip_path, 0o744)
         os.umask(old_mask)
 
         self.preference_file_name = os.path.join(self.preference_path, self.preference_file_name)
+        # Timing startup leaves the autosave of the user's last session alone, for it to be recovered next time
+        autosave_path = os.path.join(self.preference_path, "autosave") if self.startup_times is None else None
+        self.journal = EditJournal(autosave_path)
 
     def reset_gui(self) -> None:
         """Resets the gui on a significant change, such as a font change"""
@@ -299,16 +429,33 @@ class Application(Tk):
 
         return intersects, intersected_gates
 
+    def to_board_coords(self, event: Event) -> Event:
+        """Converts the window coordinates of a canvas event to coordinates on the scrolled board"""
+        event.x, event.y = int(self.screen_icb.canvasx(event.x)), int(self.screen_icb.canvasy(event.y))
+        return event
+
+    def on_board(self, event: Event) -> bool:
+        """Returns True if the (board) coordinates of event are within the board"""
+        return 0 <= event.x <= self.board_width and 0 <= event.y <= self.board_height
+
     def deselect_active_gates(self) -> None:
         """Removes border around gates and clear selected gates"""
         for gate in self.icb_selected_gates:
             gate.remove_rect()
         self.icb_selected_gates.clear()
         self.icb_click_drag_gate = None
+        self.icb_drag_start = None
+        for line_id in self.icb_highlighted_lines:
+            self.screen_icb.itemconfig(line_id, width=4)
+        self.icb_highlighted_lines.clear()
+        for gate in self.icb_heat_gates:
+            gate.color_lines(gate.out)
+        self.icb_heat_gates.clear()
 
     def left_click_cb(self, event: Event) -> None:
         """If user selected a gate button, place the gate on the canvas, otherwise (de)select the gate"""
-        if 0 <= event.x <= self.width and 0 <= event.y <= self.height:
+        self.to_board_coords(event)
+        if self.on_board(event):
             if self.icb_is_gate_active:  # If user pressed a gate button...
                 self.place_gate(event)
             else:
@@ -323,8 +470,12 @@ class Application(Tk):
         if self.icb_is_gate_active or len(self.icb_selected_gates) != 1:  # If user selected a gate button, then leave
             return
 
+        self.to_board_coords(event)
         if self.icb_click_drag_gate is not None:  # if a gate is currently being drug around, keep using it
+            InputTk.wire_router.begin_drag()  # Wires are routed once the gate is dropped
             self.icb_click_drag_gate.move(event.x, event.y)
+            for gate in chip_parts([self.icb_click_drag_gate]):
+                self.icb_minimap.move_gate(gate)
             return
 
         intersects, gates = self.intersects_input_gate(event)
@@ -335,13 +486,30 @@ class Application(Tk):
         self.deselect_active_gates()
         if point_in_rect(event.x, event.y, first_gate.top_left(), first_gate.bottom_right()):
             self.icb_click_drag_gate = first_gate
+            self.icb_drag_start = first_gate.get_center()
             self.icb_click_drag_gate.add_rect()
             self.icb_selected_gates.append(first_gate)
+            InputTk.wire_router.begin_drag()
             self.icb_click_drag_gate.move(event.x, event.y)
+            for gate in chip_parts([self.icb_click_drag_gate]):
+                self.icb_minimap.move_gate(gate)
+
+    def release_cb(self, event: Event) -> None:
+        """Routes the wires of a dragged gate and journals the move once it is dropped, rather than every step of the
+        drag"""
+        InputTk.wire_router.end_drag()
+        gate = self.icb_click_drag_gate
+        if gate is None or self.icb_drag_start is None:
+            return
+        if gate.get_center() != self.icb_drag_start:
+            self.record_edit("move", uid=gate.uid, x=gate.get_center()[0], y=gate.get_center()[1])
+            self.record_history(("move", gate.uid, self.icb_drag_start, gate.get_center()))
+        self.icb_drag_start = gate.get_center()
 
     def right_click_cb(self, event: Event) -> None:
         """Clears a gate button press if present.  If not, select two gates and connect them"""
-        if 0 <= event.x <= self.width and 0 <= event.y <= self.height:
+        self.to_board_coords(event)
+        if self.on_board(event):
             if self.icb_is_gate_active:  # Right-clicking clears the gate that a user selects with a button
                 self.set_active_fn_none()
                 self.deselect_active_gates()
@@ -358,7 +526,10 @@ class Application(Tk):
                 self.icb_selected_gates.append(first_gate)
             elif len(self.icb_selected_gates) == 1 and self.icb_selected_gates[0] != first_gate:
                 # Gate is already selected and the second gate is different from the first
-                connect_gates(self.icb_selected_gates[0], first_gate)
+                if connect_gates(self.icb_selected_gates[0], first_gate):
+                    index = first_gate.num_inputs() - 1
+                    self.record_edit("connect", src=self.icb_selected_gates[0].uid, dest=first_gate.uid, index=index)
+                    self.record_history(("connect", self.icb_selected_gates[0].uid, first_gate.uid, index))
                 self.deselect_active_gates()
             elif len(self.icb_selected_gates) == 1 and self.icb_selected_gates[0] == first_gate:
                 # Gate is already selected and the second gate is the same as the first
@@ -374,6 +545,7 @@ class Application(Tk):
         if self.icb_is_gate_active:
             return
 
+        self.to_board_coords(event)
         intersects, gates = self.intersects_input_gate(event)
 
         if not intersects:
@@ -390,23 +562,40 @@ class Application(Tk):
 
     def motion_cb(self, event: Event) -> None:
         """Move the image of the selected gate with the mouse"""
-        if self.icb_is_gate_active and 0 <= event.x <= self.width and 0 <= event.y <= self.height:
-            curr_func = self.active_input.get_func()
-            self.active_input_pi = PhotoImage(file=self.gates[curr_func]["image_file"])
-            self.active_input_img_index = self.screen_icb.create_image(event.x, event.y, image=self.active_input_pi)
+        self.to_board_coords(event)
+        if self.icb_is_gate_active and self.on_board(event):
+            image = self.gates[self.active_input.get_func()]["image"]
+            if image is None:  # Custom chips have no image to preview
+                return
+            # One preview item is moved around, it is only replaced when another gate type is selected
+            if self.active_input_pi is image:
+                self.screen_icb.coords(self.active_input_img_index, event.x, event.y)
+            else:
+                self.screen_icb.delete(self.active_input_img_index)
+                self.active_input_pi = image
+                self.active_input_img_index = self.screen_icb.create_image(event.x, event.y, image=image)
             self.active_input.set_id(self.active_input_img_index)
 
     def delete_cb(self, event: Event) -> None:
         """Delete all selected gates from the canvas"""
-        for i in range(len(self.icb_selected_gates)):
-            gate = self.icb_selected_gates[i]
-            self.gates[gate.get_func()].remove(gate)
-            if is_power_gate(gate):  # Remove entries from the power table
-                self.is_edit_table.del_gate_entry(gate)
-            gate.delete()
+        selected = self.icb_selected_gates
+        if len(selected) > 0:
+            self.record_edit("delete", uids=[gate.uid for gate in selected])
+            self.record_history(("delete", *capture_gates(chip_parts(selected))))
+        self.remove_gates(selected)
 
         self.deselect_active_gates()
 
+    def remove_gates(self, gates: list[InputTk]) -> None:
+        """Deletes gates from the board, the gate repository, the power table and the minimap"""
+        gates = chip_parts(gates)
+        for gate in gates:
+            del self.gates_by_uid[gate.uid]
+        self.gates.remove_gates(gates)
+        self.is_edit_table.del_gate_entries(gates)  # Remove entries from the power table
+        self.icb_minimap.remove_gates(gates)
+        delete_gates(gates)
+
     def remove_connection_cb(self, event: Event) -> None:
         """Removed the connection between 2 gates"""
         if not self.icb_is_gate_active:
@@ -414,6 +603,17 @@ class Application(Tk):
             if len(self.icb_selected_gates) == 2 and self.icb_selected_gates[0] != self.icb_selected_gates[1]:
                 g1 = self.icb_selected_gates[0]
                 g2 = self.icb_selected_gates[1]
+                if (is_chip_pin(g1) and g2 in g1.get_input_gates()) or (is_chip_pin(g2) and g1 in g2.get_input_gates()):
+                    log_msg(WARNING, "A chip's pins can't be disconnected from it!")
+                    self.deselect_active_gates()
+                    return
+                # Only a direct connection is actually removed
+                if g2 in g1.get_output_gates():
+                    self.record_edit("disconnect", src=g1.uid, dest=g2.uid)
+                    self.record_history(("disconnect", g1.uid, g2.uid, g2.get_input_gates().index(g1)))
+                elif g1 in g2.get_output_gates():
+                    self.record_edit("disconnect", src=g2.uid, dest=g1.uid)
+                    self.record_history(("disconnect", g2.uid, g1.uid, g1.get_input_gates().index(g2)))
                 g1.remove_connection(g2, self_is_parent=is_parent(g1, g2))
                 # self.icb_selected_gates[1].remove_connection(self.icb_selected_gates[0])
                 self.deselect_active_gates()
@@ -422,203 +622,613 @@ class Application(Tk):
 
     def place_gate(self, event: Event) -> None:
         """Places a gate on the canvas after pressing a gate button"""
-        if self.icb_is_gate_active and 0 <= event.x <= self.width and 0 <= event.y <= self.height:
+        if self.icb_is_gate_active and self.on_board(event):
             if self.input_gates_intersect(event)[0]:
                 return
 
-            self.active_input_pi = PhotoImage(file=self.gates[self.active_input.get_func()]["image_file"])
-            inst_num = len(self.gates[self.active_input.get_func()].get_active_gates()) + 1
-
-            if is_clock(self.active_input):
-                self.gates[self.active_input.get_func()].add_active_gate(ClockTk(update_rate=self.default_update_rate,
-                                                                                 gate_info_repo=self.gates,
-                                                                                 label=self.active_input.get_label() +
-                                                                                       str(inst_num),
-                                                                                 canvas=self.screen_icb,
-                                                                                 center=(event.x, event.y)))
-                self.selected_timer = self.gates[self.active_input.get_func()].get_active_gates()[-1]
+            func = self.active_input.get_func()
+            inst_num = len(self.gates[func].get_active_gates()) + 1
+            last_input = self.create_gate(func, (event.x, event.y), self.active_input.get_label() + str(inst_num),
+                                          self.active_input.out, self.default_update_rate)
+            if is_chip(last_input):  # The pins are placed with the chip
+                self.record_edit("place", uid=last_input.uid, pins=[pin.uid for pin in last_input.pins()],
+                                 **gate_record(last_input)._asdict())
+            else:
+                self.record_edit("place", uid=last_input.uid, **gate_record(last_input)._asdict())
+            self.record_history(("place", *capture_gates(chip_parts([last_input]))))
+
+            if is_clock(last_input):
+                self.selected_timer = last_input
                 self.timer_prompt()  # Configure this new timer on placement
-            elif isinstance(self.active_input, InputTk):
-                self.gates[self.active_input.get_func()].add_active_gate(InputTk(self.active_input.get_func(),
-                                                                                 gate_info_repo=self.gates,
-                                                                                 label=self.active_input.get_label() +
-                                                                                       str(inst_num),
-                                                                                 canvas=self.screen_icb,
-                                                                                 center=(event.x, event.y),
-                                                                                 out=self.active_input.out,
-                                                                                 # If output gate, make it smaller to fit with border
-                                                                                 dims=(self.img_width - 5,
-                                                                                       self.img_height - 5) if
-                                                                                 is_output_gate(self.active_input) else
-                                                                                 (0, 0)))
-            last_input = self.gates[self.active_input.get_func()].get_active_gates()[-1]
-            self.active_input_img_index = last_input.get_id()
-            # Add checkbox entry to entry menu if gate is a power source
-            if is_power_gate(last_input):
-                self.is_edit_table.add_entry(last_input)
+
+    def create_gate(self, func: Callable, center: (int, int), label: str, state: int = NULL,
+                    rate: Optional[float] = None, dims: Optional[tuple[int, int]] = None,
+                    with_pins: bool = True, uid: Optional[int] = None) -> InputTk:
+        """Creates a gate on the board and adds it to the gate repository, the minimap and the power table. Clocks use
+        state as their default state and rate as their update rate, chip pins use it as the index of their output.
+        Custom chips are created with their pins unless with_pins is False. A gate restored by undo keeps its old uid"""
+        if func == logic_clock:
+            gate = ClockTk(update_rate=rate if rate else self.default_update_rate, gate_info_repo=self.gates,
+                           label=label, canvas=self.screen_icb, center=center, default_state=state)
+        elif isinstance(func, ChipDefinition):
+            gate = ChipTk(func, self.gates, label=label, canvas=self.screen_icb, center=center)
+        elif func == chip_pin:
+            gate = ChipPinTk(self.gates, state, label=label, canvas=self.screen_icb, center=center)
+        else:
+            if dims is None:  # If output gate, make it smaller to fit with border
+                dims = (self.img_width - 5, self.img_height - 5) if func == output else (0, 0)
+            gate = InputTk(func, gate_info_repo=self.gates, label=label, canvas=self.screen_icb, center=center,
+                           out=state, dims=dims)
+        if uid is not None:
+            gate.uid = uid
+        self.gates_by_uid[gate.uid] = gate
+        self.gates[func].add_active_gate(gate)
+        self.icb_minimap.add_gate(gate)
+        # Add checkbox entry to entry menu if gate is a power source
+        if is_power_gate(gate):
+            self.is_edit_table.add_entry(gate)
+        if is_chip(gate) and with_pins:
+            for index in range(func.num_outputs):
+                pin = self.create_gate(chip_pin, gate.pin_center(index), func.output_labels[index], index)
+                pin.add_line(gate)
+        return gate
+
+    def optimization_report(self) -> None:
+        """Optimises the compiled board and logs how much smaller and faster it is, the board itself is unchanged"""
+        try:
+            netlist = Netlist.from_gates(self.all_gates())
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be optimised")
+            return
+        _, _, report = optimize_netlist(netlist, repeat=5)
+        log_msg(INFO, "Optimization: " + report.summary())
+
+    def check_equivalence(self) -> None:
+        """Asks for two circuit files and logs whether they compute the same outputs, with a counterexample if not"""
+        file_a = fd.askopenfilename(initialdir=self.save_path, filetypes=self.file_types, title="First circuit")
+        if file_a == "":
+            return
+        file_b = fd.askopenfilename(initialdir=self.save_path, filetypes=self.file_types, title="Second circuit")
+        if file_b == "":
+            return
+
+        log_msg(INFO, "Checking equivalence of " + file_a + " and " + file_b)
+        try:
+            result = check_files_equivalent(file_a, file_b, self.gates)
+        except ValueError:
+            log_msg(WARNING, "The circuits could not be compared")
+            return
+        log_msg(INFO, result.summary())
+
+    def solve_selected(self) -> None:
+        """Looks for power gate values which make every selected gate TRUE and sets them in the power table"""
+        if len(self.icb_selected_gates) == 0:
+            log_msg(WARNING, "Select the gates to drive TRUE first")
+            return
+        gates = self.all_gates()
+        ids = {gate: idx for idx, gate in enumerate(gates)}
+        targets = {ids[gate]: TRUE for gate in self.icb_selected_gates}
+        self.deselect_active_gates()
+        try:
+            result = solve_for_values(Netlist.from_gates(gates), targets)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be solved")
+            return
+
+        log_msg(INFO, "Solve: " + result.summary())
+        if not result.satisfiable:
+            return
+        clocks = [gates[idx] for idx in result.assignment if is_clock(gates[idx])]
+        if len(clocks) > 0:
+            log_msg(INFO, "Clocks must output: " + ", ".join(
+                clock.get_label() + "=" + str(result.assignment[ids[clock]]) for clock in clocks))
+        self.is_edit_table.set_gate_values({gates[idx]: value for idx, value in result.assignment.items()
+                                            if is_power_gate(gates[idx])})
+
+    def board_gate(self, netlist: Netlist, gates: list[InputTk], idx: int) -> InputTk:
+        """Returns the placed gate for a netlist id, a gate inside a custom chip is shown as the chip"""
+        if idx < netlist.gate_count:
+            return gates[idx]
+        return gates[max((base, chip) for chip, base in netlist.chip_bases.items() if base <= idx)[1]]
+
+    def show_critical_path(self) -> None:
+        """Widens the lines along the longest delay path from a power or clock gate to an output gate"""
+        self.deselect_active_gates()
+        gates = self.all_gates()
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be analysed")
+            return
+        paths = critical_paths(netlist, gate_delays(netlist, self.gates))
+        if len(paths) == 0:
+            log_msg(INFO, "No output gate is driven by a power or clock gate")
+            return
+
+        log_msg(INFO, "\n".join("Delay to {0}: {1}".format(gates[out_id].get_label(), paths[out_id].delay)
+                                for out_id in sorted(paths, key=lambda idx: -paths[idx].delay)[:10]))
+        path = [self.board_gate(netlist, gates, idx) for idx in max(paths.values()).gates]
+        for src, dest in zip(path, path[1:]):
+            if src in dest.get_input_gates():
+                line_id = dest.input_line_ids[dest.get_input_gates().index(src)]
+                self.screen_icb.itemconfig(line_id, width=8)
+                self.icb_highlighted_lines.append(line_id)
+
+    def timed_toggle(self) -> None:
+        """Toggles the selected power gates with every gate delayed by its type's delay, and logs how long the board
+        takes to settle and which outputs glitched on the way"""
+        gates = self.all_gates()
+        ids = {gate: idx for idx, gate in enumerate(gates)}
+        toggled = [gate for gate in self.icb_selected_gates if is_power_gate(gate)]
+        self.deselect_active_gates()
+        if len(toggled) == 0:
+            log_msg(WARNING, "Select the power gates to toggle first")
+            return
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be simulated")
+            return
+
+        simulator = TimingSimulator(netlist, gate_delays(netlist, self.gates))
+        simulator.set_inputs({ids[gate]: int(not gate.output()) for gate in toggled})
+        settled = simulator.run()
+        toggles = simulator.toggle_counts()
+        glitches = [gates[idx].get_label() for idx in range(netlist.gate_count)
+                    if netlist.funcs[idx] == output and toggles.get(idx, 0) > 1]
+        log_msg(INFO, "Settled after {0} time steps and {1} events".format(settled, simulator.events))
+        if len(glitches) > 0:
+            log_msg(INFO, "Outputs which glitched: " + ", ".join(glitches))
+        self.is_edit_table.set_gate_values({gate: int(not gate.output()) for gate in toggled})
+
+    def fault_coverage(self) -> None:
+        """Logs which stuck-at faults are detected by every input vector if there are few inputs, or by random vectors
+        if there are many"""
+        gates = self.all_gates()
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be simulated")
+            return
+        simulator = FaultSimulator(netlist)
+        width = len(simulator.free)
+        vectors = exhaustive_vectors(width) if width <= self.exhaustive_fault_inputs else \
+            random_vectors(self.random_fault_vectors, width)
+        report = simulator.run(vectors)
+
+        lines = [report.summary()]
+        for gate, value in report.undetected[:20]:
+            label = self.board_gate(netlist, gates, gate).get_label()
+            if gate >= netlist.gate_count:  # Inside a custom chip
+                label += "/" + netlist.labels[gate]
+            lines.append("Undetected: {0} stuck at {1}".format(label, value))
+        if len(report.undetected) > 20:
+            lines.append("... and {0} more".format(len(report.undetected) - 20))
+        log_msg(INFO, "\n".join(lines))
+
+    def exhaustive_sweep(self) -> None:
+        """Evaluates every combination of the power and clock gates on every core, on a thread of its own so the board
+        stays usable. If gates are selected, logs the combinations which set them all to TRUE, otherwise logs how many
+        set each output gate to TRUE"""
+        if self.sweep_thread is not None:
+            log_msg(WARNING, "A sweep is already running")
+            return
+        gates = self.all_gates()
+        ids = {gate: idx for idx, gate in enumerate(gates)}
+        targets = {ids[gate]: TRUE for gate in self.icb_selected_gates} if len(self.icb_selected_gates) > 0 else None
+        self.deselect_active_gates()
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be swept")
+            return
+        inputs = [idx for idx in range(netlist.gate_count) if netlist.funcs[idx] in (power, logic_clock)]
+        if len(inputs) > self.max_sweep_inputs:
+            log_msg(WARNING, "The circuit has {0} inputs, at most {1} can be swept"
+                    .format(len(inputs), self.max_sweep_inputs))
+            return
+
+        labels = [gate.get_label() for gate in gates]  # The gates may be edited or deleted during the sweep
+        outcome = {}  # The sweep's result or the error it raised, set by the sweep thread
+
+        def run_sweep() -> None:
+            try:
+                outcome["result"] = sweep(netlist, inputs, targets=targets, hit_limit=1000)
+            except Exception as err:
+                outcome["error"] = err
+
+        self.sweep_thread = threading.Thread(target=run_sweep, name="sweep", daemon=True)
+        self.sweep_thread.start()
+        log_msg(INFO, "Sweeping {0} combinations in the background".format(1 << len(inputs)))
+        latency_monitor.after(self, self.sweep_poll_interval, self.finish_sweep, outcome, labels, inputs, targets)
+
+    def finish_sweep(self, outcome: dict, labels: list[str], inputs: list[int], targets: Optional[dict]) -> None:
+        """Logs the result of the sweep once its thread is done, until then checks again every sweep_poll_interval"""
+        if self.sweep_thread.is_alive():
+            latency_monitor.after(self, self.sweep_poll_interval, self.finish_sweep, outcome, labels, inputs, targets)
+            return
+        self.sweep_thread = None
+        if "error" in outcome:
+            log_msg(WARNING, "The sweep failed: {0}".format(outcome["error"]))
+            return
+        result = outcome["result"]
+        lines = [result.summary()]
+        if targets is not None:
+            lines.append("{0} combinations set the selected gates to TRUE".format(len(result.hits)))
+            for vector in result.hits[:10]:
+                lines.append(", ".join(labels[idx] + "=" + str((vector >> bit) & 1) for bit, idx in enumerate(inputs)))
+        else:
+            for idx in result.outputs:
+                count = sum(byte.bit_count() for byte in result.tables[idx]) if idx in result.tables else 0
+                lines.append("{0} is TRUE for {1} of {2} combinations{3}".format(
+                    labels[idx], count, result.vectors, " (always NULL)" if idx in result.null_outputs else ""))
+        log_msg(INFO, "\n".join(lines))
+
+    def set_stimulus_bias(self) -> None:
+        """Asks for the probability the selected power gates are TRUE under random stimulus"""
+        selected = [gate for gate in self.icb_selected_gates if is_power_gate(gate)]
+        if len(selected) == 0:
+            log_msg(WARNING, "Select the power gates to bias first")
+            return
+        bias = simpledialog.askfloat("Stimulus Bias", "Probability the selected power gates are TRUE:", parent=self,
+                                     initialvalue=self.stimulus_bias.get(selected[0].uid, 0.5), minvalue=0.0,
+                                     maxvalue=1.0)
+        if bias is None:
+            return
+        for gate in selected:
+            self.stimulus_bias[gate.uid] = bias
+        log_msg(INFO, "Stimulus bias of {0} power gates set to {1}".format(len(selected), bias))
+
+    def switching_activity(self) -> None:
+        """Drives the power and clock gates with random vectors, logs the nets which never toggled and colors every
+        line from blue for the coldest to red for the hottest net"""
+        self.deselect_active_gates()
+        gates = self.all_gates()
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            log_msg(WARNING, "The circuit contains a cycle and can't be simulated")
+            return
+        bias = {idx: self.stimulus_bias[gate.uid] for idx, gate in enumerate(gates) if gate.uid in self.stimulus_bias}
+        report = random_activity(netlist, self.activity_vectors, bias)
+
+        lines = [report.summary()]
+        cold = [gates[idx].get_label() for idx in report.cold() if idx < netlist.gate_count]
+        if len(cold) > 0:
+            lines.append("Never toggled: " + ", ".join(cold[:20]) + (" ..." if len(cold) > 20 else ""))
+        live = [idx for idx in range(netlist.gate_count) if not report.null[idx]]
+        hottest = max((report.activity(idx) for idx in live), default=0.0)
+        for idx in sorted(live, key=report.activity, reverse=True)[:5]:
+            lines.append("{0}: activity {1:.3f}, TRUE {2:.1%} of the time".format(
+                gates[idx].get_label(), report.activity(idx), report.probability(idx)))
+        log_msg(INFO, "\n".join(lines))
+        for idx in live:
+            fill = heat_color(report.activity(idx) / hottest if hottest > 0 else 0.0)
+            for line_id in gates[idx].output_line_ids:
+                self.screen_icb.itemconfig(line_id, fill=fill)
+            self.icb_heat_gates.append(gates[idx])
+
+    def toggle_profiling(self) -> None:
+        """Starts timing the evaluations and recolors of every gate, or stops and shows the results"""
+        if InputTk.profiler is None:
+            InputTk.profiler = GateProfiler()
+            log_msg(INFO, "Profiling started, toggle profiling again to see the results")
+            return
+        self.profile, InputTk.profiler = InputTk.profiler, None
+        log_msg(INFO, self.profile.summary())
+        self.show_profile()
+
+    def show_profile(self) -> None:
+        """Colors the lines of every profiled gate from blue for the fastest to red for the slowest, and lists the
+        profiles in a table which is sorted by clicking a column"""
+        self.deselect_active_gates()
+        profiles = self.profile.profiles(self.gates)
+        slowest = max((profile.seconds() for profile in profiles), default=0.0)
+        for profile in profiles:
+            gate = self.gates_by_uid.get(profile.uid)
+            if gate is None:  # Deleted since it was profiled
+                continue
+            fill = heat_color(profile.seconds() / slowest if slowest > 0 else 0.0)
+            for line_id in gate.output_line_ids:
+                self.screen_icb.itemconfig(line_id, fill=fill)
+            if is_output_gate(gate):
+                self.screen_icb.itemconfig(gate.input_id, outline=fill)
+            self.icb_heat_gates.append(gate)
+
+        if self.profile_window is not None:
+            self.profile_window.destroy()
+        self.profile_window = Toplevel(self)
+        self.profile_window.title("Gate Profile")
+        by_type = IntVar(value=FALSE)
+        sort_column = StringVar(value="seconds")
+        descending = IntVar(value=TRUE)
+
+        table_frame = Frame(self.profile_window)
+        table_frame.grid(row=0, column=0, columnspan=3, padx=(5, 5), pady=(5, 5), sticky='news')
+        table = ttk.Treeview(table_frame, columns=profile_columns, show="headings", height=20)
+        table.grid(row=0, column=0, sticky='news')
+        scrollbar = Scrollbar(table_frame, orient=VERTICAL, command=table.yview)
+        scrollbar.grid(row=0, column=1, sticky='ns')
+        table.configure(yscrollcommand=scrollbar.set)
+
+        def fill_table() -> None:
+            rows = [tuple(profile) + (profile.seconds(),) for profile in
+                    (self.profile.type_profiles(self.gates) if by_type.get() else self.profile.profiles(self.gates))]
+            column = profile_columns.index(sort_column.get())
+            rows.sort(key=lambda row: row[column], reverse=bool(descending.get()))
+            table.heading("uid", text="Gates" if by_type.get() else "Uid")
+            table.delete(*table.get_children())
+            for row in rows:
+                table.insert("", END, values=["{0:.6f}".format(value) if isinstance(value, float) else value
+                                              for value in row])
+
+        def sort_by(column: str) -> None:
+            descending.set(not descending.get() if sort_column.get() == column else TRUE)
+            sort_column.set(column)
+            fill_table()
+
+        for column in profile_columns:
+            table.heading(column, text=capitalize(column.replace("_", " ")), command=lambda name=column: sort_by(name))
+            table.column(column, width=90 if column not in ("label", "gate_type") else 120)
+
+        Checkbutton(self.profile_window, text="Totals per gate type", variable=by_type, command=fill_table,
+                    font=self.active_font).grid(row=1, column=0, padx=(5, 5), pady=(0, 5), sticky=W)
+        Button(self.profile_window, text="Export CSV...", command=lambda: self.export_profile(".csv"),
+               font=self.active_font).grid(row=1, column=1, padx=(5, 5), pady=(0, 5))
+        Button(self.profile_window, text="Export pstats...", command=lambda: self.export_profile(".prof"),
+               font=self.active_font).grid(row=1, column=2, padx=(5, 5), pady=(0, 5))
+        fill_table()
+
+    def export_profile(self, file_type: str) -> None:
+        """Writes the last profile as CSV, or for a .prof file in the pstats format"""
+        file_types = [("CSV File", "*.csv")] if file_type == ".csv" else [("Profile Statistics", "*.prof")]
+        file_name = fd.asksaveasfilename(initialdir=self.save_path, filetypes=file_types, defaultextension=file_type,
+                                         parent=self.profile_window)
+        if file_name == "":
+            return
+        if file_type == ".csv":
+            self.profile.write_csv(file_name, self.gates)
+        else:
+            self.profile.write_pstats(file_name, self.gates)
+        log_msg(INFO, "Profile written to: " + file_name)
+
+    def show_performance(self) -> None:
+        """Opens a window listing the latency of every event handler, updated while it is open"""
+        if self.performance_window is not None and self.performance_window.winfo_exists():
+            self.performance_window.lift()
+            return
+        self.performance_window = Toplevel(self)
+        self.performance_window.title("Performance")
+        columns = HandlerLatency._fields
+        self.performance_table = ttk.Treeview(self.performance_window, columns=columns, show="headings", height=15)
+        self.performance_table.grid(row=0, column=0, columnspan=2, padx=(5, 5), pady=(5, 5), sticky='news')
+        headings = ("Handler", "Calls", "p50 (ms)", "p99 (ms)", "Worst (ms)", "Queued p50 (ms)", "Queued p99 (ms)")
+        for column, heading in zip(columns, headings):
+            self.performance_table.heading(column, text=heading)
+            self.performance_table.column(column, width=160 if column == "name" else 100)
+        Button(self.performance_window, text="Clear", command=latency_monitor.clear,
+               font=self.active_font).grid(row=1, column=0, padx=(5, 5), pady=(0, 5))
+        Button(self.performance_window, text="Dump...", command=self.dump_performance,
+               font=self.active_font).grid(row=1, column=1, padx=(5, 5), pady=(0, 5))
+        self.refresh_performance()
+
+    def refresh_performance(self) -> None:
+        if self.performance_job is not None:  # Only one chain of updates runs, even if the window was reopened
+            self.after_cancel(self.performance_job)
+            self.performance_job = None
+        if self.performance_window is None or not self.performance_window.winfo_exists():
+            self.performance_window = self.performance_table = None
+            return
+        self.performance_table.delete(*self.performance_table.get_children())
+        for latency in latency_monitor.latencies():
+            self.performance_table.insert("", END, values=[latency.name, latency.calls] +
+                                          ["{0:.2f}".format(value) for value in latency[2:]])
+        self.performance_job = latency_monitor.after(self, self.performance_refresh, self.refresh_performance)
+
+    def dump_performance(self) -> None:
+        """Writes the handler latencies and their samples as JSON"""
+        file_name = fd.asksaveasfilename(initialdir=self.save_path, filetypes=[("JSON File", "*.json")],
+                                         defaultextension=".json", parent=self.performance_window)
+        if file_name == "":
+            return
+        latency_monitor.write_json(file_name)
+        log_msg(INFO, "Handler latencies written to: " + file_name)
+
+    def memory_report(self) -> None:
+        """Logs the memory held by the board, per gate type, and any canvas items no gate owns"""
+        report = memory_report(self.all_gates(), self.gates, self.screen_icb, self, [self.active_input_img_index])
+        lines = [report.summary()]
+        for name, memory in sorted(report.types.items()):
+            lines.append("{0}: {1} gates, {2:,} bytes of gates, {3:,} bytes of connections, {4} canvas items"
+                         .format(name, *memory))
+        lines.append("Canvas items: " + ", ".join("{0} {1}".format(count, item_type)
+                                                  for item_type, count in sorted(report.canvas_items.items())))
+        log_msg(INFO, "\n".join(lines))
+        if len(report.orphan_items) > 0:
+            log_msg(WARNING, "{0} canvas items belong to no gate".format(len(report.orphan_items)))
+
+    def leak_exercise(self) -> None:
+        """Places leak_check_gates gates of every primitive type, previewing each under the mouse first as when it is
+        placed by hand, then deletes them all"""
+        funcs = (power, logic_not, logic_and, logic_nand, logic_or, logic_xor, output)
+        columns = max(1, self.screen_icb.winfo_width() // 10)
+        gates = []
+        for idx in range(self.leak_check_gates):
+            func = funcs[idx % len(funcs)]
+            self.gates[func]["callback"]()
+            event = SimpleNamespace(x=5 + 10 * (idx % columns), y=5 + 10 * (idx // columns))
+            self.motion_cb(event)  # Leaves event in board coordinates
+            gates.append(self.create_gate(func, (event.x, event.y), "leak" + str(idx), TRUE))
+        self.set_active_fn_none()
+        self.remove_gates(gates)
+
+    def leak_check(self) -> None:
+        """Places and deletes leak_check_gates gates twice, and logs what the second run left behind"""
+        self.deselect_active_gates()
+        log_msg(INFO, "Placing and deleting {0} gates twice...".format(self.leak_check_gates))
+        report = leak_check(self.leak_exercise, self.screen_icb, self)
+        log_msg(WARNING if report.leaked() else INFO, "\n".join([report.summary()] + list(report.top)))
+
+    def all_gates(self) -> list[InputTk]:
+        """Returns one list of every placed gate"""
+        return [gate for func in self.gates.keys() for gate in self.gates[func].get_active_gates()]
 
     def save(self, event: Optional[Event] = None) -> None:
         """Save the current circuit to a file, if this is the first save, prompt for file name"""
         if self.filename == "":  # If the program has not been saved before, prompt for filename
             log_msg(INFO, "No save file has been specified.")
             self.save_as()
+            if self.filename == "":
+                return
 
         log_msg(INFO, "Saving diagram to: " + self.filename)
-        with open(self.filename, 'w') as save_file:
-            self.deselect_active_gates()
-            self.reset()
-            gates = []
-
-            for func in self.gates.keys():  # Create one list out of all gates
-                for gate in self.gates[func].get_active_gates():
-                    gates.append(gate)
-
-            for idx, gate in enumerate(gates):
-                # For each gate, write the gate and its enumeration, which is used as its id
-                print("{0},{1}".format(gate, int(idx)), file=save_file)
-                gates[idx] = (gate, idx)
-
-            print(self.file_separator, file=save_file)  # Add seperator between the gates and their connections
-
-            # Write connections to file
-            # Get the input and output gates for each gate, convert each gate to its id and write to file
-            for (gate, cnt) in gates:
-                in_gates = gate.get_input_gates()
-                out_gates = gate.get_output_gates()
-
-                # Get the id of each input gate, store in list
-                # Strip spaces from input and output gate lists to simplify reading
-                in_fmt = "[" if len(in_gates) > 0 else "[]"
-                for in_gate in in_gates:
-                    for other_gate in gates:
-                        if other_gate[0] == in_gate:
-                            in_fmt += str(other_gate[1]) + "|"
-                            break
-                in_fmt = in_fmt[:-1] + ']'
-
-                # For every output, find the gate in the master list and add its id number to the list,
-                # to reconstruct later
-                out_fmt = "[" if len(out_gates) > 0 else "[]"
-                for out_gate in out_gates:
-                    for other_gate in gates:
-                        if other_gate[0] == out_gate:
-                            out_fmt += str(other_gate[1]) + "|"
-                            break
-                out_fmt = out_fmt[:-1] + ']'
-
-                print('{0},{1},{2}'.format(cnt, in_fmt, out_fmt), file=save_file)
+        self.deselect_active_gates()
+        # The snapshot is a copy of the board, so it is written on the journal's worker thread while editing and the
+        # clocks carry on. The format is picked by the file extension
+        self.journal.submit(save_circuit, self.filename, snapshot_circuit(self.all_gates()))
 
     def save_as(self):
         """Create save file prompt and set self.filename to this file"""
         self.filename = fd.asksaveasfilename(initialfile=self.filename, initialdir=self.save_path,
-                                             filetypes=[("Circuit Diagram", "*" + self.file_type)])
+                                             filetypes=self.file_types)
 
     def open(self, event: Optional[Event] = None) -> None:
-        """"Load circuit from file.  Eventually use tomlkit to create nicelly formatted file."""
-        self.filename = fd.askopenfilename(initialdir=self.save_path,
-                                           filetypes=[("Circuit Diagram", "*" + self.file_type)])
+        """"Load circuit from file."""
+        filename = fd.askopenfilename(initialdir=self.save_path, filetypes=self.file_types)
+        if filename == "":
+            return
 
-        if self.filename == "":
+        log_msg(INFO, "Loading diagram: " + os.path.abspath(filename))
+        if is_binary_file(filename):
+            # The file is mapped rather than read, records are only decoded as gates are created. The gates in the
+            # visible part of the board are created and drawn first
+            try:
+                circuit = BinaryCircuit(filename)
+            except (ValueError, OSError) as err:
+                log_msg(WARNING, "Could not open " + filename + ": " + repr(err))
+                return
+            with circuit:
+                try:
+                    netlist = Netlist.from_snapshot(circuit, self.gates)  # Raises if the circuit has a cycle
+                except (ValueError, KeyError, IndexError) as err:
+                    log_msg(WARNING, "Could not open " + filename + ": " + repr(err))
+                    return
+                self.clear(undoable=False)
+                (x0, x1), (y0, y1) = self.screen_icb.xview(), self.screen_icb.yview()
+                visible = circuit.gates_in_rect((int(x0 * self.board_width), int(y0 * self.board_height)),
+                                                (int(x1 * self.board_width), int(y1 * self.board_height)))
+                self.load_snapshot(circuit, netlist, first=visible)
+        else:
+            try:
+                snapshot = read_circuit(filename)
+                netlist = Netlist.from_snapshot(snapshot, self.gates)  # Raises if the circuit has a cycle
+            except (ValueError, KeyError, IndexError, OSError) as err:
+                log_msg(WARNING, "Could not open " + filename + ": " + repr(err))
+                return
+            self.clear(undoable=False)
+            self.load_snapshot(snapshot, netlist)
+        self.filename = filename  # Only once the circuit has loaded, so a failed open can't be saved over the file
+        self.history.clear()  # Opening a file can't be undone
+        self.compact_journal()
+
+    def import_netlist(self) -> None:
+        """Replaces the board with a BLIF or Verilog netlist, its gates are laid out automatically"""
+        file_name = fd.askopenfilename(initialdir=self.save_path, filetypes=self.netlist_file_types)
+        if file_name == "":
             return
 
-        log_msg(INFO, "Loading diagram: " + os.path.abspath(self.filename))
-        with open(self.filename, 'r') as load_file:
-            self.clear()
+        log_msg(INFO, "Importing netlist: " + os.path.abspath(file_name))
+        try:
+            snapshot = read_netlist(file_name, self.board_width, self.board_height)
+            netlist = Netlist.from_snapshot(snapshot, self.gates)  # Raises if the circuit has a cycle
+        except (ValueError, KeyError, IndexError, OSError) as err:
+            log_msg(WARNING, "Could not import " + file_name + ": " + repr(err))
+            return
+        self.clear(undoable=False)
+        self.load_snapshot(snapshot, netlist)
+        self.history.clear()
+        self.compact_journal()
+
+    def export_netlist(self) -> None:
+        """Writes the board as a BLIF or Verilog netlist, custom chips are flattened into their gates"""
+        file_name = fd.asksaveasfilename(initialdir=self.save_path, filetypes=self.netlist_file_types)
+        if file_name == "":
+            return
 
-            # Get list of lines in file, then parse each line
-            file_lines = load_file.readlines()
-            connection_start_index = -1
-            gates = []
-            for idx, line in enumerate(file_lines):  # Load every gate into the canvas
-                if line.strip() == self.file_separator:
-                    connection_start_index = idx + 1
-                    break
-
-                line_list = line.strip('\n').split(sep=',')
-                # line_list[0]: Function Name
-                # line_list[1]: Center X of Gate on canvas
-                # line_list[2]: Center Y of Gate on canvas
-                # line_list[3]: Gate Output
-                # line_list[-1]: Gate Num
-                gate_func = self.gates[line_list[0]]  # get_logic_func_from_name(line_list[0])
-                # Strip parenthesis and space from center str, then split
-                gate_inst = len(self.gates[gate_func].get_active_gates()) + 1
-                position_x = int(line_list[1].strip("("))
-                position_y = int(line_list[2].strip(") "))
-                gate_out = int(line_list[3])
-                gate_center = (position_x, position_y)
-                gate = None
-                if gate_func == logic_clock:  # If this input is clock, it has a different format
-                    # line_list[3]: Default Value
-                    # line_list[4]: Update Rate
-                    # line_list[5]: gate number
-                    gate = ClockTk(gate_info_repo=self.gates, update_rate=float(line_list[4]),
-                                   label="Clock #" + str(gate_inst),
-                                   canvas=self.screen_icb, center=gate_center, default_state=int(line_list[5]))
-                else:  # Otherwise all the other gates have the same format
-                    gate = InputTk(func=gate_func, gate_info_repo=self.gates,
-                                   label=capitalize(gate_func.__name__ + " #" + str(gate_inst)),
-                                   canvas=self.screen_icb, center=gate_center, out=gate_out,
-                                   dims=(95, 45) if gate_func == output else (0, 0))
-                    if is_power_gate(gate):
-                        self.is_edit_table.add_entry(gate)
-                        gate.set_label("Power #" + str(gate_inst))
-                gates.append((gate, idx))
-                self.gates[gate_func].add_active_gate(gate)
-
-            # Strip input gate section from file to work with connections
-            file_lines = file_lines[connection_start_index:]
-            for connection_line in file_lines:
-                connection_line = connection_line.strip()
-                line_list = connection_line.split(sep=',')
-                # line_list[0]: gate id
-                # line_list[1]: gate input ids
-                # line_list[2]: gate output ids
-                curr_gate_id = int(line_list[0])
-                current_gate = None
-                for (gate, num) in gates:
-                    if num == curr_gate_id:
-                        current_gate = gate
-                        break
-
-                # Read gate inputs
-                # Find input gates based on gate num
-                inputs_id_list = [int(input_gate_num) for input_gate_num in line_list[1][1:-1].split('|')] \
-                    if len(line_list[1]) != 2 else []
-
-                outputs_id_list = [int(output_gate_num) for output_gate_num in line_list[2][1:-1].split('|')] \
-                    if len(line_list[2]) != 2 else []
-
-                # Get list of input and output gates using gate ids
-                for input_id in inputs_id_list:
-                    for (gate, num) in gates:
-                        if num == input_id:
-                            connect_gates(gate, current_gate)
-                            break
-
-                for output_id in outputs_id_list:
-                    for (gate, num) in gates:
-                        if num == output_id:
-                            connect_gates(current_gate, gate)
-                            break
-
-    def clear(self) -> None:
-        """Clear the canvas, clear all entries from the power table, and delete all gates"""
+        log_msg(INFO, "Exporting netlist to: " + file_name)
         self.deselect_active_gates()
-        self.reset()
+        model = os.path.splitext(os.path.basename(file_name))[0]
+        # Like saving, the netlist is a copy of the board so it is written on the journal's worker thread
+        self.journal.submit(write_netlist, file_name, Netlist.from_gates(self.all_gates()), model)
+
+    def load_snapshot(self, snapshot: CircuitSnapshot, netlist: Optional[Netlist] = None,
+                      first: Optional[list[int]] = None) -> list[InputTk]:
+        """Bulk loads a circuit onto the board. The connections are checked for cycles with a single topological sort
+        and evaluated once on the compiled netlist, then the gates and lines are created with their final values
+        without any per-connection propagation. The gates with ids in first are created, and drawn, before the rest.
+        Returns the created gates, indexed by id"""
+        if netlist is None:
+            netlist = Netlist.from_snapshot(snapshot, self.gates)  # Raises if the circuit has a cycle
+        values = netlist.evaluate()
+
+        gates = [None] * netlist.gate_count
+        order = range(netlist.gate_count)
+        if first is not None and len(first) > 0:
+            first_set = set(first)
+            order = itertools.chain(first, (idx for idx in range(netlist.gate_count) if idx not in first_set))
+        for count, idx in enumerate(order):  # Load every gate into the canvas
+            if first is not None and count == len(first):
+                self.update_idletasks()  # Draw the first gates before creating the rest
+            record = snapshot.gates[idx]
+            gate_func = netlist.funcs[idx]
+            gate_inst = len(self.gates[gate_func].get_active_gates()) + 1
+            if gate_func == logic_clock:  # Clocks store their default state and update rate
+                default_label = "Clock #" + str(gate_inst)
+            elif gate_func == power:
+                default_label = "Power #" + str(gate_inst)
+            else:
+                default_label = capitalize(gate_func.__name__ + " #" + str(gate_inst))
+            gates[idx] = self.create_gate(gate_func, (record.x, record.y),
+                                          record.label if record.label != "" else default_label,
+                                          record.state if gate_func in (logic_clock, chip_pin) else values[idx],
+                                          record.rate, dims=(95, 45) if gate_func == output else (0, 0),
+                                          with_pins=False)
+            if gate_func == chip_pin:
+                gates[idx].out = values[idx]
+            elif idx in netlist.chip_bases:
+                gates[idx].load_values(values, netlist.chip_bases[idx])
+
+        # Connections are taken from the snapshot, the netlist has rewired chips onto their flattened gates
+        connect_gates_bulk([(gates[in_id], gates[gate]) for gate in range(netlist.gate_count)
+                            for in_id in dict.fromkeys(snapshot.inputs[gate])])
+        self.board_changed()
+        return gates
+
+    def clear(self, undoable: bool = True) -> None:
+        """Clear the canvas, clear all entries from the power table, and delete all gates. undoable is False when the
+        history is cleared straight after, as opening a file does, so the gates aren't captured for nothing"""
+        self.record_edit("clear")
+        if undoable and not self.replaying and not self.undoing and len(self.gates_by_uid) > 0:
+            self.record_history(("delete", *capture_gates(self.all_gates())))
+        self.deselect_active_gates()
+        # Stop the clocks without resetting their outputs, every gate is about to be dropped anyway
+        ClockTk.clocks_paused = True
+        for timer in self.gates[logic_clock].get_active_gates():
+            timer.timer.cancel()
         self.is_edit_table.clear()
 
-        # Destroy Gates
+        # Drop all gates at once, their canvas items are deleted with the rest of the canvas below
         for func in self.gates.keys():
-            for gate in self.gates[func].get_active_gates():
-                gate.delete()
             self.gates[func].active_gates = []
+        self.gates_by_uid.clear()
+        InputTk.wire_router.clear()
 
         # Reset all reference to gates
         self.icb_is_gate_active = False
         self.set_active_fn_none()
         # Clear Canvas
         self.screen_icb.delete('all')
+        self.icb_minimap.clear()
         self.filename = ""
 
     def help(self) -> None:
@@ -809,6 +1419,8 @@ class Application(Tk):
         self.deselect_active_gates()
         self.icb_is_gate_active = False
         self.screen_icb.delete(self.active_input_img_index)
+        self.active_input_pi = None
+        self.active_input_img_index = 0
 
     def set_active_fn_output(self) -> None:
         self.icb_is_gate_active = True
@@ -848,6 +1460,12 @@ class Application(Tk):
         self.icb_is_gate_active = True
         self.active_input = ClockTk(self.gates, self.default_update_rate, label="Clock #", canvas=self.screen_icb)
 
+    def set_active_fn_chip(self, definition: ChipDefinition) -> None:
+        self.deselect_active_gates()
+        self.icb_is_gate_active = True
+        self.active_input = ChipTk(definition, self.gates, label=capitalize(definition.__name__) + " #",
+                                   canvas=self.screen_icb)
+
     def gui_build_input_selection_menu(self) -> None:
         """Build the side pane: the power table and gate buttons"""
         self.bordered_frame = Frame(self, background='black', width=self.input_selection_screen_width,
@@ -865,62 +1483,90 @@ class Application(Tk):
         self.is_button_frame.grid(column=0, row=0, sticky='w', padx=(10, 0), pady=(10, 0))
         # self.is_button_frame.grid_propagate(False)
 
-        for (i, func) in enumerate(self.gates.keys()):
-            labeled_button_frame = Frame(self.is_button_frame, background='white')
-            labeled_button_frame.grid(column=0, row=i, padx=(0, 5), sticky="e")
-            if i == len(self.gates) - 1:
-                labeled_button_frame.grid_configure(pady=(0, 5))
+        self.is_buttons = []
+        labeled_button_frame = None
+        for func in self.gates.keys():
+            if self.gates[func]["callback"] is not None:  # Gates without a callback can't be placed by themselves
+                labeled_button_frame = self.gui_add_gate_button(func, len(self.is_buttons))
+        if labeled_button_frame is not None:
+            labeled_button_frame.grid_configure(pady=(0, 5))
 
-            if self.gates[func]["func"] not in (output, power):
-                # Strip logic_ from each logic gate name
-                label_text = capitalize(self.gates[func]["name"][6:]) + " Gate:"
-            else:
-                label_text = capitalize(self.gates[func]["name"]) + " Gate:"
+        self.update_idletasks()
 
-            button_label = Label(labeled_button_frame, text=label_text, background='white',
-                                 font=reconfig_font(self.active_font, offset=-2, weight="bold"))
-            button_label.grid(column=0, row=0, padx=(0, 3), sticky='w')
+        # Add table to this side pane
+        self.is_edit_table = CheckbuttonTable(self.screen_is, self.screen_icb, self.active_font, text='Power Gates',
+                                              rename_cb=self.gate_renamed_cb, propagate_cb=self.power_toggled)
+        self.is_edit_table.grid(row=1, column=0, sticky='ns', padx=(10, 0))
+        self.is_edit_table.grid_propagate(False)
 
-            is_border_frame = Frame(labeled_button_frame, highlightbackground="black",
-                                    highlightthickness=1, bd=0)
-            is_border_frame.grid(row=0, column=1, sticky='e')
-            is_border_frame.propagate(True)
+    def gui_add_gate_button(self, func: Callable, row: int) -> Frame:
+        """Adds the labeled button which selects a gate type to place to the side pane, returns the button's frame"""
+        labeled_button_frame = Frame(self.is_button_frame, background='white')
+        labeled_button_frame.grid(column=0, row=row, padx=(0, 5), sticky="e")
 
-            is_button = Button(is_border_frame, image=self.gates[func]["image"], bg="white", relief="flat",
-                               command=self.gates[func]["callback"])
-            is_button.grid(sticky='e')
+        if self.gates[func]["name"].startswith("logic_"):
+            # Strip logic_ from each logic gate name
+            label_text = capitalize(self.gates[func]["name"][6:]) + " Gate:"
+        elif isinstance(func, ChipDefinition):
+            label_text = capitalize(self.gates[func]["name"]) + " Chip:"
+        else:
+            label_text = capitalize(self.gates[func]["name"]) + " Gate:"
 
-            self.is_buttons.append((is_button, button_label))
+        button_label = Label(labeled_button_frame, text=label_text, background='white',
+                             font=reconfig_font(self.active_font, offset=-2, weight="bold"))
+        button_label.grid(column=0, row=0, padx=(0, 3), sticky='w')
 
-        self.update_idletasks()
+        is_border_frame = Frame(labeled_button_frame, highlightbackground="black",
+                                highlightthickness=1, bd=0)
+        is_border_frame.grid(row=0, column=1, sticky='e')
+        is_border_frame.propagate(True)
 
-        # Add table to this side pane
-        self.is_edit_table = CheckbuttonTable(self.screen_is, self.screen_icb, self.active_font, text='Power Gates')
-        self.is_edit_table.grid(row=1, column=0, sticky='ns', padx=(10, 0))
-        self.is_edit_table.grid_propagate(False)
+        if self.gates[func]["image"] is not None:
+            is_button = Button(is_border_frame, image=self.gates[func]["image"], bg="white", relief="flat",
+                               command=self.gates[func]["callback"])
+        else:  # Custom chips are shown by name
+            is_button = Button(is_border_frame, text=self.gates[func]["name"], bg="white", relief="flat",
+                               font=self.active_font, command=self.gates[func]["callback"])
+        is_button.grid(sticky='e')
+
+        self.is_buttons.append((is_button, button_label))
+        return labeled_button_frame
 
     def gui_build_icb(self) -> None:
         """Builds the canvas for the gates to exist on and create all the key bindings"""
         self.screen_icb = Canvas(self, width=self.width - self.input_selection_screen_width, height=self.height,
-                                 background=self.background_color.get(), highlightthickness=0)
+                                 background=self.background_color.get(), highlightthickness=0,
+                                 scrollregion=(0, 0, self.board_width, self.board_height))
         self.screen_icb.grid(row=0, column=0, sticky="NESW")
         self.screen_icb.grid_propagate(False)
-        self.screen_icb.bind('<Motion>', self.motion_cb)
-        self.screen_icb.bind('<Button-1>', self.left_click_cb)
-        self.screen_icb.bind('<B1-Motion>', self.click_and_drag_cb)
-        self.screen_icb.bind('<Button-3>', self.right_click_cb)
-        self.screen_icb.bind('<KeyRelease-BackSpace>', self.delete_cb)
-        self.screen_icb.bind('<Control-Button-1>', self.multi_select_cb)
-        self.screen_icb.bind('<Control-s>', self.save)
-        self.screen_icb.bind('<Control-o>', self.save)
-        self.screen_icb.bind('<c>', self.remove_connection_cb)
-        self.screen_icb.bind('<r>', self.reset)
-        self.screen_icb.bind('<p>', self.play)
-        self.screen_icb.bind('<t>', self.pause)
-        self.screen_icb.bind('<space>', self.toggle_play_pause)
+        InputTk.wire_router = WireRouter(self.screen_icb)
+        latency_monitor.bind(self.screen_icb, '<Motion>', self.motion_cb)
+        latency_monitor.bind(self.screen_icb, '<Button-1>', self.left_click_cb)
+        latency_monitor.bind(self.screen_icb, '<B1-Motion>', self.click_and_drag_cb)
+        latency_monitor.bind(self.screen_icb, '<ButtonRelease-1>', self.release_cb)
+        latency_monitor.bind(self.screen_icb, '<Button-3>', self.right_click_cb)
+        latency_monitor.bind(self.screen_icb, '<KeyRelease-BackSpace>', self.delete_cb)
+        latency_monitor.bind(self.screen_icb, '<Control-Button-1>', self.multi_select_cb)
+        latency_monitor.bind(self.screen_icb, '<Control-s>', self.save)
+        latency_monitor.bind(self.screen_icb, '<Control-o>', self.save)
+        latency_monitor.bind(self.screen_icb, '<Control-z>', self.undo)
+        latency_monitor.bind(self.screen_icb, '<Control-y>', self.redo)
+        latency_monitor.bind(self.screen_icb, '<Control-Shift-Z>', self.redo)
+        latency_monitor.bind(self.screen_icb, '<c>', self.remove_connection_cb)
+        latency_monitor.bind(self.screen_icb, '<r>', self.reset)
+        latency_monitor.bind(self.screen_icb, '<p>', self.play)
+        latency_monitor.bind(self.screen_icb, '<t>', self.pause)
+        latency_monitor.bind(self.screen_icb, '<space>', self.toggle_play_pause)
         # Force the canvas to stay focused, keybindings only take effect when this widget has focus
         self.screen_icb.focus_force()
 
+    def gui_build_minimap(self) -> None:
+        """Adds the board overview to the bottom of the side pane"""
+        self.icb_minimap = Minimap(self.screen_is, self.screen_icb, self.board_width, self.board_height,
+                                   width=self.input_selection_screen_width - 30)
+        self.icb_minimap.grid(row=2, column=0, sticky='w', padx=(10, 0), pady=(10, 0))
+        self.icb_minimap.update_viewport()
+
     def gui_build_top_menu(self) -> None:
         """Build the top menu bar"""
         self.icb_menubar = Menu(self)
@@ -931,6 +1577,9 @@ class Application(Tk):
         file_menu.add_command(label="Open...", command=self.open, font=self.font_top)
         file_menu.add_command(label="Save", command=self.save, font=self.font_top)
         file_menu.add_command(label="Save as...", command=self.save_as, font=self.font_top)
+        file_menu.add_command(label="Import Netlist...", command=self.import_netlist, font=self.font_top)
+        file_menu.add_command(label="Export Netlist...", command=self.export_netlist, font=self.font_top)
+        file_menu.add_command(label="Import Chip...", command=self.import_chip, font=self.font_top)
         file_menu.add_command(label="Preferences", command=self.preference_prompt, font=self.font_top)
         file_menu.add_command(label="Clear", command=self.clear, font=self.font_top)
         file_menu.add_separator()
@@ -938,10 +1587,27 @@ class Application(Tk):
 
         self.icb_menubar.add_cascade(label="File", menu=file_menu, font=self.font_top)
 
+        edit_menu.add_command(label="Undo", command=self.undo, font=self.font_top, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="Redo", command=self.redo, font=self.font_top, accelerator="Ctrl+Y")
+        edit_menu.add_separator()
         edit_menu.add_command(label="Play", command=self.play, font=self.font_top)
         edit_menu.add_command(label="Pause", command=self.pause, font=self.font_top)
         edit_menu.add_command(label="Toggle", command=self.toggle_play_pause, font=self.font_top)
         edit_menu.add_command(label="Reset", command=self.reset, font=self.font_top)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Optimization Report", command=self.optimization_report, font=self.font_top)
+        edit_menu.add_command(label="Check Equivalence...", command=self.check_equivalence, font=self.font_top)
+        edit_menu.add_command(label="Solve For Selected Gates", command=self.solve_selected, font=self.font_top)
+        edit_menu.add_command(label="Critical Path", command=self.show_critical_path, font=self.font_top)
+        edit_menu.add_command(label="Timed Toggle Of Selected Power", command=self.timed_toggle, font=self.font_top)
+        edit_menu.add_command(label="Fault Coverage", command=self.fault_coverage, font=self.font_top)
+        edit_menu.add_command(label="Exhaustive Sweep", command=self.exhaustive_sweep, font=self.font_top)
+        edit_menu.add_command(label="Set Stimulus Bias...", command=self.set_stimulus_bias, font=self.font_top)
+        edit_menu.add_command(label="Switching Activity", command=self.switching_activity, font=self.font_top)
+        edit_menu.add_command(label="Toggle Profiling", command=self.toggle_profiling, font=self.font_top)
+        edit_menu.add_command(label="Performance", command=self.show_performance, font=self.font_top)
+        edit_menu.add_command(label="Memory Report", command=self.memory_report, font=self.font_top)
+        edit_menu.add_command(label="Leak Check", command=self.leak_check, font=self.font_top)
         self.icb_menubar.add_cascade(label="Run", menu=edit_menu, font=self.font_top)
 
         help_menu.add_command(label="Help", command=self.help, font=self.font_top)
@@ -954,13 +1620,15 @@ class Application(Tk):
         self.gui_build_top_menu()
         self.gui_build_input_selection_menu()
         self.gui_build_icb()
+        self.gui_build_minimap()
 
     def gui_reconfig_dimensions(self):
         """Updates the width and height of the application"""
         self.bordered_frame.config(height=self.height)
         self.screen_is.config(height=self.height)
         self.screen_icb.config(width=self.width - self.input_selection_screen_width, height=self.height)
-        self.is_edit_table.config_dims(height=self.height - self.is_button_frame.winfo_height() - 30,
+        self.is_edit_table.config_dims(height=self.height - self.is_button_frame.winfo_height() -
+                                              self.icb_minimap.winfo_reqheight() - 40,
                                        width=self.input_selection_screen_width - 30)
         self.geometry(str(self.width) + "x" + str(self.height))
 
@@ -970,6 +1638,11 @@ class Application(Tk):
             for gate in self.gates[func].get_active_gates():
                 gate.update_line_colors()
 
+    def get_font_families(self) -> list[str]:
+        if self.font_families is None:
+            self.font_families = sorted(set(font.families()))
+        return self.font_families
+
     def preference_prompt(self):
         """ Resolution: 2 Entries
             Bg color: Entry/Scroll menu
@@ -1029,7 +1702,7 @@ class Application(Tk):
         self.font_family_listbox = Listbox(font_family_frame, font=self.active_font, selectmode=SINGLE,
                                            exportselection=False)
 
-        for family in self.font_families:
+        for family in self.get_font_families():
             self.font_family_listbox.insert(END, family)
 
         self.font_family_listbox.pack(side=LEFT, fill=BOTH)
@@ -1109,7 +1782,12 @@ class Application(Tk):
         settings.add("Font", [self.active_font["family"], self.active_font["size"],
                               self.active_font["weight"], self.active_font["slant"]])
         settings.add("Colors", InputTk.line_colors_on)
+        settings.add("UndoLimit", self.undo_limit)
         doc["Settings"] = settings
+        logging = tomlkit.table()
+        logging.add("JSON", message_log.json_output)
+        logging.add("Levels", {subsystem: level_names[level] for subsystem, level in message_log.levels.items()})
+        doc["Logging"] = logging
         with open(self.preference_file_name, mode="wt", encoding="utf-8") as fp:
             tomlkit.dump(doc, fp)
             log_msg(INFO, "Saved settings to: " + self.preference_file_name)
@@ -1124,13 +1802,21 @@ class Application(Tk):
             self.height = document["Settings"]["Height"]
             self.background_color.set(document["Settings"]["Background"])
             InputTk.line_colors_on = document["Settings"]["Colors"]
+            self.undo_limit = int(document["Settings"].get("UndoLimit", self.undo_limit))
+            self.history.set_limit(self.undo_limit)
+            logging = document.get("Logging", {})  # Subsystems are module names, such as "journal"
+            levels = {}
+            for subsystem, level in logging.get("Levels", {}).items():
+                if str(level).upper() in level_names:
+                    levels[subsystem] = level_names.index(str(level).upper())
+                else:
+                    log_msg(WARNING, "Unknown log level {0!r} for {1}, using {2}".format(
+                        str(level), subsystem, level_names[message_log.default_level]))
+            message_log.configure(json_output=bool(logging.get("JSON", False)), levels=levels)
             fonts_attrs = document["Settings"]["Font"]
-            self.active_font = font.Font(family=fonts_attrs[0], size=fonts_attrs[1],
-                                         weight=fonts_attrs[2], slant=fonts_attrs[3])
-
-            self.gui_reconfig_dimensions()
-            self.screen_icb.config(background=self.background_color.get())
-            self.update_font(fonts_attrs[0], fonts_attrs[1])
+            # Loaded before the gui is built, so it is laid out once with these settings
+            self.set_fonts(fonts_attrs[0], fonts_attrs[1])
+            self.geometry(str(self.width) + "x" + str(self.height))
             log_msg(INFO, "Loaded settings from: " + self.preference_file_name)
 
     def timer_prompt(self):
@@ -1174,8 +1860,14 @@ class Application(Tk):
 
     def close_timer_prompt(self):
         # Update timer settings
+        old_rate, old_state = self.selected_timer.get_rate(), self.selected_timer.output()
         self.selected_timer.set_rate(float(self.timer_entry_strvar.get()))
         self.selected_timer.set_output(self.timer_state_intvar.get())
+        self.record_edit("clock", uid=self.selected_timer.uid, rate=self.selected_timer.get_rate(),
+                         state=self.timer_state_intvar.get())
+        if (old_rate, old_state) != (self.selected_timer.get_rate(), self.timer_state_intvar.get()):
+            self.record_history(("clock", self.selected_timer.uid, old_rate, old_state, self.selected_timer.get_rate(),
+                                 self.timer_state_intvar.get()))
         # Reset popup state
         self.selected_timer = None
         self.timer_state_intvar = IntVar(value=True)
@@ -1217,17 +1909,291 @@ class Application(Tk):
 
     def exit_app(self) -> None:
         self.reset(None)
+        self.journal.close(discard=True)  # Finishes any pending saves, a clean exit leaves nothing to recover
+        self.report_write_failures()
         self.quit()
         self.destroy()
         self.update()
         sys.exit(0)
 
+    # Undo #############################################################################################################
+    def record_history(self, command: tuple) -> None:
+        """Adds an edit to the undo history, edits made by undo, redo or the journal are not recorded"""
+        if not self.replaying and not self.undoing:
+            self.history.record(command)
+
+    def undo(self, event: Optional[Event] = None) -> None:
+        entry = self.history.undo()
+        if entry is None:
+            log_msg(INFO, "Nothing to undo")
+            return
+        self.apply_history_entry(reversed(entry), inverse=True)
+
+    def redo(self, event: Optional[Event] = None) -> None:
+        entry = self.history.redo()
+        if entry is None:
+            log_msg(INFO, "Nothing to redo")
+            return
+        self.apply_history_entry(entry, inverse=False)
+
+    def apply_history_entry(self, commands: Iterable[tuple], inverse: bool) -> None:
+        self.deselect_active_gates()
+        self.undoing = True
+        try:
+            for command in commands:
+                self.apply_command(command, inverse)
+        finally:
+            self.undoing = False
+
+    def apply_command(self, command: tuple, inverse: bool) -> None:
+        """Applies a command from the undo history, backwards if inverse. Each step is journaled like the edit it
+        repeats or reverts"""
+        op = command[0]
+        if op in ("place", "delete"):
+            _, records, edges = command
+            if (op == "place") != inverse:
+                self.restore_gates(records, edges, self.gates_by_uid, keep_uids=True)
+                self.record_edit("restore", gates=[[uid, *record] for uid, record in records],
+                                 edges=[list(edge) for edge in edges])
+            else:
+                uids = [uid for uid, _ in records if uid in self.gates_by_uid]
+                self.record_edit("delete", uids=uids)
+                self.remove_gates([self.gates_by_uid[uid] for uid in uids])
+        elif op == "move":
+            _, uid, old, new = command
+            x, y = old if inverse else new
+            self.gates_by_uid[uid].move(x, y)
+            for gate in chip_parts([self.gates_by_uid[uid]]):
+                self.icb_minimap.move_gate(gate)
+            self.record_edit("move", uid=uid, x=x, y=y)
+        elif op in ("connect", "disconnect"):
+            _, src_uid, dest_uid, index = command
+            src, dest = self.gates_by_uid[src_uid], self.gates_by_uid[dest_uid]
+            if (op == "connect") != inverse:
+                connect_gates(src, dest, index)
+                self.record_edit("connect", src=src_uid, dest=dest_uid, index=index)
+            else:
+                src.remove_connection(dest, self_is_parent=True)
+                self.record_edit("disconnect", src=src_uid, dest=dest_uid)
+        elif op == "rename":
+            _, uid, old, new = command
+            gate = self.gates_by_uid[uid]
+            gate.set_label(old if inverse else new)
+            self.is_edit_table.update_gate_label(gate)
+            self.record_edit("rename", uid=uid, label=gate.get_label())
+        elif op == "clock":
+            _, uid, old_rate, old_state, new_rate, new_state = command
+            rate, state = (old_rate, old_state) if inverse else (new_rate, new_state)
+            self.gates_by_uid[uid].set_rate(rate)
+            self.gates_by_uid[uid].set_output(state)
+            self.record_edit("clock", uid=uid, rate=rate, state=state)
+
+    def restore_gates(self, records: Iterable[tuple[int, GateRecord]], edges: Iterable[tuple[int, int, int]],
+                      gates_by_uid: dict, keep_uids: bool) -> None:
+        """Recreates deleted gates and their connections to each other and to the gates still on the board, each
+        connection back at the input it was. gates_by_uid maps the uids in records and edges to gates, and is updated
+        with the new gates"""
+        for uid, record in records:
+            gates_by_uid[uid] = self.create_gate(self.gates[record.func], (record.x, record.y), record.label,
+                                                 record.state, record.rate, with_pins=False,
+                                                 uid=uid if keep_uids else None)
+        restore_connections(edges, gates_by_uid)
+
+    # Compiled Evaluation ##############################################################################################
+    def board_changed(self) -> None:
+        """Drops the compiled board after its gates or connections changed, and compiles it again once the board has
+        been left alone for compile_delay"""
+        self.compiled_board = None
+        if self.compile_job is not None:
+            self.after_cancel(self.compile_job)
+        self.compile_job = latency_monitor.after(self, self.compile_delay, self.compile_board)
+
+    def compile_board(self) -> None:
+        self.compile_job = None
+        gates = self.all_gates()
+        try:
+            netlist = Netlist.from_gates(gates)
+        except ValueError:
+            return
+        self.compiled_board = (gates, netlist, compile_netlist(netlist))
+
+    def propagate_board(self, changed: list[InputTk]) -> None:
+        """Propagates new outputs of power gates. Once the board is compiled every gate is evaluated by the compiled
+        function instead, and only the gates whose output changed are recolored"""
+        if self.compiled_board is None:
+            propagate(changed)
+            return
+        gates, netlist, evaluate = self.compiled_board
+        for idx in range(netlist.gate_count):
+            if netlist.funcs[idx] in (power, logic_clock):
+                netlist.values[idx] = gates[idx].out
+        profiler = InputTk.profiler
+        start = perf_counter()
+        values = evaluate(netlist.values)
+        if profiler is not None:
+            profiler.compiled_run(perf_counter() - start)
+
+        recolor = list(changed)
+        for idx, gate in enumerate(gates):
+            old_out = gate.out
+            if idx in netlist.chip_bases:
+                gate.load_values(values, netlist.chip_bases[idx])
+            else:
+                gate.out = values[idx]
+            if gate.out != old_out:
+                recolor.append(gate)
+        for gate in recolor:
+            if profiler is None:
+                gate.color_lines(gate.out)
+            else:
+                profiler.color_lines(gate, gate.out)
+
+    # Autosave #########################################################################################################
+    def record_edit(self, op: str, **data) -> None:
+        """Appends an edit to the journal, edits being replayed from the journal are not recorded again"""
+        if op not in ("move", "rename", "clock", "state"):
+            self.board_changed()
+        if not self.replaying:
+            self.journal.append(op, **data)
+
+    def power_toggled(self, changed: list[InputTk]) -> None:
+        """Journals the new outputs of power gates set through the table, then propagates them"""
+        for gate in changed:
+            self.record_edit("state", uid=gate.uid, state=gate.out)
+        self.propagate_board(changed)
+
+    def gate_renamed_cb(self, gate: InputTk, old_label: str) -> None:
+        self.record_edit("rename", uid=gate.uid, label=gate.get_label())
+        self.record_history(("rename", gate.uid, old_label, gate.get_label()))
+
+    def compact_journal(self) -> None:
+        """Hands an immutable copy of the board to the journal, which writes it on its worker thread"""
+        gates = self.all_gates()
+        self.journal.compact(snapshot_circuit(gates), [gate.uid for gate in gates])
+
+    def autosave(self) -> None:
+        """Snapshots the board if it was edited since the last snapshot, then schedules the next autosave"""
+        if self.journal.dirty:
+            self.compact_journal()
+        latency_monitor.after(self, self.autosave_interval, self.autosave)
+
+    def report_write_failures(self) -> None:
+        """Shows an error for each save or export which failed on the journal's worker thread"""
+        for func, args, err in self.journal.take_failures():
+            if func in (save_circuit, write_netlist):
+                messagebox.showerror("Save Failed", "Could not write {0}:\n{1}".format(args[0], err), parent=self)
+
+    def check_write_failures(self) -> None:
+        self.report_write_failures()
+        latency_monitor.after(self, self.write_check_interval, self.check_write_failures)
+
+    def apply_edit(self, edit: dict, gates_by_uid: dict) -> None:
+        """Applies one journaled edit, gates_by_uid maps the uids in the journal to the gates on the board"""
+        op = edit["op"]
+        if op == "place":
+            gate = self.create_gate(self.gates[edit["func"]], (edit["x"], edit["y"]), edit["label"], edit["state"],
+                                    edit["rate"])
+            gates_by_uid[edit["uid"]] = gate
+            if is_chip(gate):
+                gates_by_uid.update(zip(edit["pins"], gate.pins()))
+            return
+        if op == "clear":
+            self.clear()
+            gates_by_uid.clear()
+            return
+        if op == "restore":
+            self.restore_gates([(gate[0], GateRecord(*gate[1:])) for gate in edit["gates"]],
+                               [tuple(edge) for edge in edit["edges"]], gates_by_uid, keep_uids=False)
+            return
+
+        uids = edit["uids"] if op == "delete" else [edit[key] for key in ("uid", "src", "dest") if key in edit]
+        if any(uid not in gates_by_uid for uid in uids):
+            log_msg(WARNING, "Skipping journaled edit of a missing gate: " + str(edit))
+            return
+        gates = [gates_by_uid[uid] for uid in uids]
+
+        if op == "move":
+            gates[0].move(edit["x"], edit["y"])
+            self.icb_minimap.move_gate(gates[0])
+        elif op == "connect":
+            connect_gates(gates[0], gates[1], edit.get("index"))
+        elif op == "disconnect":
+            gates[0].remove_connection(gates[1], self_is_parent=True)
+        elif op == "delete":
+            self.remove_gates(gates)
+            for uid in uids:
+                del gates_by_uid[uid]
+        elif op == "rename":
+            gates[0].set_label(edit["label"])
+            self.is_edit_table.update_gate_label(gates[0])
+        elif op == "clock":
+            gates[0].set_rate(edit["rate"])
+            gates[0].set_output(edit["state"])
+        elif op == "state":
+            self.is_edit_table.set_gate_values({gates[0]: edit["state"]})
+
+    def recover_journal(self) -> None:
+        """Offers to rebuild the board left behind by a session that did not exit cleanly, then starts a new
+        journal"""
+        recovery = self.journal.recover()
+        recovered = False
+
+        def recover_cb() -> None:
+            nonlocal recovered
+            self.close_exit_prompt()
+            self.replaying = True
+            try:
+                gates_by_uid = {}
+                if recovery.snapshot is not None:
+                    gates_by_uid = dict(zip(recovery.uids, self.load_snapshot(recovery.snapshot)))
+                for edit in recovery.entries:
+                    self.apply_edit(edit, gates_by_uid)
+            finally:
+                self.replaying = False
+            recovered = True
+            log_msg(INFO, "Recovered {0} gates from the autosave journal".format(len(self.all_gates())))
+
+        if recovery is not None:
+            self.exit_prompt("Recover Circuit", "Logical did not exit cleanly. Recover the unsaved circuit?",
+                             recover_cb)
+
+        self.journal.start()
+        if recovered:  # The old journal is gone, so snapshot the recovered board straight away
+            self.compact_journal()
+
+    # Startup ##########################################################################################################
+    def startup_phase(self, name: str) -> None:
+        if self.startup_times is not None:
+            self.startup_times[name] = perf_counter() - launch_time
+
+    def startup_finished(self) -> None:
+        """Called once the event loop is idle for the first time, draws the first frame, logs how long each phase of
+        startup took and exits"""
+        self.update_idletasks()
+        self.startup_phase("first frame")
+        lines, previous = [], 0.0
+        for name, seconds in self.startup_times.items():
+            lines.append("Startup, {0}: {1:.3f}s (+{2:.3f}s)".format(name, seconds, seconds - previous))
+            previous = seconds
+        log_msg(INFO, "\n".join(lines))
+        self.exit_app()
+
     def run(self) -> None:
-        self.gui_build_all()
         self.load_preferences()
+        self.gui_build_all()
+        self.startup_phase("gui built")
+        if self.startup_times is None:  # Recovery would wait on the user, and the startup run journals nothing
+            self.recover_journal()
+        latency_monitor.after(self, self.autosave_interval, self.autosave)
+        latency_monitor.after(self, self.write_check_interval, self.check_write_failures)
+        latency_monitor.heartbeat(self)
+        if self.startup_times is not None:
+            self.after_idle(self.startup_finished)
         self.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # In a frozen build the sweep's worker processes start here, not another app
+    launch_time = perf_counter()  # Startup is timed from here, once the modules are imported
     app = Application()
     app.run()
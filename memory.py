@@ -0,0 +1,173 @@
+########################################################################################################################
+# File: memory.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Memory accounting of the board. A report adds up the bytes held by the gate objects and their connection
+#              lists per gate type, counts the Tk photo images and their pixel buffers, the canvas items by type,
+#              the clock timer threads and the widgets, and finds canvas items which no gate owns. Traced Python
+#              memory is only reported when tracemalloc is already running, such as with PYTHONTRACEMALLOC set, since
+#              tracing every allocation slows the whole application down.
+#
+#              A leak check runs an exercise, such as placing and deleting thousands of gates, twice. The first run
+#              fills caches and the second is compared against a snapshot taken before it, anything it leaves behind
+#              is a leak: traced memory growth by source line, and canvas items, images, widgets and threads.
+#              tracemalloc is only on for the leak check, unless it was running already.
+########################################################################################################################
+import contextlib
+import gc
+import tracemalloc
+
+from logic_gate import *
+
+trace_frames = 1  # Frames of traceback tracemalloc keeps per allocation
+top_growth = 10  # Source lines listed by a leak check
+leak_tolerance = 65536  # Bytes of traced growth taken as noise, such as free lists and caches resizing
+
+
+class TypeMemory(NamedTuple):
+    gates: int
+    gate_bytes: int  # The gate objects and their own attributes
+    connection_bytes: int  # Lists of input and output gates and of line ids
+    canvas_items: int
+
+
+class MemoryReport(NamedTuple):
+    types: dict[str, TypeMemory]  # Gate type name -> memory of the gates of that type
+    images: int  # Tk photo images, including the gate images shared by every gate of a type
+    image_bytes: int  # Their pixel buffers, four bytes per pixel
+    canvas_items: dict[str, int]  # Canvas item type -> number of items on the board
+    orphan_items: list[int]  # Canvas items no gate owns
+    clock_threads: int  # Running clock timer threads
+    widgets: int
+    traced_bytes: Optional[int]  # Python memory allocated since tracing started and still held, None if not tracing
+    peak_bytes: Optional[int]
+
+    def summary(self) -> str:
+        gate_bytes = sum(memory.gate_bytes + memory.connection_bytes for memory in self.types.values())
+        traced = "Python memory not traced" if self.traced_bytes is None else \
+            "{0:,} bytes traced (peak {1:,})".format(self.traced_bytes, self.peak_bytes)
+        return "{0} gates holding {1:,} bytes, {2} images holding {3:,} bytes, {4} canvas items of which {5} are " \
+               "orphaned, {6} clock threads, {7} widgets, {8}" \
+            .format(sum(memory.gates for memory in self.types.values()), gate_bytes, self.images, self.image_bytes,
+                    sum(self.canvas_items.values()), len(self.orphan_items), self.clock_threads, self.widgets, traced)
+
+
+class LeakReport(NamedTuple):
+    traced_bytes: int  # Growth of traced Python memory
+    canvas_items: int  # Growth of each count
+    images: int
+    widgets: int
+    threads: int
+    top: list[str]  # Source lines whose allocations grew the most
+
+    def leaked(self) -> bool:
+        return self.traced_bytes > leak_tolerance or self.canvas_items > 0 or self.images > 0 or self.widgets > 0 or \
+            self.threads > 0
+
+    def summary(self) -> str:
+        return "Leak check: {0:+,} bytes traced, {1:+} canvas items, {2:+} images, {3:+} widgets, {4:+} threads" \
+            .format(self.traced_bytes, self.canvas_items, self.images, self.widgets, self.threads)
+
+
+@contextlib.contextmanager
+def tracing() -> Iterator[None]:
+    """Traces Python allocations inside the with block, tracing is stopped afterwards unless it was already on"""
+    if tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start(trace_frames)
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+def gate_memory(gate: InputTk) -> (int, int):
+    """Bytes held by gate itself and by its connection lists. Objects shared with other gates, like the gate image and
+    the gates at the other end of each connection, aren't counted"""
+    connections = (gate.inputs, gate.output_gates, gate.input_line_ids, gate.output_line_ids)
+    connection_bytes = sum(sys.getsizeof(ids) for ids in connections) + \
+        sum(sys.getsizeof(line_id) for ids in connections[2:] for line_id in ids)
+    gate_bytes = sys.getsizeof(gate) + sys.getsizeof(gate.__dict__) + sys.getsizeof(gate.label)
+    if hasattr(gate, "values"):  # Custom chips keep the value of every gate inside them
+        gate_bytes += sys.getsizeof(gate.values)
+    return gate_bytes, connection_bytes
+
+
+def image_memory(widget: Misc) -> (int, int):
+    """Number of Tk photo images and the bytes of their pixels"""
+    count = size = 0
+    for name in widget.image_names():
+        if widget.tk.call("image", "type", name) == "photo":
+            count += 1
+            size += 4 * int(widget.tk.call("image", "width", name)) * int(widget.tk.call("image", "height", name))
+    return count, size
+
+
+def canvas_census(canvas: Canvas) -> dict[str, int]:
+    counts = {}
+    for item in canvas.find_all():
+        item_type = canvas.type(item)
+        counts[item_type] = counts.get(item_type, 0) + 1
+    return counts
+
+
+def orphan_items(canvas: Canvas, gates: Iterable[InputTk], owned: Iterable[int] = ()) -> list[int]:
+    """Canvas items which belong to none of gates and aren't in owned"""
+    owned = set(owned)
+    for gate in gates:
+        owned.update(gate.canvas_items())
+        owned.update(gate.input_line_ids)
+        owned.update(gate.output_line_ids)
+    return [item for item in canvas.find_all() if item not in owned]
+
+
+def count_widgets(widget: Misc) -> int:
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def clock_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if isinstance(thread, threading.Timer))
+
+
+def memory_report(gates: list[InputTk], gate_info_repo: GatesInfoRepo, canvas: Canvas, root: Misc,
+                  owned: Iterable[int] = ()) -> MemoryReport:
+    """Memory of gates on canvas, and of everything under the root window. owned lists the canvas items which don't
+    belong to a gate but aren't orphaned either"""
+    types = {}
+    for gate in gates:
+        func = gate.get_func()
+        name = gate_info_repo[func]["name"] if func in gate_info_repo.keys() else func.__name__
+        gate_bytes, connection_bytes = gate_memory(gate)
+        memory = types.get(name, TypeMemory(0, 0, 0, 0))
+        types[name] = TypeMemory(memory.gates + 1, memory.gate_bytes + gate_bytes,
+                                 memory.connection_bytes + connection_bytes,
+                                 memory.canvas_items + len(gate.canvas_items()) + len(gate.output_line_ids))
+    images, image_bytes = image_memory(root)
+    traced_bytes, peak_bytes = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+    return MemoryReport(types, images, image_bytes, canvas_census(canvas), orphan_items(canvas, gates, owned),
+                        clock_threads(), count_widgets(root), traced_bytes, peak_bytes)
+
+
+def leak_counts(canvas: Canvas, root: Misc) -> (int, int, int, int):
+    return len(canvas.find_all()), image_memory(root)[0], count_widgets(root), threading.active_count()
+
+
+def leak_check(exercise: Callable[[], None], canvas: Canvas, root: Misc) -> LeakReport:
+    """Runs exercise twice and reports what the second run left behind"""
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    with tracing():
+        exercise()
+        gc.collect()
+        before = tracemalloc.take_snapshot().filter_traces(ignored)
+        counts = leak_counts(canvas, root)
+
+        exercise()
+        gc.collect()
+        after = tracemalloc.take_snapshot().filter_traces(ignored)
+    differences = after.compare_to(before, "lineno")
+    growth = [stat for stat in differences if stat.size_diff > 0]
+    return LeakReport(sum(stat.size_diff for stat in differences),
+                      *(new - old for new, old in zip(leak_counts(canvas, root), counts)),
+                      [str(stat) for stat in growth[:top_growth]])
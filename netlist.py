@@ -0,0 +1,230 @@
+########################################################################################################################
+# File: netlist.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Compiled, id indexed form of a circuit used for simulation. Gates are numbered 0..n-1 and their
+#              connections are stored in flat arrays, so the whole circuit can be checked for cycles with one
+#              topological sort and evaluated with one pass, without touching any Tk objects. Custom chips are
+#              flattened into their gates here, so everything that simulates a netlist only ever sees primitive gates.
+#              Circuits read from files are checked for connections the editor would refuse to make.
+########################################################################################################################
+from array import array
+
+from logic_gate import *
+
+
+def check_connections(funcs: Sequence[Callable], states: Sequence[int], inputs: Sequence[Sequence[int]]) -> None:
+    """Raises ValueError if a gate has a connection connect_gates would refuse: NOT and output gates take at most one
+    input, clocks none, output gates drive nothing, a chip takes at most one input per input pin and only drives its
+    own pins, and each pin is driven by a chip which has the output it reads"""
+    for gate, func in enumerate(funcs):
+        in_ids = list(dict.fromkeys(inputs[gate]))
+        name = func.__name__
+        if any(in_id < 0 or in_id >= len(funcs) for in_id in in_ids):
+            log_msg(ERROR, "Gate {0} ({1}) is connected to a gate which doesn't exist".format(gate, name), ValueError)
+        limit = 1 if func in (logic_not, output) else 0 if func == logic_clock else \
+            func.num_inputs if isinstance(func, ChipDefinition) else None
+        if limit is not None and len(in_ids) > limit:
+            log_msg(ERROR, "Gate {0} ({1}) has {2} inputs, it takes at most {3}".format(gate, name, len(in_ids), limit),
+                    ValueError)
+        if func == chip_pin and (len(in_ids) != 1 or not isinstance(funcs[in_ids[0]], ChipDefinition)
+                                 or not 0 <= states[gate] < funcs[in_ids[0]].num_outputs):
+            log_msg(ERROR, "Chip pin {0} isn't driven by a chip with output {1}".format(gate, states[gate]), ValueError)
+        for in_id in in_ids:
+            if funcs[in_id] == output or (isinstance(funcs[in_id], ChipDefinition) and func != chip_pin):
+                log_msg(ERROR, "Gate {0} ({1}) can't drive gate {2} ({3})".format(in_id, funcs[in_id].__name__, gate,
+                                                                                   name), ValueError)
+
+
+class Netlist:
+    """Gate i computes funcs[i] over the values of fanin[fanin_start[i]:fanin_start[i + 1]]. Gates without inputs
+    keep the value they were given in states.
+
+    The gates of each custom chip are appended after the gates that were passed in, starting at chip_bases[chip]. The
+    chip itself is left without inputs, its input pins read the chip's inputs and its chip_pin gates read the chip's
+    outputs. The state of a chip_pin gate is the index of the output it is mapped to"""
+
+    def __init__(self, funcs: list[Callable], states: list[int], inputs: Sequence[Sequence[int]],
+                 labels: Optional[list[str]] = None):
+        self.funcs = list(funcs)
+        self.gate_count = len(self.funcs)  # Number of gates before the chips were flattened
+        self.labels = list(labels) if labels is not None else [""] * self.gate_count
+        self.values = [int(state) for state in states]
+        self.chip_bases = {}  # Chip gate -> id of the first of its flattened gates
+        inputs = self.flatten_chips(inputs)
+        self.size = len(self.funcs)
+
+        # Inputs of every gate, each connection is added once even if it is listed twice
+        self.fanin_start = array('l', [0])
+        self.fanin = array('l')
+        for in_ids in inputs:
+            seen = set()
+            for in_id in in_ids:
+                if in_id not in seen:
+                    seen.add(in_id)
+                    self.fanin.append(in_id)
+            self.fanin_start.append(len(self.fanin))
+
+        # Outputs of every gate, built from the inputs with a counting sort so that it is linear
+        counts = [0] * (self.size + 1)
+        for in_id in self.fanin:
+            counts[in_id + 1] += 1
+        for i in range(self.size):
+            counts[i + 1] += counts[i]
+        self.fanout_start = array('l', counts)
+        self.fanout = array('l', bytes(len(self.fanin) * self.fanin.itemsize))
+        fill = list(counts)
+        for gate in range(self.size):
+            for in_id in self.inputs_of(gate):
+                self.fanout[fill[in_id]] = gate
+                fill[in_id] += 1
+
+        self.order = self.topological_order()
+
+    def flatten_chips(self, inputs: Sequence[Sequence[int]]) -> list[Sequence[int]]:
+        """Appends the gates of every chip and rewires the chips' pins onto them, returns the new inputs"""
+        inputs = list(inputs)
+        for chip in range(self.gate_count):
+            definition = self.funcs[chip]
+            if not isinstance(definition, ChipDefinition):
+                continue
+            base = len(self.funcs)
+            self.chip_bases[chip] = base
+            chip_netlist = definition.netlist
+            self.funcs.extend(chip_netlist.funcs)
+            self.values.extend(definition.initial_values)
+            self.labels.extend(chip_netlist.labels)
+            inputs.extend([base + in_id for in_id in chip_netlist.inputs_of(gate)] for gate in range(len(chip_netlist)))
+            for pin, gate in enumerate(definition.input_nodes):  # Input pins pass the chip's inputs through
+                self.funcs[base + gate] = output
+                inputs[base + gate] = list(inputs[chip][pin:pin + 1])
+            inputs[chip] = []
+            self.values[chip] = NULL
+
+        for pin in range(self.gate_count):
+            if self.funcs[pin] == chip_pin:
+                if len(inputs[pin]) == 1 and inputs[pin][0] in self.chip_bases:
+                    chip = inputs[pin][0]
+                    inputs[pin] = [self.chip_bases[chip] + self.funcs[chip].output_nodes[self.values[pin]]]
+                else:
+                    inputs[pin] = []
+                self.values[pin] = NULL
+        return inputs
+
+    @classmethod
+    def from_snapshot(cls, snapshot, gate_info_repo):
+        """Compiles a circuit_io.CircuitSnapshot or BinaryCircuit, function names are resolved through gate_info_repo.
+        Only the columns needed are read, so the gate records of a mapped file aren't decoded. Raises ValueError if
+        the circuit has a connection the editor wouldn't make"""
+        funcs, states = [gate_info_repo[name] for name in snapshot.all_func_names()], snapshot.all_states()
+        check_connections(funcs, states, snapshot.inputs)
+        return cls(funcs, states, snapshot.inputs, snapshot.all_labels())
+
+    @classmethod
+    def from_gates(cls, gates: list[InputTk]):
+        """Compiles placed gates, gate i of the netlist is gates[i]"""
+        ids = {gate: idx for idx, gate in enumerate(gates)}
+        return cls([gate.get_func() for gate in gates],
+                   [gate.pin_index if is_chip_pin(gate) else gate.out for gate in gates],
+                   [[ids[in_gate] for in_gate in gate.get_input_gates()] for gate in gates],
+                   [gate.get_label() for gate in gates])
+
+    def inputs_of(self, gate: int) -> array:
+        return self.fanin[self.fanin_start[gate]:self.fanin_start[gate + 1]]
+
+    def outputs_of(self, gate: int) -> array:
+        return self.fanout[self.fanout_start[gate]:self.fanout_start[gate + 1]]
+
+    def topological_order(self) -> array:
+        """Orders the gates so every gate comes after its inputs, raises ValueError if the circuit has a cycle"""
+        in_degree = [self.fanin_start[i + 1] - self.fanin_start[i] for i in range(self.size)]
+        order = array('l', [i for i in range(self.size) if in_degree[i] == 0])
+        head = 0
+        while head < len(order):
+            gate = order[head]
+            head += 1
+            for out_id in self.outputs_of(gate):
+                in_degree[out_id] -= 1
+                if in_degree[out_id] == 0:
+                    order.append(out_id)
+
+        if len(order) != self.size:
+            log_msg(ERROR, "Circuit contains a cycle, {0} gates could not be ordered".format(self.size - len(order)),
+                    ValueError)
+        return order
+
+    def evaluate(self) -> list[int]:
+        """Evaluates every gate once in topological order and returns the values"""
+        values, funcs, fanin, fanin_start = self.values, self.funcs, self.fanin, self.fanin_start
+        for gate in self.order:
+            start, end = fanin_start[gate], fanin_start[gate + 1]
+            if start != end:
+                values[gate] = funcs[gate]([values[in_id] for in_id in fanin[start:end]])
+        return values
+
+    def gates_of(self, func: Callable) -> list[int]:
+        """Returns the ids of every gate with the logic function func"""
+        return [i for i in range(self.size) if self.funcs[i] == func]
+
+    def __len__(self):
+        return self.size
+
+
+class ChipDefinition:
+    """Compiled definition of a custom chip, shared by every instance of the chip. Input pin i drives input_nodes[i]
+    of netlist and output pin i reads output_nodes[i]. Instances only keep their own array of gate values"""
+
+    def __init__(self, name: str, netlist: Netlist, input_nodes: list[int], output_nodes: list[int],
+                 file_name: str = ""):
+        self.__name__ = name  # Gate types are saved and looked up by name
+        self.netlist = netlist
+        self.input_nodes = input_nodes
+        self.output_nodes = output_nodes
+        self.input_labels = [netlist.labels[gate] for gate in input_nodes]
+        self.output_labels = [netlist.labels[gate] for gate in output_nodes]
+        self.file_name = file_name
+
+        # Values of an instance with nothing connected to it
+        self.initial_values = array('b', netlist.values)
+        self.evaluate(self.initial_values, [])
+
+    @classmethod
+    def from_snapshot(cls, name: str, snapshot, gate_info_repo, file_name: str = ""):
+        """Compiles a circuit into a chip. Its power gates become the input pins and its output gates the output
+        pins, both ordered top to bottom as they were placed"""
+        netlist = Netlist.from_snapshot(snapshot, gate_info_repo)  # Raises if the circuit has a cycle
+        records = snapshot.gates
+
+        def pins(func: Callable) -> list[int]:
+            gates = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] == func]
+            return sorted(gates, key=lambda gate: (records[gate].y, records[gate].x))
+
+        return cls(name, netlist, pins(power), pins(output), file_name)
+
+    @property
+    def num_inputs(self) -> int:
+        return len(self.input_nodes)
+
+    @property
+    def num_outputs(self) -> int:
+        return len(self.output_nodes)
+
+    def evaluate(self, values: array, in_values: list[int]) -> array:
+        """Evaluates one instance in place, values are the instance's gate values and in_values the values on its
+        input pins. Unconnected pins are NULL"""
+        for pin, gate in enumerate(self.input_nodes):
+            values[gate] = in_values[pin] if pin < len(in_values) else NULL
+
+        funcs, fanin, fanin_start = self.netlist.funcs, self.netlist.fanin, self.netlist.fanin_start
+        for gate in self.netlist.order:
+            start, end = fanin_start[gate], fanin_start[gate + 1]
+            if start != end:
+                values[gate] = funcs[gate]([values[in_id] for in_id in fanin[start:end]])
+        return values
+
+    def __call__(self, in_values: list[int]) -> int:
+        """Returns the value of the first output pin for in_values"""
+        if self.num_outputs == 0:
+            return NULL
+        return self.evaluate(array('b', self.initial_values), in_values)[self.output_nodes[0]]
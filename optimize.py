@@ -0,0 +1,218 @@
+########################################################################################################################
+# File: optimize.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Optimisation pass over a compiled netlist, the drawn circuit is never touched. The netlist is rebuilt in
+#              one pass in topological order: gates whose inputs are all constant are folded, double inversions and
+#              buffers are bypassed, structurally identical gates are merged through a hash table, then everything
+#              outside the cone of an output gate is dropped.
+#
+#              Free sources are the power and clock gates whose value may change, every other gate without inputs is a
+#              constant. Free sources are assumed to only ever carry TRUE or FALSE, so once the NULL constants have
+#              been folded away an optimised netlist gives the same value on every kept gate as the original.
+########################################################################################################################
+from time import perf_counter
+
+from netlist import *
+
+# Gates which pass their only input through
+passthrough_funcs = (output, chip_pin)
+
+
+class OptimizationReport(NamedTuple):
+    gates_before: int
+    gates_after: int
+    folded: int  # Gates replaced by a constant
+    bypassed: int  # Double inversions and buffers bypassed
+    merged: int  # Gates merged into a structurally identical gate
+    pruned: int  # Gates outside the cone of every output
+    eval_before: float  # Seconds per evaluation of the whole netlist
+    eval_after: float
+
+    def summary(self) -> str:
+        reduction = 1 - self.gates_after / self.gates_before if self.gates_before > 0 else 0
+        speedup = self.eval_before / self.eval_after if self.eval_after > 0 else 1
+        return "{0} -> {1} gates ({2:.1%} fewer: {3} folded, {4} inversions and buffers bypassed, {5} merged, " \
+               "{6} pruned). Evaluation {7:.3f}ms -> {8:.3f}ms ({9:.2f}x)" \
+            .format(self.gates_before, self.gates_after, reduction, self.folded, self.bypassed, self.merged,
+                    self.pruned, self.eval_before * 1000, self.eval_after * 1000, speedup)
+
+
+class NetlistOptimizer:
+    """Builds the optimised netlist node by node. Nodes are hash consed on (function, inputs) and constants are nodes
+    without inputs, one per value"""
+
+    def __init__(self):
+        self.funcs = []
+        self.states = []
+        self.inputs = []
+        self.labels = []
+        self.nodes = {}  # (func, inputs) -> node
+        self.constants = {}  # Node -> value, for every constant node
+        self.not_of = {}  # Not node -> its input
+        self.folded = self.bypassed = self.merged = 0
+
+    def add_node(self, func: Callable, inputs: tuple[int, ...], state: int = NULL, label: str = "") -> int:
+        self.funcs.append(func)
+        self.states.append(state)
+        self.inputs.append(inputs)
+        self.labels.append(label)
+        return len(self.funcs) - 1
+
+    def constant(self, value: int) -> int:
+        key = (power, (), value)
+        if key not in self.nodes:
+            self.nodes[key] = self.add_node(power, (), value, "const" + str(value))
+            self.constants[self.nodes[key]] = value
+        return self.nodes[key]
+
+    def fold(self, value: int) -> int:
+        self.folded += 1
+        return self.constant(value)
+
+    def gate(self, func: Callable, inputs: tuple[int, ...], label: str) -> int:
+        """Returns the node computing func over inputs, reusing an identical node if there is one"""
+        key = (func, inputs)
+        if key in self.nodes:
+            self.merged += 1
+            return self.nodes[key]
+        node = self.nodes[key] = self.add_node(func, inputs, NULL, label)
+        if func == logic_not:
+            self.not_of[node] = inputs[0]
+        return node
+
+    def invert(self, node: int, label: str) -> int:
+        if node in self.constants:
+            return self.fold(logic_not([self.constants[node]]))
+        if node in self.not_of:
+            self.bypassed += 1
+            return self.not_of[node]
+        return self.gate(logic_not, (node,), label)
+
+    def simplify(self, func: Callable, inputs: list[int], label: str) -> int:
+        """Returns the node for a gate with inputs, which are nodes and at least as many as func needs"""
+        if func == logic_not:
+            return self.invert(inputs[0], label)
+        if func in (logic_and, logic_nand, logic_or):
+            # 0 controls and gates and 1 controls or gates, the other constant can be dropped
+            control = FALSE if func in (logic_and, logic_nand) else TRUE
+            kept = []
+            for node in dict.fromkeys(inputs):
+                if node in self.constants:
+                    if self.constants[node] == control:
+                        kept = None
+                        break
+                elif self.not_of.get(node) in inputs:  # x and not x, or x or not x
+                    kept = None
+                    break
+                else:
+                    kept.append(node)
+
+            if kept is None:
+                self.folded += 1
+                result = self.constant(control)
+            elif len(kept) == 0:
+                self.folded += 1
+                result = self.constant(int(not control))
+            elif len(kept) == 1:
+                self.bypassed += 1
+                result = kept[0]
+            else:
+                result = self.gate(logic_and if func == logic_nand else func, tuple(sorted(kept)), label)
+            return self.invert(result, label) if func == logic_nand else result
+        if func == logic_xor:
+            # Xor gates are TRUE unless all of their inputs are equal, so the order and repeats of inputs don't matter
+            kept = sorted(dict.fromkeys(inputs))
+            values = {self.constants[node] for node in kept if node in self.constants}
+            if len(values) > 1:
+                return self.fold(TRUE)
+            if len(kept) == 1:
+                return self.fold(FALSE)
+            if len(kept) == 2 and len(values) == 1:  # One constant, which either passes or inverts the other input
+                node = kept[0] if kept[1] in self.constants else kept[1]
+                if values == {FALSE}:
+                    self.bypassed += 1
+                    return node
+                return self.invert(node, label)
+            return self.gate(logic_xor, tuple(kept), label)
+        return self.gate(func, tuple(inputs), label)  # Unknown gates are only merged
+
+
+def min_inputs(func: Callable) -> int:
+    """Fewest inputs a gate needs to output anything but NULL"""
+    return 2 if func in (logic_and, logic_nand, logic_or, logic_xor) else 1
+
+
+def evaluation_time(netlist: Netlist, repeat: int) -> float:
+    """Best time of repeat evaluations of netlist, 0 if repeat is 0"""
+    best = 0.0
+    for run in range(repeat):
+        start = perf_counter()
+        netlist.evaluate()
+        best = perf_counter() - start if run == 0 else min(best, perf_counter() - start)
+    return best
+
+
+def optimize_netlist(netlist: Netlist, free: Optional[Iterable[int]] = None, keep: Iterable[int] = (),
+                     repeat: int = 0) -> (Netlist, list[int], OptimizationReport):
+    """Returns an optimised copy of netlist, the id in it of every gate of netlist (NULL for gates which were
+    removed) and a report. A gate which was folded, bypassed or merged maps to the gate that now computes its value.
+
+    free are the ids of the sources whose value may change, by default every power and clock gate. The top level output
+    gates and the gates in keep are the outputs of the circuit, they and the free sources are never removed. Outputs are
+    kept as output gates of their own, free sources as themselves, so their values can be set in the optimised
+    netlist. Both netlists are evaluated repeat times to time them for the report"""
+    values = netlist.values
+    if free is None:
+        free = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] in (power, logic_clock)]
+    free = set(free)
+    roots = set(keep)
+    roots.update(gate for gate in range(netlist.gate_count) if netlist.funcs[gate] == output)
+
+    optimizer = NetlistOptimizer()
+    node_of = [NULL] * netlist.size  # Node computing the value of each gate
+    kept_as = {}  # Output gate -> the node it is kept as
+    for gate in netlist.order:
+        func, label = netlist.funcs[gate], netlist.labels[gate]
+        in_ids = netlist.inputs_of(gate)
+        inputs = [node_of[in_id] for in_id in in_ids]
+
+        if gate in free:
+            node = optimizer.add_node(func, (), values[gate], label)
+        elif len(in_ids) == 0:  # Gates without inputs keep their value
+            node = optimizer.constant(values[gate])
+        elif any(optimizer.constants.get(node) == NULL for node in inputs) or len(in_ids) < min_inputs(func):
+            node = optimizer.fold(NULL)  # Every gate outputs NULL if it is missing or has a NULL input
+        elif all(node in optimizer.constants for node in inputs):
+            node = optimizer.fold(func([optimizer.constants[node] for node in inputs]))
+        elif func in passthrough_funcs:
+            optimizer.bypassed += 1
+            node = inputs[0]
+        else:
+            node = optimizer.simplify(func, inputs, label)
+
+        node_of[gate] = node
+        if gate in roots and gate not in free:  # Outputs are kept as gates of their own, reading their value
+            kept_as[gate] = optimizer.add_node(output, (node,), NULL, label)
+
+    # Keep only the cone of the outputs, then renumber the nodes which are left
+    live = [False] * len(optimizer.funcs)
+    stack = list(kept_as.values()) + [node_of[gate] for gate in free]
+    while stack:
+        node = stack.pop()
+        if not live[node]:
+            live[node] = True
+            stack.extend(optimizer.inputs[node])
+    ids = [node for node in range(len(optimizer.funcs)) if live[node]]
+    new_id = [NULL] * len(optimizer.funcs)
+    for idx, node in enumerate(ids):
+        new_id[node] = idx
+    optimized = Netlist([optimizer.funcs[node] for node in ids], [optimizer.states[node] for node in ids],
+                        [[new_id[in_node] for in_node in optimizer.inputs[node]] for node in ids],
+                        [optimizer.labels[node] for node in ids])
+
+    report = OptimizationReport(netlist.size, optimized.size, optimizer.folded, optimizer.bypassed, optimizer.merged,
+                                sum(1 for node in node_of if not live[node]),
+                                evaluation_time(netlist, repeat), evaluation_time(optimized, repeat))
+    return optimized, [new_id[kept_as.get(gate, node)] for gate, node in enumerate(node_of)], report
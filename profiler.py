@@ -0,0 +1,128 @@
+########################################################################################################################
+# File: profiler.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Opt-in profiling of gate evaluation on the board. While a GateProfiler is set as InputTk.profiler, the
+#              propagation loops hand each gate to it instead of evaluating and recoloring the gate themselves, and it
+#              counts the calls and the time spent in each. Without one the loops only pay for a None check. Runs of
+#              the compiled board function evaluate every gate in one call, so they are timed as a whole.
+#
+#              Results can be written as CSV, or as a pstats dump, one entry for the evaluations of each gate and one
+#              for its recolors, which pstats.Stats and viewers like snakeviz can read.
+########################################################################################################################
+import csv
+import marshal
+
+from logic_gate import *
+
+
+class GateProfile(NamedTuple):
+    uid: int
+    label: str
+    gate_type: str
+    evaluations: int
+    evaluate_seconds: float
+    recolors: int
+    recolor_seconds: float
+
+    def seconds(self) -> float:
+        return self.evaluate_seconds + self.recolor_seconds
+
+
+profile_columns = GateProfile._fields + ("seconds",)
+
+
+class GateProfiler:
+    def __init__(self):
+        self.gates = {}  # Uid -> profiled gate
+        self.counts = {}  # Uid -> [evaluations, evaluation seconds, recolors, recolor seconds]
+        self.compiled_runs = 0
+        self.compiled_seconds = 0.0
+        self.start = perf_counter()
+
+    def gate_counts(self, gate: InputTk) -> list:
+        counts = self.counts.get(gate.uid)
+        if counts is None:
+            counts = self.counts[gate.uid] = [0, 0.0, 0, 0.0]
+            self.gates[gate.uid] = gate
+        return counts
+
+    def evaluate(self, gate: InputTk, evaluate: Callable[[], int]) -> int:
+        """Calls evaluate, gate.evaluate or gate.output, and times it against gate. The time of gate.output includes
+        re-evaluating the gate's input cone"""
+        start = perf_counter()
+        value = evaluate()
+        elapsed = perf_counter() - start
+        counts = self.gate_counts(gate)
+        counts[0] += 1
+        counts[1] += elapsed
+        return value
+
+    def color_lines(self, gate: InputTk, value: int) -> None:
+        start = perf_counter()
+        gate.color_lines(value)
+        elapsed = perf_counter() - start
+        counts = self.gate_counts(gate)
+        counts[2] += 1
+        counts[3] += elapsed
+
+    def propagate_gate(self, gate: InputTk) -> None:
+        self.color_lines(gate, self.evaluate(gate, gate.evaluate))
+
+    def compiled_run(self, seconds: float) -> None:
+        self.compiled_runs += 1
+        self.compiled_seconds += seconds
+
+    def profiles(self, gate_info_repo: GatesInfoRepo) -> list[GateProfile]:
+        """Profile of every gate evaluated or recolored so far, slowest first"""
+        profiles = []
+        for uid, (evaluations, evaluate_seconds, recolors, recolor_seconds) in self.counts.items():
+            gate = self.gates[uid]
+            gate_type = gate_info_repo[gate.get_func()]["name"] if gate.get_func() in gate_info_repo.keys() \
+                else gate.get_func().__name__
+            profiles.append(GateProfile(uid, gate.get_label(), gate_type, evaluations, evaluate_seconds, recolors,
+                                        recolor_seconds))
+        return sorted(profiles, key=GateProfile.seconds, reverse=True)
+
+    def type_profiles(self, gate_info_repo: GatesInfoRepo) -> list[GateProfile]:
+        """Profiles summed over each gate type of gate_info_repo, their uid is the number of gates profiled"""
+        totals = {}
+        for profile in self.profiles(gate_info_repo):
+            total = totals.get(profile.gate_type)
+            totals[profile.gate_type] = profile._replace(uid=1, label="") if total is None else \
+                total._replace(uid=total.uid + 1, evaluations=total.evaluations + profile.evaluations,
+                               evaluate_seconds=total.evaluate_seconds + profile.evaluate_seconds,
+                               recolors=total.recolors + profile.recolors,
+                               recolor_seconds=total.recolor_seconds + profile.recolor_seconds)
+        return sorted(totals.values(), key=GateProfile.seconds, reverse=True)
+
+    def write_csv(self, file_name: str, gate_info_repo: GatesInfoRepo) -> None:
+        with open(file_name, 'w', newline='', encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(profile_columns)
+            for profile in self.profiles(gate_info_repo):
+                writer.writerow(tuple(profile) + (profile.seconds(),))
+
+    def write_pstats(self, file_name: str, gate_info_repo: GatesInfoRepo) -> None:
+        """Writes the profiles in the marshalled format of cProfile, keyed (gate type, uid, what was timed). Gates
+        don't call each other, so every entry is its own root without callers"""
+        stats = {}
+        for profile in self.profiles(gate_info_repo):
+            name = " " + profile.label if profile.label != "" else ""
+            stats[(profile.gate_type, profile.uid, "evaluate" + name)] = \
+                (profile.evaluations, profile.evaluations, profile.evaluate_seconds, profile.evaluate_seconds, {})
+            stats[(profile.gate_type, profile.uid, "color_lines" + name)] = \
+                (profile.recolors, profile.recolors, profile.recolor_seconds, profile.recolor_seconds, {})
+        if self.compiled_runs > 0:
+            stats[("compiled", 0, "evaluate board")] = \
+                (self.compiled_runs, self.compiled_runs, self.compiled_seconds, self.compiled_seconds, {})
+        with open(file_name, 'wb') as stats_file:
+            marshal.dump(stats, stats_file)
+
+    def summary(self) -> str:
+        evaluations = sum(counts[0] for counts in self.counts.values())
+        seconds = sum(counts[1] + counts[3] for counts in self.counts.values())
+        return "{0} gates evaluated {1} times in {2:.3f}s over {3:.1f}s of profiling, {4} compiled runs in {5:.3f}s" \
+            .format(len(self.counts), evaluations, seconds, perf_counter() - self.start, self.compiled_runs,
+                    self.compiled_seconds)
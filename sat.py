@@ -0,0 +1,357 @@
+########################################################################################################################
+# File: sat.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Finds values for a circuit's power and clock gates which drive chosen gates to chosen values. The cone
+#              of the chosen gates is Tseitin encoded into clauses, one variable per gate, and handed to a small CDCL
+#              solver: two watched literals per clause, first UIP clause learning with non-chronological backjumping,
+#              activity ordered decisions with phase saving, and Luby restarts.
+#
+#              Literals are DIMACS style outside of the solver, variable v is v and its negation -v. Inside, literal
+#              2 * v is v and 2 * v + 1 is its negation, so a literal's negation is literal ^ 1.
+########################################################################################################################
+import heapq
+from time import perf_counter
+
+from optimize import *
+
+
+def luby(index: int) -> int:
+    """The index'th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    size, power_of_two = 1, 1
+    while size < index + 1:
+        size, power_of_two = 2 * size + 1, 2 * power_of_two
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power_of_two >>= 1
+        index %= size
+    return power_of_two
+
+
+class SatSolver:
+    restart_base = 100  # Conflicts before the first restart, scaled by the Luby sequence
+    activity_decay = 0.95
+
+    def __init__(self, num_vars: int = 0):
+        self.num_vars = 0
+        self.values = [NULL]  # Value of each variable, NULL while unassigned. Variable 0 is unused
+        self.levels = [0]  # Decision level each variable was assigned at
+        self.reasons = [None]  # Clause which implied each variable, None for decisions
+        self.phases = [FALSE]  # Last value of each variable, decisions reuse it
+        self.activity = [0.0]
+        self.watches = [[], []]  # Literal -> clauses watching it, the clause's first two literals are watched
+        self.clauses = []  # Problem clauses followed by learnt clauses, each a list of literals
+        self.trail = []  # Assigned literals, in order
+        self.trail_limits = []  # Length of the trail at the start of each decision level
+        self.queue_head = 0  # Next literal on the trail to propagate
+        self.heap = []  # (-activity, variable), stale entries are skipped
+        self.bump = 1.0
+        self.unsatisfiable = False
+        self.conflicts = self.decisions = self.propagations = 0
+        self.add_vars(num_vars)
+
+    def add_vars(self, count: int) -> int:
+        """Adds count variables and returns the first one"""
+        first = self.num_vars + 1
+        for var in range(first, first + count):
+            self.values.append(NULL)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.phases.append(FALSE)
+            self.activity.append(0.0)
+            self.watches.extend(([], []))
+            heapq.heappush(self.heap, (0.0, var))
+        self.num_vars += count
+        return first
+
+    def lit_value(self, lit: int) -> int:
+        value = self.values[lit >> 1]
+        return value if value == NULL else value ^ (lit & 1)
+
+    def add_clause(self, lits: Iterable[int]) -> None:
+        """Adds a clause of DIMACS literals, must be called before solve"""
+        clause = []
+        for lit in dict.fromkeys(2 * lit if lit > 0 else -2 * lit + 1 for lit in lits):
+            if lit ^ 1 in clause:  # Always satisfied
+                return
+            if self.lit_value(lit) == TRUE:
+                return
+            if self.lit_value(lit) == NULL:
+                clause.append(lit)
+
+        if len(clause) == 0:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.clauses.append(clause)
+            self.watches[clause[0]].append(len(self.clauses) - 1)
+            self.watches[clause[1]].append(len(self.clauses) - 1)
+
+    def assign(self, lit: int, reason: Optional[int]) -> None:
+        var = lit >> 1
+        self.values[var] = TRUE ^ (lit & 1)
+        self.levels[var] = len(self.trail_limits)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self) -> Optional[int]:
+        """Assigns every literal implied by the trail, returns a clause which became false or None"""
+        values, clauses, watches, trail = self.values, self.clauses, self.watches, self.trail
+        while self.queue_head < len(trail):
+            false_lit = trail[self.queue_head] ^ 1
+            self.queue_head += 1
+            self.propagations += 1
+            watching = watches[false_lit]
+            kept = []
+            for idx, clause_id in enumerate(watching):
+                clause = clauses[clause_id]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = values[first >> 1]
+                if first_value != NULL and first_value ^ (first & 1) == TRUE:
+                    kept.append(clause_id)
+                    continue
+                for k in range(2, len(clause)):  # Look for another literal which isn't false to watch
+                    value = values[clause[k] >> 1]
+                    if value == NULL or value ^ (clause[k] & 1) == TRUE:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(clause_id)
+                        break
+                else:
+                    kept.append(clause_id)
+                    if first_value != NULL:  # Every literal is false
+                        kept.extend(watching[idx + 1:])
+                        watches[false_lit] = kept
+                        return clause_id
+                    self.assign(first, clause_id)
+            watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict: int) -> (list[int], int):
+        """Learns the first UIP clause of a conflict, returns it with the asserting literal first and the level to
+        backjump to"""
+        seen = [False] * (self.num_vars + 1)
+        learnt = [0]
+        level = len(self.trail_limits)
+        pending = 0  # Literals of the current level still to be resolved
+        index = len(self.trail) - 1
+        lit = None
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if lit is None else clause[1:]):
+                var = other >> 1
+                if not seen[var] and self.levels[var] > 0:
+                    seen[var] = True
+                    self.bump_var(var)
+                    if self.levels[var] == level:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            while not seen[self.trail[index] >> 1]:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen[lit >> 1] = False
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[lit >> 1]]
+        learnt[0] = lit ^ 1
+
+        backjump = 0
+        if len(learnt) > 1:  # The literal with the highest level below the conflict is watched second
+            deepest = max(range(1, len(learnt)), key=lambda k: self.levels[learnt[k] >> 1])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            backjump = self.levels[learnt[1] >> 1]
+        return learnt, backjump
+
+    def bump_var(self, var: int) -> None:
+        self.activity[var] += self.bump
+        if self.activity[var] > 1e100:  # Rescale everything before the activities overflow
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.bump *= 1e-100
+            self.heap = [(-self.activity[other], other) for other in range(1, self.num_vars + 1)
+                         if self.values[other] == NULL]
+            heapq.heapify(self.heap)
+        elif self.values[var] == NULL:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def backtrack(self, level: int) -> None:
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for lit in self.trail[limit:]:
+            var = lit >> 1
+            self.phases[var] = self.values[var]
+            self.values[var] = NULL
+            self.reasons[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.queue_head = limit
+
+    def pick_branch(self) -> Optional[int]:
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.values[var] == NULL:
+                return 2 * var + (1 if self.phases[var] == FALSE else 0)
+        return None
+
+    def solve(self, assumptions: Iterable[int] = ()) -> Optional[list[int]]:
+        """Returns the value of every variable, indexed by variable, or None if the clauses can't be satisfied under
+        the assumptions"""
+        if self.unsatisfiable:
+            return None
+        assumptions = [2 * lit if lit > 0 else -2 * lit + 1 for lit in assumptions]
+        restarts = 0
+        restart_at = self.conflicts + self.restart_base * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if len(self.trail_limits) == 0:
+                    self.unsatisfiable = True
+                    return None
+                learnt, backjump = self.analyze(conflict)
+                self.backtrack(backjump)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.clauses.append(learnt)
+                    self.watches[learnt[0]].append(len(self.clauses) - 1)
+                    self.watches[learnt[1]].append(len(self.clauses) - 1)
+                    self.assign(learnt[0], len(self.clauses) - 1)
+                self.bump /= self.activity_decay
+                continue
+
+            if self.conflicts >= restart_at:
+                restarts += 1
+                restart_at = self.conflicts + self.restart_base * luby(restarts)
+                self.backtrack(0)
+
+            # Assumptions are decided first, one level each
+            lit = None
+            while len(self.trail_limits) < len(assumptions):
+                assumption = assumptions[len(self.trail_limits)]
+                value = self.lit_value(assumption)
+                if value == FALSE:
+                    self.backtrack(0)
+                    return None
+                self.trail_limits.append(len(self.trail))
+                if value == NULL:
+                    lit = assumption
+                    break
+            if lit is None:
+                lit = self.pick_branch()
+                if lit is None:
+                    model = list(self.values)
+                    self.backtrack(0)
+                    return model
+                self.trail_limits.append(len(self.trail))
+                self.decisions += 1
+            self.assign(lit, None)
+
+
+class SatResult(NamedTuple):
+    satisfiable: bool
+    assignment: dict[int, int]  # Value of each free source gate of the netlist, by id, empty if unsatisfiable
+    variables: int
+    clauses: int
+    conflicts: int
+    decisions: int
+    encode_time: float  # Seconds
+    solve_time: float
+
+    def summary(self) -> str:
+        return "{0} in {1:.3f}s ({2} variables, {3} clauses, {4} conflicts, {5} decisions, encoded in {6:.3f}s)" \
+            .format("Satisfiable" if self.satisfiable else "Unsatisfiable", self.solve_time, self.variables,
+                    self.clauses, self.conflicts, self.decisions, self.encode_time)
+
+
+def encode_gate(solver: SatSolver, func: Callable, out: int, ins: list[int]) -> None:
+    """Adds clauses which make variable out equal func over the variables ins"""
+    if func in (logic_and, logic_nand, logic_or):
+        # out <-> and(ins), or(ins) is not and(not ins) and nand is not and
+        sign = -1 if func == logic_or else 1
+        result = out if func == logic_and else -out
+        for lit in ins:
+            solver.add_clause((-result, sign * lit))
+        solver.add_clause([result] + [-sign * lit for lit in ins])
+    elif func == logic_not:
+        solver.add_clause((out, ins[0]))
+        solver.add_clause((-out, -ins[0]))
+    elif func == logic_xor:  # TRUE unless every input is equal
+        solver.add_clause([-out] + ins)
+        solver.add_clause([-out] + [-lit for lit in ins])
+        for first, second in zip(ins, ins[1:]):
+            solver.add_clause((out, -first, second))
+            solver.add_clause((out, first, -second))
+    else:
+        log_msg(ERROR, "Gates of type " + func.__name__ + " can't be encoded", ValueError)
+
+
+def solve_for_values(netlist: Netlist, targets: dict[int, int], free: Optional[Iterable[int]] = None) -> SatResult:
+    """Looks for values of the free sources of netlist, by default its power and clock gates, which give every gate in
+    targets its value. Every other source keeps its current value. Only the cone of the targets is encoded"""
+    start = perf_counter()
+    if free is None:
+        free = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] in (power, logic_clock)]
+    free = list(free)
+    optimized, new_id, _ = optimize_netlist(netlist, free=free, keep=targets.keys())
+    free_nodes = {new_id[gate]: gate for gate in free}
+
+    solver = SatSolver()
+    var_of = {}  # Node of the optimised netlist -> variable, nodes which are always NULL have none
+    stack = [new_id[gate] for gate in targets]
+    while stack:  # Encode the cone of the targets, inputs before the gates they feed
+        node = stack[-1]
+        if node in var_of:
+            stack.pop()
+            continue
+        in_nodes = optimized.inputs_of(node)
+        missing = [in_node for in_node in in_nodes if in_node not in var_of]
+        if len(missing) > 0:
+            stack.extend(missing)
+            continue
+        stack.pop()
+
+        func, ins = optimized.funcs[node], [var_of[in_node] for in_node in in_nodes]
+        if node in free_nodes:
+            var_of[node] = solver.add_vars(1)
+        elif len(ins) == 0:  # Constant
+            var_of[node] = None if optimized.values[node] == NULL else solver.add_vars(1)
+            if var_of[node] is not None:
+                solver.add_clause([var_of[node] if optimized.values[node] == TRUE else -var_of[node]])
+        elif None in ins:
+            var_of[node] = None
+        elif func in passthrough_funcs:
+            var_of[node] = ins[0]
+        else:
+            var_of[node] = solver.add_vars(1)
+            encode_gate(solver, func, var_of[node], ins)
+
+    assumptions = []
+    for gate, value in targets.items():
+        var = var_of[new_id[gate]]
+        if var is None or value == NULL:  # A gate which is always NULL never has a value, and vice versa
+            solver.unsatisfiable = True
+        else:
+            assumptions.append(var if value == TRUE else -var)
+    encoded = perf_counter()
+
+    model = solver.solve(assumptions)
+    solved = perf_counter()
+    assignment = {}
+    if model is not None:
+        for node, gate in free_nodes.items():
+            if node in var_of:
+                assignment[gate] = model[var_of[node]]
+            else:  # Not in the cone of any target, keep its current value
+                assignment[gate] = netlist.values[gate]
+    return SatResult(model is not None, assignment, solver.num_vars, len(solver.clauses), solver.conflicts,
+                     solver.decisions, encoded - start, solved - encoded)
@@ -0,0 +1,150 @@
+########################################################################################################################
+# File: sweep.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Exhaustive input sweeps spread over every CPU core. Vector v sets input i to bit i of v. The vectors are
+#              split on their top prefix_bits bits into chunks, which a ProcessPoolExecutor hands to its workers. Each
+#              worker receives the optimised netlist once, through the pool's initializer, compiles it (see
+#              codegen.py) and evaluates its chunks a batch of vectors at a time with one bitwise operation per gate.
+#              Chunks come back as packed truth table bytes or as the vectors matching a predicate, and are merged in
+#              order.
+########################################################################################################################
+import os
+from time import perf_counter
+
+from codegen import *
+
+lane_bits = 12  # Each batch evaluates 2 ** lane_bits vectors at once
+
+sweep_state = {}  # Netlist and settings of the sweep this process works on, set by init_sweep_worker
+
+
+class SweepResult(NamedTuple):
+    inputs: list[int]  # Ids of the swept gates, input i is bit i of a vector
+    outputs: list[int]  # Ids of the observed gates
+    tables: dict[int, bytes]  # Output -> bit v is set if the output is TRUE for vector v, little endian
+    null_outputs: list[int]  # Outputs which are NULL for every vector, they have no table
+    hits: list[int]  # Vectors matching the predicate, in order
+    vectors: int
+    seconds: float
+    worker_stats: dict[int, (int, float)]  # Worker process id -> (vectors evaluated, seconds spent evaluating)
+
+    def summary(self) -> str:
+        rate = self.vectors / self.seconds if self.seconds > 0 else 0
+        workers = ", ".join("{0:.0f}/s".format(count / seconds if seconds > 0 else 0)
+                            for count, seconds in self.worker_stats.values())
+        return "Swept {0} vectors in {1:.2f}s ({2:.0f} vectors/s) on {3} workers ({4})" \
+            .format(self.vectors, self.seconds, rate, len(self.worker_stats), workers)
+
+
+def init_sweep_worker(netlist: Netlist, inputs: list[int], outputs: list[int], targets: Optional[dict[int, int]],
+                      hit_limit: int) -> None:
+    """Runs once in each worker, the netlist is not sent again with every chunk"""
+    lanes = min(lane_bits, len(inputs))
+    mask = (1 << (1 << lanes)) - 1
+    lane_words = []  # Word of the inputs which change between the lanes of a batch
+    for bit in range(lanes):
+        block = (1 << (1 << bit)) - 1  # 2 ** bit zeros followed by 2 ** bit ones, repeated
+        word = 0
+        for start in range(1 << bit, 1 << lanes, 2 << bit):
+            word |= block << start
+        lane_words.append(word)
+
+    sweep_state.update(netlist=netlist, evaluate=compile_netlist(netlist), inputs=inputs, outputs=outputs,
+                       targets=targets, hit_limit=hit_limit, lanes=lanes, mask=mask, lane_words=lane_words)
+
+
+def sweep_chunk(prefix: int, chunk_bits: int) -> (int, dict[int, bytes], list[int], int, float, int):
+    """Evaluates the 2 ** chunk_bits vectors starting at prefix << chunk_bits. Returns the prefix, the chunk of every
+    output's truth table or the matching vectors, the vectors evaluated, the seconds taken and this process's id"""
+    start = perf_counter()
+    state = sweep_state
+    netlist, inputs, outputs, targets = state["netlist"], state["inputs"], state["outputs"], state["targets"]
+    lanes, mask = state["lanes"], state["mask"]
+    evaluate = state["evaluate"]
+    words = [mask if value == TRUE else 0 for value in netlist.values]
+    first_vector = prefix << chunk_bits
+
+    batch_size = max(1, (1 << lanes) // 8)  # Bytes of a batch's word, there is only one batch if it's under a byte
+    tables = {out_id: [] for out_id in outputs}
+    hits = []
+    for lane_word, gate in zip(state["lane_words"], inputs):
+        words[gate] = lane_word
+    for batch in range(1 << (chunk_bits - lanes)):
+        vector = first_vector + (batch << lanes)
+        for bit in range(lanes, len(inputs)):
+            words[inputs[bit]] = mask if (vector >> bit) & 1 else 0
+        results = evaluate(words, mask)
+
+        if targets is None:
+            for out_id in outputs:
+                tables[out_id].append(results[out_id].to_bytes(batch_size, "little"))
+        elif len(hits) < state["hit_limit"]:
+            match = mask
+            for out_id, value in targets.items():
+                match &= results[out_id] if value == TRUE else ~results[out_id]
+            while match and len(hits) < state["hit_limit"]:
+                lane = (match & -match).bit_length() - 1
+                hits.append(vector + lane)
+                match &= match - 1
+
+    packed = {out_id: b"".join(table) for out_id, table in tables.items()} if targets is None else {}
+    return prefix, packed, hits, 1 << chunk_bits, perf_counter() - start, os.getpid()
+
+
+def sweep(netlist: Netlist, inputs: Optional[list[int]] = None, outputs: Optional[list[int]] = None,
+          targets: Optional[dict[int, int]] = None, workers: Optional[int] = None, prefix_bits: Optional[int] = None,
+          hit_limit: int = 100000) -> SweepResult:
+    """Evaluates netlist for every combination of inputs, by default its power and clock gates, and returns the truth
+    table of every gate in outputs, by default the top level output gates. If targets is given, the vectors which
+    give every gate in targets its value are returned instead of the tables, at most hit_limit of them"""
+    start = perf_counter()
+    if inputs is None:
+        inputs = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] in (power, logic_clock)]
+    if outputs is None:
+        outputs = [gate for gate in range(netlist.gate_count) if netlist.funcs[gate] == output]
+    observed = list(dict.fromkeys(itertools.chain(outputs, targets.keys() if targets is not None else ())))
+    optimized, new_id, _ = optimize_netlist(netlist, free=inputs, keep=observed)
+
+    # Outputs which are always NULL can't be TRUE or FALSE, so they have no table and match no target
+    def always_null(gate: int) -> bool:
+        if gate in inputs:
+            return False
+        node = optimized.inputs_of(new_id[gate])[0]
+        return len(optimized.inputs_of(node)) == 0 and optimized.values[node] == NULL
+
+    null_outputs = [gate for gate in observed if always_null(gate)]
+    live_outputs = [gate for gate in outputs if gate not in null_outputs]
+    if targets is not None and any(gate in null_outputs or value == NULL for gate, value in targets.items()):
+        return SweepResult(inputs, outputs, {}, null_outputs, [], 0, perf_counter() - start, {})
+
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if prefix_bits is None:  # A few chunks per worker so they are balanced
+        prefix_bits = max(0, (4 * workers - 1).bit_length()) if workers > 1 else 0
+    prefix_bits = max(0, min(prefix_bits, len(inputs) - min(lane_bits, len(inputs))))
+    chunk_bits = len(inputs) - prefix_bits
+    init_args = (optimized, [new_id[gate] for gate in inputs], [new_id[gate] for gate in live_outputs],
+                 {new_id[gate]: value for gate, value in targets.items()} if targets is not None else None, hit_limit)
+
+    if workers == 1:
+        init_sweep_worker(*init_args)
+        chunks = [sweep_chunk(prefix, chunk_bits) for prefix in range(1 << prefix_bits)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # Slow to import, and only needed once sweeping
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_sweep_worker, initargs=init_args) as pool:
+            chunks = list(pool.map(sweep_chunk, range(1 << prefix_bits), itertools.repeat(chunk_bits)))
+
+    # Merge the chunks in order, each chunk of a table is a whole number of bytes unless there is only one
+    chunk_size = max(1, (1 << chunk_bits) // 8)
+    tables = {gate: bytearray(chunk_size << prefix_bits) for gate in live_outputs} if targets is None else {}
+    hits = []
+    worker_stats = {}
+    for prefix, packed, chunk_hits, count, seconds, pid in chunks:
+        for gate in tables:
+            tables[gate][prefix * chunk_size:(prefix + 1) * chunk_size] = packed[new_id[gate]]
+        hits.extend(chunk_hits[:hit_limit - len(hits)])
+        vectors, total = worker_stats.get(pid, (0, 0.0))
+        worker_stats[pid] = (vectors + count, total + seconds)
+    return SweepResult(inputs, outputs, {gate: bytes(table) for gate, table in tables.items()}, null_outputs, hits,
+                       1 << len(inputs), perf_counter() - start, worker_stats)
@@ -0,0 +1,60 @@
+########################################################################################################################
+# File: test_activity.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of switching activity against replaying the same random vectors one at a time through
+#              Netlist.evaluate() and counting the toggles of small random circuits.
+########################################################################################################################
+import pytest
+
+from fuzz import *
+
+turn_info_print_off()
+
+
+def replayed_counts(netlist: Netlist, count: int, bias: dict[int, float], seed: int,
+                    lanes: int) -> (list[int], list[int]):
+    """Toggles and TRUE counts of every gate, drawing the same words as random_activity"""
+    generator = random.Random(seed)
+    sources = [gate for gate, is_variable in enumerate(variable_sources(netlist)) if is_variable]
+    toggles, ones = [0] * netlist.size, [0] * netlist.size
+    last = None
+    for first in range(0, count, lanes):
+        width = min(lanes, count - first)
+        words = {gate: biased_word(generator, bias.get(gate, 0.5), width) for gate in sources}
+        for bit in range(width):
+            for gate in sources:
+                netlist.values[gate] = (words[gate] >> bit) & 1
+            values = list(netlist.evaluate())
+            for gate, value in enumerate(values):
+                ones[gate] += value == TRUE
+                toggles[gate] += last is not None and value != last[gate]
+            last = values
+    return toggles, ones
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_activity_matches_replayed_vectors(seed):
+    generator = random.Random(seed)
+    case = random_case(generator)
+    netlist = case.netlist()
+    bias = {gate: generator.choice((0.0, 0.25, 0.5, 0.875, 1.0)) for gate in case.free_sources()}
+    report = random_activity(netlist, 100, bias, seed, lanes=16)
+
+    toggles, ones = replayed_counts(case.netlist(), 100, bias, seed, 16)
+    live = [gate for gate in range(netlist.size) if not report.null[gate]]
+    assert [report.toggles[gate] for gate in live] == [toggles[gate] for gate in live]
+    assert [report.ones[gate] for gate in live] == [ones[gate] for gate in live]
+    assert all(reference_values(case, 0)[gate] == NULL for gate in range(netlist.size) if report.null[gate])
+
+
+@pytest.mark.parametrize("bias", (0.25, 0.375, 0.75))
+def test_biased_word_sets_bits_with_its_bias(bias):
+    lanes = 1 << 16
+    fraction = biased_word(random.Random(1), bias, lanes).bit_count() / lanes
+    assert abs(fraction - bias) < 0.01
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,72 @@
+########################################################################################################################
+# File: test_bdd.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the BDD engine and of equivalence checking.
+########################################################################################################################
+import pytest
+
+from bdd import *
+
+turn_info_print_off()
+
+gate_funcs = {func.__name__: func for func in (power, logic_not, logic_and, logic_nand, logic_or, output)}
+
+
+def test_sat_count_and_satisfying_agree_with_brute_force():
+    # Gate 4 is A XOR B XOR C, built from two input XORs, and gate 5 is A AND B AND C
+    netlist = Netlist([power, power, power, logic_xor, logic_xor, logic_and],
+                      [FALSE, FALSE, FALSE, NULL, NULL, NULL], [[], [], [], [0, 1], [3, 2], [0, 1, 2]])
+    bdd = BDD(3)
+    diagrams = build_output_bdds(bdd, netlist, {0: 0, 1: 1, 2: 2}, [4, 5])
+    for gate, diagram in diagrams.items():
+        expected = 0
+        for values in itertools.product((FALSE, TRUE), repeat=3):
+            netlist.values[:3] = values
+            expected += netlist.evaluate()[gate] == TRUE
+        assert bdd.sat_count(diagram) == expected
+        netlist.values[:3] = bdd.satisfying(diagram)
+        assert netlist.evaluate()[gate] == TRUE
+
+
+def test_gates_missing_inputs_have_no_diagram():
+    # AND, NAND, OR and XOR gates with one input are always NULL, they used to be given the diagram of their input
+    funcs = [power, logic_and, logic_nand, logic_or, logic_xor, logic_not]
+    netlist = Netlist(funcs, [FALSE] + [NULL] * 5, [[], [0], [0], [0], [0], [0]])
+    diagrams = build_output_bdds(BDD(1), netlist, {0: 0}, list(range(1, 6)))
+    assert [diagrams[gate] is None for gate in range(1, 6)] == [True, True, True, True, False]
+
+
+def circuit(funcs: list[Callable], inputs: list[list[int]], labels: list[str]) -> CircuitSnapshot:
+    return CircuitSnapshot(tuple(GateRecord(func.__name__, 10 * gate, 10, FALSE if func == power else NULL, 0.0,
+                                            labels[gate]) for gate, func in enumerate(funcs)),
+                           tuple(tuple(in_ids) for in_ids in inputs))
+
+
+def nand_output(func: Callable) -> CircuitSnapshot:
+    return circuit([power, power, func, output], [[], [], [0, 1], [2]], ["A", "B", "", "Y"])
+
+
+def test_de_morgan_is_equivalent():
+    de_morgan = circuit([power, power, logic_not, logic_not, logic_or, output], [[], [], [0], [1], [2, 3], [4]],
+                        ["A", "B", "", "", "", "Y"])
+    result = check_equivalence(nand_output(logic_nand), de_morgan, gate_funcs)
+    assert result.equivalent and result.unmatched == []
+
+
+def test_counterexample_tells_the_circuits_apart():
+    result = check_equivalence(nand_output(logic_nand), nand_output(logic_or), gate_funcs)
+    assert not result.equivalent and result.output == "Y"
+    values = [result.counterexample["A"], result.counterexample["B"]]
+    assert logic_nand(values) != logic_or(values)
+
+
+def test_unmatched_outputs_are_listed():
+    renamed = circuit([power, power, logic_nand, output], [[], [], [0, 1], [2]], ["A", "B", "", "Z"])
+    result = check_equivalence(nand_output(logic_nand), renamed, gate_funcs)
+    assert not result.equivalent and result.unmatched == ["Y", "Z"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
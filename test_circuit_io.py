@@ -0,0 +1,105 @@
+########################################################################################################################
+# File: test_circuit_io.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of writing circuits as text and binary files and reading them back.
+########################################################################################################################
+import pytest
+
+from circuit_io import *
+from netlist import *
+
+turn_info_print_off()
+
+
+def mixed_snapshot() -> CircuitSnapshot:
+    """Every kind of record, including a custom chip and its pins, a NULL state and labels with commas and accents"""
+    return CircuitSnapshot((GateRecord("power", 10, 20, TRUE, 0.0, "Power #1"),
+                            GateRecord("logic_clock", 10, 80, FALSE, 0.1, "Clock, slow"),
+                            GateRecord("logic_and", 120, 50, NULL, 0.0, ""),
+                            GateRecord("half_adder", 240, 50, NULL, 0.0, "Addé"),
+                            GateRecord("chip_pin", 300, 40, 0, 0.0, ""),
+                            GateRecord("chip_pin", 300, 60, 5, 0.0, ""),
+                            GateRecord("output", 400, 50, NULL, 0.0, "Sum")),
+                           ((), (), (0, 1), (0, 2), (3,), (3,), (4,)))
+
+
+@pytest.mark.parametrize("file_type", (".cir", BINARY_FILE_TYPE))
+def test_save_then_load_gives_the_same_snapshot(tmp_path, file_type):
+    file_name = str(tmp_path / ("board" + file_type))
+    save_circuit(file_name, mixed_snapshot())
+    assert load_circuit(file_name) == mixed_snapshot()
+
+
+def test_binary_columns_match_the_records(tmp_path):
+    file_name = str(tmp_path / ("board" + BINARY_FILE_TYPE))
+    save_circuit(file_name, mixed_snapshot())
+    snapshot = mixed_snapshot()
+    with BinaryCircuit(file_name) as circuit:
+        assert circuit.all_func_names() == snapshot.all_func_names()
+        assert circuit.all_states() == snapshot.all_states()
+        assert circuit.all_labels() == snapshot.all_labels()
+        assert [tuple(in_ids) for in_ids in circuit.inputs] == list(snapshot.inputs)
+        assert circuit.gates_in_rect((0, 0), (200, 100)) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("length", (0, 3, 20, -1))
+def test_truncated_binary_files_are_rejected(tmp_path, length):
+    file_name = str(tmp_path / ("board" + BINARY_FILE_TYPE))
+    save_circuit(file_name, mixed_snapshot())
+    with open(file_name, 'r+b') as file:
+        file.truncate(length if length >= 0 else os.path.getsize(file_name) + length)
+    with pytest.raises(ValueError):
+        BinaryCircuit(file_name)
+
+
+def test_netlist_from_a_mapped_file_does_not_decode_records(tmp_path, monkeypatch):
+    snapshot = CircuitSnapshot(tuple(record for record in mixed_snapshot().gates[:3]), ((), (), (0, 1)))
+    file_name = str(tmp_path / ("board" + BINARY_FILE_TYPE))
+    save_circuit(file_name, snapshot)
+    gate_funcs = {func.__name__: func for func in (power, logic_clock, logic_and)}
+    monkeypatch.setattr(BinaryCircuit, "record", lambda self, gate: pytest.fail("record {0} decoded".format(gate)))
+    with BinaryCircuit(file_name) as circuit:
+        netlist = Netlist.from_snapshot(circuit, gate_funcs)
+        assert netlist.funcs == [power, logic_clock, logic_and]
+        assert netlist.evaluate() == [TRUE, FALSE, FALSE]
+
+
+def gate_circuit(funcs: list[Callable], inputs: list[tuple], states: Optional[list[int]] = None) -> CircuitSnapshot:
+    states = states if states is not None else [NULL] * len(funcs)
+    return CircuitSnapshot(tuple(GateRecord(func.__name__, 10 * gate, 10, states[gate], 0.0, "")
+                                 for gate, func in enumerate(funcs)), tuple(inputs))
+
+
+half_adder_chip = ChipDefinition("half_adder_chip", Netlist([power, power, logic_xor, logic_and, output, output],
+                                                            [FALSE, FALSE, NULL, NULL, NULL, NULL],
+                                                            [[], [], [0, 1], [0, 1], [2], [3]]), [0, 1], [4, 5])
+
+
+@pytest.mark.parametrize("funcs, inputs, states", (
+    ([power, power, logic_not], [(), (), (0, 1)], None),  # NOT with two inputs
+    ([power, power, output], [(), (), (0, 1)], None),
+    ([power, logic_clock], [(), (0,)], None),
+    ([power, output, logic_not], [(), (0,), (1,)], None),  # Driven by an output gate
+    ([power, power, power, half_adder_chip], [(), (), (), (0, 1, 2)], None),  # Three inputs into two pins
+    ([power, half_adder_chip, logic_not], [(), (0,), (1,)], None),  # A chip driving a gate other than its pins
+    ([power, half_adder_chip, chip_pin], [(), (0,), (1,)], [TRUE, NULL, 2]),  # The chip has no output 2
+    ([power, chip_pin], [(), (0,)], [TRUE, 0]),  # A pin of no chip
+    ([power, logic_and], [(), (0, 5)], None),
+))
+def test_connections_the_editor_refuses_are_rejected(funcs, inputs, states):
+    gate_funcs = {func.__name__: func for func in funcs}
+    with pytest.raises(ValueError):
+        Netlist.from_snapshot(gate_circuit(funcs, inputs, states), gate_funcs)
+
+
+def test_chip_with_its_pins_is_accepted():
+    funcs = [power, power, half_adder_chip, chip_pin, chip_pin, output]
+    snapshot = gate_circuit(funcs, [(), (), (0, 1), (2,), (2,), (4,)], [TRUE, TRUE, NULL, 0, 1, NULL])
+    netlist = Netlist.from_snapshot(snapshot, {func.__name__: func for func in funcs})
+    assert netlist.evaluate()[5] == TRUE
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,35 @@
+########################################################################################################################
+# File: test_codegen.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of compiled netlists, sharing functions between identical circuits and gates with more inputs
+#              than fit in one expression.
+########################################################################################################################
+import pytest
+
+from codegen import *
+
+turn_info_print_off()
+
+
+def test_identical_circuits_share_a_function():
+    first = Netlist([power, power, logic_and], [TRUE, FALSE, NULL], [[], [], [0, 1]])
+    second = Netlist([power, power, logic_and], [FALSE, TRUE, NULL], [[], [], [0, 1]])
+    other = Netlist([power, power, logic_or], [TRUE, FALSE, NULL], [[], [], [0, 1]])
+    assert compile_netlist(first) is compile_netlist(second)
+    assert structural_hash(first) != structural_hash(other)
+
+
+def test_wide_gates_compile():
+    width = 4 * max_chain + 1
+    netlist = Netlist([power] * width + [logic_and, logic_xor], [TRUE] * width + [NULL, NULL],
+                      [[]] * width + [list(range(width))] * 2)
+    values = list(netlist.values)
+    assert compile_netlist(netlist)(values)[-2:] == [TRUE, FALSE]
+    values[width - 1] = FALSE
+    assert compile_netlist(netlist)(values)[-2:] == [FALSE, TRUE]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
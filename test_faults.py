@@ -0,0 +1,55 @@
+########################################################################################################################
+# File: test_faults.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of stuck-at fault simulation against injecting each fault and evaluating every combination of
+#              the sources.
+########################################################################################################################
+import pytest
+
+from faults import *
+
+turn_info_print_off()
+
+
+def faulty_outputs(netlist: Netlist, vector: list[int], fault: Optional[tuple[int, int]]) -> list[int]:
+    """Values of the output gates for vector, with one gate stuck at a value"""
+    values = list(vector)
+    for gate in netlist.order:
+        in_ids = netlist.inputs_of(gate)
+        if len(in_ids) > 0:
+            values[gate] = netlist.funcs[gate]([values[in_id] for in_id in in_ids])
+        if fault is not None and gate == fault[0]:
+            values[gate] = fault[1]
+    return [values[gate] for gate in range(netlist.size) if netlist.funcs[gate] == output]
+
+
+def test_faults_detected_agree_with_injecting_them():
+    # Y = A OR (A AND B), the AND gate stuck at FALSE can't be told apart from the fault free circuit
+    netlist = Netlist([power, power, logic_and, logic_or, output], [FALSE, FALSE, NULL, NULL, NULL],
+                      [[], [], [0, 1], [0, 2], [3]])
+    vectors = exhaustive_vectors(2)
+    simulator = FaultSimulator(netlist)
+    report = simulator.run(vectors, batch_size=3)
+
+    assert report.faults == len(simulator.faults) == len(report.detected) + len(report.undetected)
+    good = [faulty_outputs(netlist, vector + [NULL] * 3, None) for vector in vectors]
+    for fault in simulator.faults:
+        detecting = [index for index, vector in enumerate(vectors)
+                     if faulty_outputs(netlist, vector + [NULL] * 3, fault) != good[index]]
+        if len(detecting) == 0:
+            assert fault in report.undetected
+        else:
+            assert report.detected[fault] == detecting[0]
+    assert (2, FALSE) in report.undetected
+
+
+def test_exhaustive_vectors_detect_every_fault_of_an_and_gate():
+    netlist = Netlist([power, power, logic_and, output], [FALSE, FALSE, NULL, NULL], [[], [], [0, 1], [2]])
+    report = FaultSimulator(netlist).run(exhaustive_vectors(2))
+    assert report.coverage == 1.0 and report.faults == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
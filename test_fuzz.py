@@ -0,0 +1,37 @@
+########################################################################################################################
+# File: test_fuzz.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: A short differential fuzzing run with a fixed seed, every engine must agree with the Input class.
+########################################################################################################################
+import pytest
+
+from fuzz import *
+
+turn_info_print_off()
+
+
+@pytest.mark.parametrize("engine", tuple(engines))
+def test_engine_agrees_with_the_reference(engine):
+    mismatches = fuzz(200, 20261019, (engine,))
+    assert [mismatch.summary() for mismatch in mismatches] == []
+
+
+def test_a_mismatch_is_shrunk():
+    case = FuzzCase([power, power, logic_and], [[], [], [0, 1]], [[TRUE, TRUE, NULL], [FALSE, TRUE, NULL]])
+
+    def broken_engine(broken_case: FuzzCase) -> list[list[Optional[int]]]:
+        return [[FALSE if func == logic_and else None for func in broken_case.funcs] for _ in broken_case.vectors]
+
+    engines["broken"] = broken_engine
+    try:
+        mismatch = shrink(find_mismatch(case, ("broken",)))
+        assert len(mismatch.case.vectors) == 1 and len(mismatch.case.funcs) < len(case.funcs)
+        assert find_mismatch(mismatch.case, ("broken",)) == mismatch
+    finally:
+        del engines["broken"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,77 @@
+########################################################################################################################
+# File: test_hdl_io.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of exporting boards as BLIF and Verilog netlists and importing them again.
+########################################################################################################################
+import pytest
+
+from hdl_io import *
+
+turn_info_print_off()
+
+gate_funcs = {func.__name__: func for func in (power, logic_not, logic_and, logic_nand, logic_or, logic_xor, output,
+                                               logic_clock)}
+
+
+def default_board() -> Netlist:
+    """Every gate type with the labels the board gives new gates, which have spaces and '#' in them"""
+    funcs = [power, power, power, logic_and, logic_nand, logic_or, logic_xor, logic_xor, logic_not,
+             output, output, output, output, output, output]
+    inputs = [[], [], [], [0, 1], [0, 1, 2], [1, 2], [0, 1], [0, 1, 2], [2], [3], [4], [5], [6], [7], [8]]
+    labels = ["Power #1", "Power #2", "Power #3", "", "", "", "", "", ""] + \
+        ["Output #{0}".format(number) for number in range(1, 7)]
+    return Netlist(funcs, [FALSE] * len(funcs), inputs, labels)
+
+
+def truth_table(netlist: Netlist) -> dict[str, list[int]]:
+    """Values of each output gate, by label, for every combination of the inputs in label order"""
+    inputs, outputs = netlist_ports(netlist)
+    inputs.sort(key=lambda gate: netlist.labels[gate])
+    table = {netlist.labels[gate]: [] for gate in outputs}
+    for vector in itertools.product((FALSE, TRUE), repeat=len(inputs)):
+        for gate, value in zip(inputs, vector):
+            netlist.values[gate] = value
+        values = netlist.evaluate()
+        for gate in outputs:
+            table[netlist.labels[gate]].append(values[gate])
+    return table
+
+
+@pytest.mark.parametrize("file_type", (BLIF_FILE_TYPE, VERILOG_FILE_TYPE))
+def test_export_then_import_keeps_the_logic(tmp_path, file_type):
+    board = default_board()
+    file_name = str(tmp_path / ("board" + file_type))
+    write_netlist(file_name, board, "my board #1")
+    imported = Netlist.from_snapshot(read_netlist(file_name), gate_funcs)
+
+    expected = truth_table(board)
+    escape = blif_name if file_type == BLIF_FILE_TYPE else verilog_name
+    assert truth_table(imported) == {escape(label).strip("\\ "): values for label, values in expected.items()}
+
+
+def test_blif_names_have_no_comment_characters(tmp_path):
+    file_name = str(tmp_path / "board.blif")
+    write_blif(file_name, default_board(), "my board #1")
+    with open(file_name) as blif_file:
+        text = blif_file.read()
+    assert "#" not in text and ".model my_board__1\n" in text
+
+
+def write_text(tmp_path, name: str, text: str) -> str:
+    file_name = str(tmp_path / name)
+    with open(file_name, 'w') as text_file:
+        text_file.write(text)
+    return file_name
+
+
+def test_blif_single_input_cover_with_several_cubes(tmp_path):
+    file_name = write_text(tmp_path, "cover.blif", ".model cover\n.inputs a\n.outputs y n\n"
+                                                   ".names a y\n0 1\n1 1\n.names a n\n0 1\n.end\n")
+    table = truth_table(Netlist.from_snapshot(read_blif(file_name), gate_funcs))
+    assert table == {"y": [TRUE, TRUE], "n": [TRUE, FALSE]}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,151 @@
+########################################################################################################################
+# File: test_history.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of deleting gates and putting them back as undo does, and of bounding the undo history. The
+#              gates are drawn on a canvas which only hands out item ids, so no display is needed.
+########################################################################################################################
+import pytest
+
+from history import *
+
+turn_info_print_off()
+
+
+class ItemCanvas:
+    """Stands in for a Canvas, every item is just an id"""
+
+    def __init__(self):
+        self.items = itertools.count(1)
+
+    def create_image(self, *args, **kwargs) -> int:
+        return next(self.items)
+
+    create_rectangle = create_line = create_image
+
+    def bbox(self, item: int) -> None:
+        return None
+
+    def itemconfig(self, *args, **kwargs) -> None:
+        pass
+
+    def delete(self, *items) -> None:
+        pass
+
+
+gate_images = {func: {"image": None} for func in (power, logic_and, logic_or)}
+gate_funcs = {func.__name__: func for func in gate_images}
+
+
+def place(canvas: ItemCanvas, func: Callable, x: int, uid: Optional[int] = None) -> InputTk:
+    gate = InputTk(func, gate_images, canvas=canvas, center=(x, 100), out=TRUE if func == power else NULL)
+    if uid is not None:
+        gate.uid = uid
+    return gate
+
+
+def delete_and_undo(canvas: ItemCanvas, board: list[InputTk], deleted: list[InputTk]) -> dict:
+    """Deletes gates from the board then recreates them from the delete command, returns the recreated gates by
+    uid"""
+    records, edges = capture_gates(deleted)
+    delete_gates(deleted)
+    restored = {uid: place(canvas, gate_funcs[record.func], record.x, uid) for uid, record in records}
+    gates_by_uid = {gate.uid: gate for gate in board if gate not in deleted}
+    gates_by_uid.update(restored)
+    restore_connections(edges, gates_by_uid)
+    return restored
+
+
+@pytest.mark.parametrize("deleted", ([1], [0, 2], [0, 1, 2], [2, 0]))
+def test_undoing_a_delete_keeps_the_order_of_inputs(deleted):
+    canvas = ItemCanvas()
+    sources = [place(canvas, power, 10 * n) for n in range(3)]
+    gate = place(canvas, logic_and, 100)
+    for source in sources:
+        assert connect_gates(source, gate)
+    uids = [source.uid for source in sources]
+
+    restored = delete_and_undo(canvas, sources + [gate], [sources[n] for n in deleted])
+    assert [source.uid for source in gate.get_input_gates()] == uids
+    assert len(gate.input_line_ids) == 3
+    for uid in uids:
+        if uid in restored:
+            assert restored[uid].get_output_gates() == [gate]
+
+
+def test_undoing_a_delete_restores_the_inputs_of_the_deleted_gate():
+    canvas = ItemCanvas()
+    sources = [place(canvas, power, 10 * n) for n in range(3)]
+    gate = place(canvas, logic_or, 100)
+    for source in reversed(sources):
+        connect_gates(source, gate)
+
+    restored = delete_and_undo(canvas, sources + [gate], [gate])[gate.uid]
+    assert restored.get_input_gates() == list(reversed(sources))
+
+
+def test_connecting_at_an_index():
+    canvas = ItemCanvas()
+    first, second = place(canvas, power, 0), place(canvas, power, 10)
+    gate = place(canvas, logic_and, 100)
+    connect_gates(first, gate)
+    assert connect_gates(second, gate, 0)
+    assert gate.get_input_gates() == [second, first]
+
+
+
+class RecordingCanvas(ItemCanvas):
+    """Also keeps the items passed to every delete call"""
+
+    def __init__(self):
+        super().__init__()
+        self.deleted = []
+
+    def delete(self, *items) -> None:
+        self.deleted.append(items)
+
+
+def test_deleting_prunes_survivors_and_recolors_them_in_order(monkeypatch):
+    canvas = RecordingCanvas()
+    first, second = place(canvas, power, 0), place(canvas, power, 10)
+    both, either, last = place(canvas, logic_and, 100), place(canvas, logic_or, 200), place(canvas, logic_and, 300)
+    for src_gate, dest_gate in ((first, both), (second, both), (both, either), (second, either), (both, last),
+                                (either, last)):
+        assert connect_gates(src_gate, dest_gate)
+    extra = place(canvas, logic_or, 400)
+    assert connect_gates(either, extra)
+    items = set(first.canvas_items() + first.output_line_ids + last.canvas_items() + last.input_line_ids)
+    recolored = []
+    monkeypatch.setattr(InputTk, "color_lines", lambda gate, output_val: recolored.append(gate))
+
+    delete_gates([first, last])
+    assert both.get_input_gates() == [second] and len(both.input_line_ids) == 1
+    assert both.get_output_gates() == [either] and len(both.output_line_ids) == 1
+    assert either.get_output_gates() == [extra] and len(either.output_line_ids) == 1
+    assert len(canvas.deleted) == 1 and set(canvas.deleted[0]) == items
+    assert recolored == [both, either, extra]
+    assert first.input_id == last.input_id == -1
+
+
+
+def test_history_evicts_the_oldest_entries_and_keeps_the_newest():
+    history = EditHistory(limit=3)
+    for uid in range(5):
+        history.record(("move", uid, (0, 0), (10, 10)))
+    assert len(history) == 3 and history.cost == 3
+    assert [entry[0][1] for _, entry in history.undo_entries] == [2, 3, 4]
+
+    records = tuple((uid, GateRecord("power", 0, 0, TRUE, 0.0, "")) for uid in range(4))
+    history.record(("delete", records, ()))  # Costs more than the limit on its own
+    assert len(history) == 1 and history.cost == 5
+    assert history.undo()[0][0] == "delete"
+
+    for uid in range(2):
+        history.record(("move", uid, (0, 0), (10, 10)))
+    history.set_limit(0)
+    assert len(history) == 1 and history.undo()[0][1] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+########################################################################################################################
+# File: test_journal.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the autosave journal and of saving circuits in the background.
+########################################################################################################################
+import pytest
+
+from journal import *
+
+turn_info_print_off()
+
+
+def two_gate_snapshot() -> CircuitSnapshot:
+    return CircuitSnapshot((GateRecord("power", 10, 10, TRUE, 0.0, "A"), GateRecord("output", 50, 10, TRUE, 0.0, "")),
+                           ((), (0,)))
+
+
+def test_recover_replays_edits_after_the_last_snapshot(tmp_path):
+    journal = EditJournal(str(tmp_path))
+    journal.start()
+    journal.append("place", uid=1, func="power", x=10, y=10, state=TRUE, rate=0.0, label="A")
+    journal.compact(two_gate_snapshot(), [1, 2])
+    journal.append("move", uid=1, x=20, y=30)
+    journal.append("rename", uid=2, label="Out")
+    journal.close(discard=False)  # Everything is on disk, as if the application crashed now
+
+    recovery = EditJournal(str(tmp_path)).recover()
+    assert recovery.snapshot == two_gate_snapshot()
+    assert recovery.uids == [1, 2]
+    assert recovery.entries == [{"op": "move", "uid": 1, "x": 20, "y": 30},
+                                {"op": "rename", "uid": 2, "label": "Out"}]
+
+
+def test_recover_skips_a_cut_off_last_line(tmp_path):
+    journal = EditJournal(str(tmp_path))
+    journal.start()
+    journal.append("clear")
+    journal.journal_file.write('{"op": "move", "ui')
+    journal.close(discard=False)
+
+    recovery = EditJournal(str(tmp_path)).recover()
+    assert recovery.snapshot is None
+    assert recovery.entries == [{"op": "clear"}]
+
+
+def test_clean_exit_leaves_nothing_to_recover(tmp_path):
+    journal = EditJournal(str(tmp_path))
+    journal.start()
+    journal.append("clear")
+    journal.close(discard=True)
+    assert EditJournal(str(tmp_path)).recover() is None
+
+
+def test_second_instance_keeps_the_first_instances_journal(tmp_path):
+    first = EditJournal(str(tmp_path))
+    first.start()
+    first.append("clear")
+    second = EditJournal(str(tmp_path))
+    second.start()
+    assert second.directory != first.directory
+    assert first.generations("journal") == [0]
+    second.close()
+    first.close()
+
+
+def test_crashed_session_is_recovered_while_another_runs(tmp_path):
+    running = EditJournal(str(tmp_path))
+    running.start()
+    crashed = EditJournal(str(tmp_path))
+    crashed.start()
+    crashed.append("clear")
+    crashed.close(discard=False)  # Its lock is released as if the process had died
+
+    recovering = EditJournal(str(tmp_path))
+    assert recovering.directory == crashed.directory
+    assert recovering.recover().entries == [{"op": "clear"}]
+    recovering.close()
+    running.close()
+
+
+def test_failed_save_keeps_the_old_file_and_is_reported(tmp_path):
+    file_name = str(tmp_path / ("board" + BINARY_FILE_TYPE))
+    save_circuit(file_name, two_gate_snapshot())
+    with open(file_name, 'rb') as saved:
+        contents = saved.read()
+
+    broken = CircuitSnapshot((GateRecord("power", "left", 0, NULL, 0.0, ""),), ((),))
+    journal = EditJournal(str(tmp_path / "autosave"))
+    journal.submit(save_circuit, file_name, broken)
+    journal.close(discard=False)
+
+    failures = journal.take_failures()
+    assert len(failures) == 1
+    func, args, err = failures[0]
+    assert func is save_circuit and isinstance(err, TypeError)
+    assert not os.path.exists(file_name + ".tmp")
+    with open(file_name, 'rb') as saved:
+        assert saved.read() == contents
+
+
+def test_save_replaces_the_file(tmp_path):
+    file_name = str(tmp_path / "board.cir")
+    save_circuit(file_name, CircuitSnapshot((), ()))
+    save_circuit(file_name, two_gate_snapshot())
+    assert read_circuit(file_name) == two_gate_snapshot()
+    assert os.listdir(str(tmp_path)) == ["board.cir"]
+
+
+def test_journal_without_a_directory_leaves_the_autosave_alone(tmp_path):
+    crashed = EditJournal(str(tmp_path))
+    crashed.start()
+    crashed.append("clear")
+    crashed.close(discard=False)
+
+    timing = EditJournal(None)
+    timing.start()
+    timing.append("clear")
+    assert timing.recover() is None
+    timing.close(discard=True)
+    assert EditJournal(str(tmp_path)).recover().entries == [{"op": "clear"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,61 @@
+########################################################################################################################
+# File: test_latency.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the ring buffers and percentiles of handler latencies, and of measuring how long events waited
+#              in the queue from their timestamps.
+########################################################################################################################
+from types import SimpleNamespace
+
+import pytest
+
+from latency import *
+
+turn_info_print_off()
+
+
+def test_ring_buffer_keeps_the_newest_values_in_order():
+    buffer = RingBuffer(4)
+    assert len(buffer) == 0 and buffer.values() == []
+    for value in (1.0, 2.0):
+        buffer.append(value)
+    assert buffer.values() == [1.0, 2.0]
+    for value in (3.0, 4.0, 5.0, 6.0):
+        buffer.append(value)
+    assert len(buffer) == 4 and buffer.values() == [3.0, 4.0, 5.0, 6.0]
+
+
+def test_percentiles_are_nearest_rank_of_the_kept_values():
+    assert RingBuffer(4).percentiles((0.5, 1.0)) == [0.0, 0.0]
+    buffer = RingBuffer(100)
+    for value in range(100, 0, -1):
+        buffer.append(float(value))
+    assert buffer.percentiles((0.0, 0.5, 0.99, 1.0)) == [1.0, 51.0, 100.0, 100.0]
+    for value in range(200, 250):  # Pushes out the 50 largest values
+        buffer.append(float(value))
+    assert buffer.percentiles((0.0, 0.5)) == [1.0, 200.0]
+
+
+def test_event_delay_is_measured_from_the_quickest_event():
+    monitor = LatencyMonitor()
+    assert monitor.event_delay(SimpleNamespace(), 10.0) is None
+    assert monitor.event_delay(SimpleNamespace(time=5.0), 10.0) is None  # Tk timestamps are whole milliseconds
+    assert monitor.event_delay(SimpleNamespace(time=1000), 5000.0) == 0.0
+    assert monitor.event_delay(SimpleNamespace(time=2000), 6500.0) == 500.0
+    assert monitor.event_delay(SimpleNamespace(time=3000), 6000.0) == 0.0  # Quicker than the first
+    assert monitor.event_delay(SimpleNamespace(time=3000), 6250.0) == 250.0
+
+
+def test_timed_callbacks_are_recorded_under_their_name():
+    monitor = LatencyMonitor(size=8)
+    callback = monitor.timed("click", lambda event: event.time)
+    for stamp in range(10):
+        assert callback(SimpleNamespace(time=stamp)) == stamp
+    latency, = monitor.latencies()
+    assert latency.name == "click" and latency.calls == 10
+    assert len(monitor.durations["click"]) == len(monitor.delays["click"]) == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,53 @@
+########################################################################################################################
+# File: test_logger.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of rate limiting call sites of the message log and reporting the messages it dropped.
+########################################################################################################################
+import io
+from time import sleep
+
+import pytest
+
+import logger
+from logger import *
+
+
+def flood(log: QueueLogger, count: int) -> None:
+    for number in range(count):
+        log.log(INFO, "message {0}".format(number), "flood.py", 1)
+
+
+def test_dropped_messages_are_reported_when_flushed():
+    stream = io.StringIO()
+    log = QueueLogger(stream=stream)
+    flood(log, logger.rate_burst + 10)
+    log.flush()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == logger.rate_burst + 1
+    assert lines[-1].endswith("message {0} (9 similar messages dropped)".format(logger.rate_burst + 9))
+
+
+def test_dropped_messages_are_reported_once_the_call_site_is_quiet(monkeypatch):
+    monkeypatch.setattr(logger, "quiet_interval", 0.05)
+    stream = io.StringIO()
+    log = QueueLogger(stream=stream)
+    flood(log, logger.rate_burst + 3)
+    for _ in range(100):
+        if "similar messages dropped" in stream.getvalue():
+            break
+        sleep(0.01)
+    assert stream.getvalue().splitlines()[-1].endswith("(2 similar messages dropped)")
+
+
+def test_reports_keep_their_lines_together():
+    stream = io.StringIO()
+    log = QueueLogger(stream=stream)
+    log.log(INFO, "Report\nfirst\nsecond", "report.py", 1)
+    log.flush()
+    assert stream.getvalue().splitlines()[1:] == ["    first", "    second"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
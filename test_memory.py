@@ -0,0 +1,47 @@
+########################################################################################################################
+# File: test_memory.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the leak check, on a canvas and window which only count their items.
+########################################################################################################################
+import tracemalloc
+
+import pytest
+
+from memory import *
+
+turn_info_print_off()
+
+
+class EmptyCanvas:
+    def find_all(self) -> tuple:
+        return ()
+
+
+class EmptyRoot:
+    def image_names(self) -> tuple:
+        return ()
+
+    def winfo_children(self) -> list:
+        return []
+
+
+def test_leak_check_finds_growth_and_stops_tracing():
+    held = []
+    report = leak_check(lambda: held.append(bytearray(4 * leak_tolerance)), EmptyCanvas(), EmptyRoot())
+    assert report.leaked() and report.traced_bytes >= 4 * leak_tolerance
+    assert not tracemalloc.is_tracing()
+
+
+def test_leak_check_leaves_tracing_on_if_it_was_on():
+    tracemalloc.start()
+    try:
+        assert not leak_check(lambda: None, EmptyCanvas(), EmptyRoot()).leaked()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,38 @@
+########################################################################################################################
+# File: test_optimize.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the netlist optimizer.
+########################################################################################################################
+import pytest
+
+from optimize import *
+
+turn_info_print_off()
+
+
+def test_constants_are_folded_and_double_inversions_removed():
+    # A, NOT NOT A, A AND TRUE, and an OR missing an input
+    netlist = Netlist([power, power, logic_not, logic_not, logic_and, logic_or, output, output, output],
+                      [FALSE, TRUE, NULL, NULL, NULL, NULL, NULL, NULL, NULL],
+                      [[], [], [0], [2], [0, 1], [0], [3], [4], [5]])
+    optimized, new_id, report = optimize_netlist(netlist, free=[0])
+    assert optimized.size < netlist.size and report.folded > 0
+    source = new_id[0]
+    assert [list(optimized.inputs_of(new_id[gate])) for gate in (6, 7)] == [[source], [source]]
+    assert optimized.evaluate()[new_id[8]] == NULL
+
+
+def test_free_sources_are_kept_as_themselves():
+    # A kept free source used to be wrapped in an output gate, so setting its value in the optimised netlist did
+    # nothing to the gates it drives
+    netlist = Netlist([power, logic_not], [TRUE, NULL], [[], [0]])
+    optimized, new_id, _ = optimize_netlist(netlist, free=[0], keep=[0, 1])
+    assert optimized.funcs[new_id[0]] == power and len(optimized.inputs_of(new_id[0])) == 0
+    optimized.values[new_id[0]] = FALSE
+    assert optimized.evaluate()[new_id[1]] == TRUE
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
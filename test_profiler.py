@@ -0,0 +1,83 @@
+########################################################################################################################
+# File: test_profiler.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of profiling gate evaluations, summing the profiles per gate type and writing them for pstats.
+#              The gates are drawn on a canvas which only hands out item ids, so no display is needed.
+########################################################################################################################
+import pstats
+
+import pytest
+
+from profiler import *
+
+turn_info_print_off()
+
+
+class ItemCanvas:
+    """Stands in for a Canvas, every item is just an id"""
+
+    def __init__(self):
+        self.items = itertools.count(1)
+
+    def create_image(self, *args, **kwargs) -> int:
+        return next(self.items)
+
+    create_rectangle = create_line = create_image
+
+    def bbox(self, item: int) -> None:
+        return None
+
+    def itemconfig(self, *args, **kwargs) -> None:
+        pass
+
+
+def profiled_board() -> (GatesInfoRepo, GateProfiler, list[InputTk]):
+    """Two power gates into an AND gate, the AND gate is propagated twice and each power gate once"""
+    repo = GatesInfoRepo()
+    repo.register_gate(power, name="Power")
+    repo.register_gate(logic_and, name="AND")
+    canvas = ItemCanvas()
+    gates = [InputTk(power, repo, "First", canvas, (0, 0), out=TRUE),
+             InputTk(power, repo, "", canvas, (0, 50), out=TRUE), InputTk(logic_and, repo, "Both", canvas, (100, 25))]
+    for source in gates[:2]:
+        assert connect_gates(source, gates[2])
+
+    profiler = GateProfiler()
+    for gate in (gates[2], gates[0], gates[2], gates[1]):
+        profiler.propagate_gate(gate)
+    profiler.compiled_run(0.5)
+    return repo, profiler, gates
+
+
+def test_type_profiles_sum_the_gates_of_each_type():
+    repo, profiler, gates = profiled_board()
+    profiles = {profile.uid: profile for profile in profiler.profiles(repo)}
+    assert profiles[gates[2].uid][2:4] == ("AND", 2) and profiles[gates[2].uid].recolors == 2
+    assert profiles[gates[0].uid][1:4] == ("First", "Power", 1)
+
+    totals = {profile.gate_type: profile for profile in profiler.type_profiles(repo)}
+    assert set(totals) == {"Power", "AND"}
+    assert totals["Power"].uid == 2 and totals["Power"].evaluations == totals["Power"].recolors == 2
+    assert totals["AND"].uid == 1 and totals["AND"].evaluations == 2
+    power_profiles = [profiles[gate.uid] for gate in gates[:2]]
+    assert totals["Power"].evaluate_seconds == pytest.approx(sum(p.evaluate_seconds for p in power_profiles))
+    assert totals["Power"].recolor_seconds == pytest.approx(sum(p.recolor_seconds for p in power_profiles))
+
+
+def test_pstats_dump_loads_with_pstats(tmp_path):
+    repo, profiler, gates = profiled_board()
+    file_name = str(tmp_path / "board.prof")
+    profiler.write_pstats(file_name, repo)
+
+    stats = pstats.Stats(file_name)
+    assert stats.total_calls == 2 * 4 + 1
+    calls, _, _, _, callers = stats.stats[("AND", gates[2].uid, "evaluate Both")]
+    assert calls == 2 and callers == {}
+    assert stats.stats[("Power", gates[1].uid, "color_lines")][0] == 1
+    assert stats.stats[("compiled", 0, "evaluate board")][2] == 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+########################################################################################################################
+# File: test_sat.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the CDCL solver against brute force on small random clause sets, and of solving for the
+#              values of gates in small random circuits.
+########################################################################################################################
+import pytest
+
+from fuzz import *
+
+turn_info_print_off()
+
+
+def random_clauses(generator: random.Random, num_vars: int, count: int) -> list[list[int]]:
+    return [[generator.choice((-1, 1)) * var for var in generator.sample(range(1, num_vars + 1), 3)]
+            for _ in range(count)]
+
+
+def satisfies(clauses: list[list[int]], values: Sequence[int]) -> bool:
+    """Whether values, indexed by variable, satisfy every clause"""
+    return all(any(values[abs(lit)] == (TRUE if lit > 0 else FALSE) for lit in clause) for clause in clauses)
+
+
+def test_luby_sequence():
+    assert [luby(index) for index in range(15)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_solver_agrees_with_brute_force(seed):
+    generator = random.Random(seed)
+    num_vars = generator.randint(3, 10)
+    clauses = random_clauses(generator, num_vars, generator.randint(1, 6 * num_vars))
+    solver = SatSolver(num_vars)
+    for clause in clauses:
+        solver.add_clause(clause)
+    model = solver.solve()
+
+    satisfiable = any(satisfies(clauses, [FALSE] + list(values))
+                      for values in itertools.product((FALSE, TRUE), repeat=num_vars))
+    assert (model is not None) == satisfiable
+    if model is not None:
+        assert satisfies(clauses, model)
+
+
+def test_pigeonhole_is_unsatisfiable():
+    pigeons, holes = 5, 4
+    solver = SatSolver(pigeons * holes)
+
+    def var(pigeon: int, hole: int) -> int:
+        return 1 + pigeon * holes + hole
+
+    for pigeon in range(pigeons):
+        solver.add_clause([var(pigeon, hole) for hole in range(holes)])
+    for hole in range(holes):
+        for first, second in itertools.combinations(range(pigeons), 2):
+            solver.add_clause((-var(first, hole), -var(second, hole)))
+    assert solver.solve() is None and solver.conflicts > 0
+
+
+def test_assumptions_are_kept():
+    solver = SatSolver(2)
+    solver.add_clause((1, 2))
+    assert solver.solve([-1])[2] == TRUE
+    assert solver.solve([-1, -2]) is None
+
+
+def value_for(netlist: Netlist, gate: int, free: list[int], values: Sequence[int]) -> int:
+    for source, value in zip(free, values):
+        netlist.values[source] = value
+    return netlist.evaluate()[gate]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_solve_for_values_agrees_with_brute_force(seed):
+    generator = random.Random(seed)
+    case = random_case(generator)
+    netlist, free = case.netlist(), case.free_sources()
+    gate, value = generator.randrange(len(case.funcs)), generator.choice((FALSE, TRUE))
+
+    result = solve_for_values(netlist, {gate: value}, free)
+    assert result.satisfiable == any(value_for(netlist, gate, free, values) == value
+                                     for values in itertools.product((FALSE, TRUE), repeat=len(free)))
+    if result.satisfiable:
+        assert value_for(netlist, gate, free, [result.assignment[source] for source in free]) == value
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,58 @@
+########################################################################################################################
+# File: test_sweep.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of exhaustive sweeps on one and several worker processes for a circuit wide enough to need many
+#              batches, and of the vectors which set a target.
+########################################################################################################################
+import pytest
+
+from sweep import *
+
+turn_info_print_off()
+
+
+def parity_circuit(width: int) -> Netlist:
+    """The first output gate is the parity of the inputs, the second is TRUE only if they are all TRUE"""
+    funcs, inputs = [power] * width, [[] for _ in range(width)]
+    parity = 0
+    for gate in range(1, width):  # A chain of two input XORs
+        funcs.append(logic_xor)
+        inputs.append([parity, gate])
+        parity = len(funcs) - 1
+    funcs.extend((logic_and, output, output))
+    inputs.extend((list(range(width)), [parity], [len(funcs) - 3]))
+    return Netlist(funcs, [FALSE] * width + [NULL] * (len(funcs) - width), inputs)
+
+
+def table_bit(table: bytes, vector: int) -> int:
+    return (table[vector >> 3] >> (vector & 7)) & 1
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_wide_sweep_on_worker_processes(workers):
+    width = lane_bits + 2
+    netlist = parity_circuit(width)
+    result = sweep(netlist, workers=workers, prefix_bits=2)
+    parity, all_true = result.outputs
+    assert result.vectors == 1 << width and result.null_outputs == []
+    assert all(table_bit(result.tables[parity], vector) == vector.bit_count() & 1 for vector in range(1 << width))
+    assert [vector for vector in range(1 << width) if table_bit(result.tables[all_true], vector)] == [(1 << width) - 1]
+
+
+def test_hits_are_in_order_and_limited():
+    netlist = parity_circuit(lane_bits + 1)
+    parity = netlist.gates_of(output)[0]
+    result = sweep(netlist, targets={parity: TRUE}, workers=1, hit_limit=1000)
+    assert result.hits == [vector for vector in range(1 << (lane_bits + 1)) if vector.bit_count() & 1][:1000]
+
+
+def test_always_null_target_has_no_hits():
+    netlist = Netlist([power, logic_and, output], [FALSE, NULL, NULL], [[], [0], [1]])
+    result = sweep(netlist, targets={2: TRUE}, workers=1)
+    assert result.hits == [] and result.null_outputs == [2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
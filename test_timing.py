@@ -0,0 +1,29 @@
+########################################################################################################################
+# File: test_timing.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of the static timing analysis of gate delays.
+########################################################################################################################
+import pytest
+
+from timing import *
+
+turn_info_print_off()
+
+
+def test_critical_path_follows_the_latest_input():
+    # The second power gate is slow, so its change reaches the output last through the AND and OR gates
+    netlist = Netlist([power, power, logic_and, logic_or, output, output], [TRUE, FALSE, NULL, NULL, NULL, NULL],
+                      [[], [], [0, 1], [2, 1], [3], []])
+    paths = critical_paths(netlist, [0, 5, 2, 3, 1, 1])
+    assert paths == {4: CriticalPath(11, [1, 2, 3, 4])}
+
+
+def test_sources_start_at_their_own_delay():
+    netlist = Netlist([logic_clock, output], [FALSE, NULL], [[], [0]])
+    assert critical_paths(netlist, [4, 0]) == {1: CriticalPath(4, [0, 1])}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
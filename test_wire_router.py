@@ -0,0 +1,112 @@
+########################################################################################################################
+# File: test_wire_router.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Tests of routing wires around gates. The gates are plain boxes and the canvas only records the points
+#              of each line, so no display is needed.
+########################################################################################################################
+import pytest
+
+from wire_router import *
+
+
+class LineCanvas:
+    """Stands in for a Canvas, keeps the last points every line was moved to"""
+
+    def __init__(self):
+        self.lines = {}
+
+    def coords(self, line_id: int, *coords) -> None:
+        self.lines[line_id] = list(zip(coords[::2], coords[1::2]))
+
+
+class Box:
+    """Stands in for a placed gate"""
+
+    def __init__(self, x0: int, y0: int, x1: int, y1: int):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+    def top_left(self) -> (int, int):
+        return self.x0, self.y0
+
+    def bottom_right(self) -> (int, int):
+        return self.x1, self.y1
+
+    def get_center(self) -> (int, int):
+        return (self.x0 + self.x1) // 2, (self.y0 + self.y1) // 2
+
+    def move_to(self, x0: int, y0: int) -> None:
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x0 + self.x1 - self.x0, y0 + self.y1 - self.y0
+
+
+def turns(cells: list[(int, int)]) -> int:
+    steps = [(b[0] - a[0], b[1] - a[1]) for a, b in zip(cells, cells[1:])]
+    return sum(1 for first, second in zip(steps, steps[1:]) if first != second)
+
+
+def wire_with_obstacle(router: WireRouter) -> (Box, Box, Box):
+    """A line between two gates on the same row with a third gate in the way"""
+    src, dest, obstacle = Box(0, 40, 20, 60), Box(200, 40, 220, 60), Box(90, 20, 130, 80)
+    for gate in (src, dest, obstacle):
+        router.update_gate(gate)
+    router.add_line(1, src, dest)
+    return src, dest, obstacle
+
+
+def test_wires_go_around_gates():
+    canvas = LineCanvas()
+    router = WireRouter(canvas)
+    _, _, obstacle = wire_with_obstacle(router)
+
+    cells = router.route_cells[1]
+    assert not any(cell in cells for cell in router.gate_cells[obstacle])
+    points = canvas.lines[1]
+    assert points == router.get_route(1) and points[0] == (20, 50) and points[-1] == (200, 50)
+    assert all(x0 == x1 or y0 == y1 for (x0, y0), (x1, y1) in zip(points, points[1:]))
+
+
+def test_corners_cost_more_than_cells():
+    router = WireRouter(LineCanvas())
+    cells = router.a_star((0, 0), (5, 5))
+    assert len(cells) == 11 and turns(cells) == 1
+
+
+def test_search_falls_back_to_a_z_shaped_wire():
+    canvas = LineCanvas()
+    router = WireRouter(canvas, max_expansions=0)
+    router.add_line(1, Box(0, 40, 20, 60), Box(200, 80, 220, 100))
+    assert canvas.lines[1] == [(20, 50), (110, 50), (110, 90), (200, 90)]
+
+
+def test_wires_around_a_moved_gate_are_straightened():
+    canvas = LineCanvas()
+    router = WireRouter(canvas)
+    _, _, obstacle = wire_with_obstacle(router)
+    assert len({cell[1] for cell in router.route_cells[1]}) > 1
+
+    obstacle.move_to(90, 300)
+    assert router.update_gate(obstacle) == {1}
+    assert {cell[1] for cell in router.route_cells[1]} == {5}
+
+
+def test_dragged_gates_are_routed_once_dropped(monkeypatch):
+    canvas = LineCanvas()
+    router = WireRouter(canvas)
+    _, dest, _ = wire_with_obstacle(router)
+    search = router.a_star
+
+    monkeypatch.setattr(router, "a_star", lambda start, goal: pytest.fail("routed during the drag"))
+    router.begin_drag()
+    for y in (60, 80, 100):
+        dest.move_to(200, y)
+        assert router.update_gate(dest) == set()
+    assert canvas.lines[1] == [(20, 50), (110, 50), (110, 110), (200, 110)]
+
+    monkeypatch.setattr(router, "a_star", search)
+    assert router.end_drag() == {1}
+    assert router.get_route(1)[-1] == (200, 110) and router.gate_cells[dest][0] == (20, 10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
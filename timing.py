@@ -0,0 +1,115 @@
+########################################################################################################################
+# File: timing.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Gate delay timing. Every gate type has a propagation delay in whole time steps, registered with its
+#              GateInfo. The timing simulator is event driven: when a gate's output changes, each gate it feeds is
+#              evaluated and its new output is scheduled for delay steps later, so ripples and glitches play out as they
+#              would in hardware. Pending events are kept in a time wheel, a ring of buckets one per time step, rather
+#              than a sorted queue. Static analysis finds the longest delay path from the power and clock gates to each
+#              output gate.
+########################################################################################################################
+from netlist import *
+
+
+def gate_delays(netlist: Netlist, gate_info_repo) -> array:
+    """Delay of every gate of netlist, gates inside custom chips use the delays of their own types"""
+    return array('l', [gate_info_repo.get_delay(func) for func in netlist.funcs])
+
+
+class TimingSimulator:
+    """Simulates netlist with transport delays, starting from its settled values. values holds the current output of
+    every gate and changes every (time, gate, value) output change, in order"""
+
+    def __init__(self, netlist: Netlist, delays: Sequence[int]):
+        self.netlist = netlist
+        self.delays = delays
+        self.values = list(netlist.evaluate())
+        self.projected = list(self.values)  # Value each gate will have once its pending events are applied
+        self.time = 0
+        self.changes = []
+        self.events = 0  # Events applied so far
+
+        # Every event is scheduled at most max(delays) steps ahead, so with at least that many buckets each bucket
+        # only ever holds events for a single time step
+        wheel_size = 1
+        while wheel_size <= max(delays, default=0):
+            wheel_size <<= 1
+        self.wheel = [[] for _ in range(wheel_size)]  # (gate, value) events, bucket time % wheel_size
+        self.wheel_mask = wheel_size - 1
+        self.pending = 0
+
+    def schedule(self, gate: int, value: int, delay: int) -> None:
+        if value == self.projected[gate]:
+            return
+        self.projected[gate] = value
+        self.wheel[(self.time + delay) & self.wheel_mask].append((gate, value))
+        self.pending += 1
+
+    def set_inputs(self, values: dict[int, int]) -> None:
+        """Changes source gates at the current time"""
+        for gate, value in values.items():
+            self.schedule(gate, value, 0)
+
+    def run(self, until: Optional[int] = None) -> int:
+        """Applies events until none are left or the time reaches until, returns the time of the last change"""
+        netlist, values, delays = self.netlist, self.values, self.delays
+        funcs, fanin, fanin_start = netlist.funcs, netlist.fanin, netlist.fanin_start
+        last_change = self.time
+        while self.pending > 0 and (until is None or self.time <= until):
+            bucket = self.wheel[self.time & self.wheel_mask]
+            idx = 0
+            while idx < len(bucket):  # Zero delay gates add events to the bucket being applied
+                gate, value = bucket[idx]
+                idx += 1
+                self.pending -= 1
+                self.events += 1
+                if values[gate] == value:
+                    continue
+                values[gate] = value
+                self.changes.append((self.time, gate, value))
+                last_change = self.time
+                for out_id in netlist.outputs_of(gate):
+                    start, end = fanin_start[out_id], fanin_start[out_id + 1]
+                    self.schedule(out_id, funcs[out_id]([values[in_id] for in_id in fanin[start:end]]),
+                                  delays[out_id])
+            bucket.clear()
+            if self.pending > 0:
+                self.time += 1
+        return last_change
+
+    def toggle_counts(self) -> dict[int, int]:
+        """Number of times each gate which changed did so"""
+        counts = {}
+        for _, gate, _ in self.changes:
+            counts[gate] = counts.get(gate, 0) + 1
+        return counts
+
+
+class CriticalPath(NamedTuple):
+    delay: int  # Total delay from the source to the output gate
+    gates: list[int]  # Source first, output gate last
+
+
+def critical_paths(netlist: Netlist, delays: Sequence[int]) -> dict[int, CriticalPath]:
+    """Longest delay path to every top level output gate which is reached from a power or clock gate"""
+    arrival = [None] * netlist.size  # Time the last change can reach each gate, None if none can
+    previous = [None] * netlist.size  # Input the latest change arrives through, None for the sources
+    for gate in netlist.order:
+        if gate < netlist.gate_count and netlist.funcs[gate] in (power, logic_clock):
+            arrival[gate] = delays[gate]
+            continue
+        for in_id in netlist.inputs_of(gate):
+            if arrival[in_id] is not None and (arrival[gate] is None or arrival[in_id] + delays[gate] > arrival[gate]):
+                arrival[gate] = arrival[in_id] + delays[gate]
+                previous[gate] = in_id
+
+    paths = {}
+    for gate in range(netlist.gate_count):
+        if netlist.funcs[gate] == output and arrival[gate] is not None:
+            path = [gate]
+            while previous[path[-1]] is not None:
+                path.append(previous[path[-1]])
+            paths[gate] = CriticalPath(arrival[gate], path[::-1])
+    return paths
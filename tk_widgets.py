@@ -9,6 +9,7 @@ import tkinter
 import tkinter.font as font
 from tkinter import scrolledtext
 
+from latency import *
 from logic_gate import *
 
 
@@ -107,10 +108,13 @@ class TableCheckbutton(Frame):
     output of this gate"""
 
     def __init__(self, parent: Optional[Widget], gate: InputTk, return_focus_to: Widget, this_font: font.Font,
-                 popup_font: font.Font, *args, checkbutton_padding: Optional[dict] = None, **kwargs):
+                 popup_font: font.Font, *args, checkbutton_padding: Optional[dict] = None,
+                 rename_cb: Optional[Callable] = None, propagate_cb: Callable = propagate, **kwargs):
         super().__init__(parent, *args, background="white", **kwargs)
         self.gate = gate
         self.return_focus_to = return_focus_to
+        self.rename_cb = rename_cb  # Called with the gate and its old name after it is renamed
+        self.propagate_cb = propagate_cb  # Called with the gate after its output is toggled
         self.this_font = this_font
         # Popup Variables ##############
         self.popup_font = popup_font
@@ -123,7 +127,7 @@ class TableCheckbutton(Frame):
             self.checkbutton = Checkbutton(self, variable=self.check_var, text=self.gate.get_label(),
                                            onvalue=TRUE, offvalue=FALSE, width=15, command=self.click_cb,
                                            background='white', font=this_font)
-            self.checkbutton.bind("<Button-3>", self.right_click_cb)
+            latency_monitor.bind(self.checkbutton, "<Button-3>", self.right_click_cb)
             self.has_default_name = True
             if checkbutton_padding is not None:
                 self.checkbutton.grid(row=0, column=0, sticky="w", **checkbutton_padding)
@@ -137,7 +141,8 @@ class TableCheckbutton(Frame):
     def click_cb(self):
         """Toggles output of gate and returns focus to the icb"""
         self.return_focus_to.focus_force()
-        self.gate.set_output(self.check_var.get())
+        self.set(self.check_var.get())
+        self.propagate_cb([self.gate])
 
     def right_click_cb(self, event: Event):
         """Opens a popup prompt to edit the name of this power gate"""
@@ -169,9 +174,12 @@ class TableCheckbutton(Frame):
         self.toplevel.update()
 
     def done_close_cb(self):
+        old_label = self.gate.get_label()
         self.update_text(self.popup_entry.get())
         self.has_default_name = False
         self.cancel_close_cb()
+        if self.rename_cb is not None:
+            self.rename_cb(self.gate, old_label)
 
     def update_text(self, text: str) -> None:
         self.gate.set_label(text)
@@ -180,6 +188,11 @@ class TableCheckbutton(Frame):
     def get(self) -> int:
         return self.check_var.get()
 
+    def set(self, value: int) -> None:
+        """Checks or unchecks the box and sets the gate's output, without propagating it"""
+        self.check_var.set(value)
+        self.gate.out = value
+
     def set_font(self, new_font: font.Font) -> None:
         self.checkbutton.config(font=new_font)
 
@@ -191,7 +204,8 @@ class CheckbuttonTable(LabelFrame):
     """Scrollable LabelFrame which stores entries corresponding to each power gate. Each entry has a checkbox that,
     when clicked, toggles the output of the gate. Can also be right-clicked to change the name of the gate."""
 
-    def __init__(self, parent, return_focus_to: Widget, this_font: font.Font, *args, **kwargs):
+    def __init__(self, parent, return_focus_to: Widget, this_font: font.Font, *args,
+                 rename_cb: Optional[Callable] = None, propagate_cb: Callable = propagate, **kwargs):
         LabelFrame.__init__(self, master=parent, background='white', font=this_font, *args, **kwargs)
         self.canvas = Canvas(self, highlightthickness=0, background='white')
         self.frame = Frame(self.canvas, background='white')
@@ -200,6 +214,8 @@ class CheckbuttonTable(LabelFrame):
 
         self.checkbox_padding = {"padx": (10, 0), "pady": (5, 5)}  # The padding applied to each entry
         self.return_focus_to = return_focus_to
+        self.rename_cb = rename_cb  # Called with the gate and its old name when an entry is renamed
+        self.propagate_cb = propagate_cb  # Called with the power gates whose outputs were changed
         self.entries = []  # List holding list of TableCheckbutton
 
         self.this_font = this_font
@@ -209,7 +225,7 @@ class CheckbuttonTable(LabelFrame):
         self.canvas.grid(row=0, column=0, sticky='nws', padx=(0, 0))
 
         self.canvas.create_window((1, 1), window=self.frame, anchor="nw", tags="self.frame")
-        self.frame.bind("<Configure>", self.on_frame_configure)
+        latency_monitor.bind(self.frame, "<Configure>", self.on_frame_configure)
 
         self.empty_text_label = Label(self.frame, bg="white", text="No Power Gates...", font=this_font)
         self.empty_text_label.grid(row=0, column=0, sticky='')
@@ -225,7 +241,8 @@ class CheckbuttonTable(LabelFrame):
             self.null = False
         tbl_entry = TableCheckbutton(self.frame, gate, self.return_focus_to,
                                      this_font=reconfig_font(self.this_font, offset=-2), popup_font=self.this_font,
-                                     checkbutton_padding=self.checkbox_padding)
+                                     checkbutton_padding=self.checkbox_padding, rename_cb=self.rename_cb,
+                                     propagate_cb=self.propagate_cb)
         tbl_entry.grid(row=len(self.entries), sticky='')
         self.entries.append(tbl_entry)
 
@@ -255,6 +272,36 @@ class CheckbuttonTable(LabelFrame):
                 self.del_entry(i)
                 return
 
+    def update_gate_label(self, gate: InputTk) -> None:
+        """Shows the current label of gate in its entry"""
+        for entry in self.entries:
+            if entry.gate == gate:
+                entry.update_text(gate.get_label())
+                return
+
+    def set_gate_values(self, values: dict[InputTk, int]) -> None:
+        """Sets the outputs of many power gates through their entries, then propagates them all at once"""
+        changed = [entry.gate for entry in self.entries if entry.gate in values and entry.get() != values[entry.gate]]
+        for entry in self.entries:
+            if entry.gate in values:
+                entry.set(values[entry.gate])
+        self.propagate_cb(changed)
+
+    def del_gate_entries(self, gates: Iterable[InputTk]) -> None:
+        """Deletes the entries of every gate in gates with a single pass over the table"""
+        gates = set(gates)
+        kept = []
+        for entry in self.entries:
+            if entry.gate in gates:
+                entry.destroy()
+            else:
+                kept.append(entry)
+        self.entries = kept
+
+        if len(self.entries) == 0:
+            self.empty_text_label.grid()
+            self.null = True
+
     def set_focus_widget(self, widget: Widget):
         """Sets the Widget that should receive input focus after the checkbox is clicked."""
         # By default, after clicking a checkbox, it would recieve focus from tk and cause the keyboard shortcuts
@@ -266,7 +313,6 @@ class CheckbuttonTable(LabelFrame):
     def clear(self) -> None:
         """Deletes all entries"""
         for entry in self.entries:
-            entry.grid_forget()
             entry.destroy()
 
         self.entries.clear()
@@ -305,8 +351,107 @@ class ScrollableFrame(Frame):
         self.canvas.grid(row=0, column=0, sticky='nws', padx=(0, 0))
 
         self.canvas.create_window((0, 0), window=self.frame, anchor="nw", tags="self.frame")
-        self.frame.bind("<Configure>", self.on_frame_configure)
+        latency_monitor.bind(self.frame, "<Configure>", self.on_frame_configure)
 
     def on_frame_configure(self, event):
         """Reset the scroll region to encompass the inner frame"""
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+
+class Minimap(Canvas):
+    """Overview of the whole board with a draggable rectangle showing the visible part of it. Gates are accumulated
+    into a fixed grid of bins instead of being copied, so drawing and updating the map costs the same no matter how
+    many gates are placed"""
+    bin_fills = ("#c8c8c8", "#8c8c8c", "#505050")  # Bin color for 1, 2-3 and 4+ gates
+
+    def __init__(self, parent, board: Canvas, board_width: int, board_height: int, *args, width: int = 220,
+                 bin_size: int = 5, **kwargs):
+        self.scale = width / board_width
+        height = int(board_height * self.scale)
+        Canvas.__init__(self, parent, *args, width=width, height=height, background='white', highlightthickness=1,
+                        highlightbackground='black', **kwargs)
+        self.board = board
+        self.board_width, self.board_height = board_width, board_height
+        self.bin_size = bin_size  # Size of a bin on the minimap in pixels
+        self.cols, self.rows = width // bin_size + 1, height // bin_size + 1
+        self.bin_counts = [0] * (self.cols * self.rows)  # Number of gates whose center falls in each bin
+        self.bin_items = [NULL] * (self.cols * self.rows)  # Canvas item of each bin, created when first occupied
+        self.gate_bins = {}  # Gate -> index of the bin it is counted in
+        self.viewport_id = self.create_rectangle(0, 0, 0, 0, outline='blue', width=2)
+
+        latency_monitor.bind(self, "<Button-1>", self.navigate_cb)
+        latency_monitor.bind(self, "<B1-Motion>", self.navigate_cb)
+        self.board.configure(xscrollcommand=self.board_scrolled_cb, yscrollcommand=self.board_scrolled_cb)
+
+    def bin_index(self, x: int, y: int) -> int:
+        col = min(max(int(x * self.scale) // self.bin_size, 0), self.cols - 1)
+        row = min(max(int(y * self.scale) // self.bin_size, 0), self.rows - 1)
+        return row * self.cols + col
+
+    def update_bin(self, index: int) -> None:
+        """Redraws a single bin after its gate count changed"""
+        count = self.bin_counts[index]
+        if self.bin_items[index] == NULL:
+            if count == 0:
+                return
+            x, y = (index % self.cols) * self.bin_size, (index // self.cols) * self.bin_size
+            self.bin_items[index] = self.create_rectangle(x, y, x + self.bin_size, y + self.bin_size, width=0)
+            self.tag_raise(self.viewport_id)
+
+        if count == 0:
+            self.itemconfig(self.bin_items[index], state='hidden')
+        else:
+            fill = self.bin_fills[0] if count == 1 else self.bin_fills[1] if count < 4 else self.bin_fills[2]
+            self.itemconfig(self.bin_items[index], state='normal', fill=fill)
+
+    def add_gate(self, gate: InputTk) -> None:
+        index = self.bin_index(*gate.get_center())
+        self.gate_bins[gate] = index
+        self.bin_counts[index] += 1
+        self.update_bin(index)
+
+    def remove_gate(self, gate: InputTk) -> None:
+        index = self.gate_bins.pop(gate, None)
+        if index is not None:
+            self.bin_counts[index] -= 1
+            self.update_bin(index)
+
+    def remove_gates(self, gates: Iterable[InputTk]) -> None:
+        """Removes many gates, each affected bin is only redrawn once"""
+        changed = set()
+        for gate in gates:
+            index = self.gate_bins.pop(gate, None)
+            if index is not None:
+                self.bin_counts[index] -= 1
+                changed.add(index)
+        for index in changed:
+            self.update_bin(index)
+
+    def move_gate(self, gate: InputTk) -> None:
+        """Moves a gate to the bin of its new center, only redraws if it crossed into another bin"""
+        if self.gate_bins.get(gate) != self.bin_index(*gate.get_center()):
+            self.remove_gate(gate)
+            self.add_gate(gate)
+
+    def clear(self) -> None:
+        for item in self.bin_items:
+            if item != NULL:
+                self.delete(item)
+        self.bin_counts = [0] * (self.cols * self.rows)
+        self.bin_items = [NULL] * (self.cols * self.rows)
+        self.gate_bins.clear()
+
+    def update_viewport(self) -> None:
+        """Redraws the rectangle marking the visible part of the board"""
+        (x0, x1), (y0, y1) = self.board.xview(), self.board.yview()
+        self.coords(self.viewport_id, x0 * self.board_width * self.scale, y0 * self.board_height * self.scale,
+                    x1 * self.board_width * self.scale, y1 * self.board_height * self.scale)
+
+    def board_scrolled_cb(self, first: str, last: str) -> None:
+        self.update_viewport()
+
+    def navigate_cb(self, event: Event) -> None:
+        """Centers the visible part of the board on the clicked point of the minimap"""
+        (x0, x1), (y0, y1) = self.board.xview(), self.board.yview()
+        self.board.xview_moveto(event.x / self.scale / self.board_width - (x1 - x0) / 2)
+        self.board.yview_moveto(event.y / self.scale / self.board_height - (y1 - y0) / 2)
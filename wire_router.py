@@ -0,0 +1,297 @@
+########################################################################################################################
+# File: wire_router.py
+# Author: Peter McCusker
+# License:
+# Date: 10/19/2026
+# Description: Obstacle aware orthogonal wire router. Placed gates are rasterized onto a coarse grid and each wire is
+#              routed with A* so it only runs horizontally/vertically around gates. Routes are cached per line and when
+#              a gate is placed or moved only the wires attached to it, passing through the area it now covers or
+#              running around the area it left, are re-routed. While a gate is dragged its wires are drawn as simple
+#              Z shapes and routed once it is dropped.
+########################################################################################################################
+import heapq
+from typing import *
+
+# Directions a wire can travel on the grid: right, left, down, up
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class WireRouter:
+    """Routes the lines between gates on a canvas as Manhattan wires which avoid the placed gates"""
+
+    def __init__(self, canvas, cell_size: int = 10, bend_cost: int = 3, max_expansions: int = 6000):
+        self.canvas = canvas
+        self.cell_size = cell_size  # Pixel width/height of one grid cell
+        self.bend_cost = bend_cost  # Extra cost of turning a corner, keeps wires straight and readable
+        self.max_expansions = max_expansions  # Bound on the A* search, past this a simple fallback path is used
+        self.blocked = {}  # Grid cell -> number of gates covering it
+        self.gate_cells = {}  # Gate -> list of grid cells it covers
+        self.routes = {}  # Line id -> (source gate, destination gate, list of points)
+        self.route_cells = {}  # Line id -> set of grid cells the route passes through
+        self.cell_routes = {}  # Grid cell -> set of line ids passing through it
+        self.gate_lines = {}  # Gate -> set of line ids attached to it
+        self.route_bounds = {}  # Line id -> (min cell x, min cell y, max cell x, max cell y) of its route
+        self.dragging = False  # Moved gates are only routed once the drag ends
+        self.dragged = {}  # Gates moved during the drag, in the order they were first moved
+
+    def cell(self, x: int, y: int) -> (int, int):
+        return int(x) // self.cell_size, int(y) // self.cell_size
+
+    def cell_center(self, cell: (int, int)) -> (int, int):
+        return cell[0] * self.cell_size + self.cell_size // 2, cell[1] * self.cell_size + self.cell_size // 2
+
+    def cells_in_rect(self, tl: (int, int), br: (int, int)) -> list[(int, int)]:
+        """Returns every grid cell touched by the rectangle (tl, br)"""
+        (x0, y0), (x1, y1) = self.cell(*tl), self.cell(*br)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def is_blocked(self, cell: (int, int)) -> bool:
+        return self.blocked.get(cell, 0) > 0
+
+    # Obstacles ########################################################################################################
+    def add_obstacle(self, gate) -> None:
+        cells = self.cells_in_rect(gate.top_left(), gate.bottom_right())
+        self.gate_cells[gate] = cells
+        for cell in cells:
+            self.blocked[cell] = self.blocked.get(cell, 0) + 1
+
+    def remove_obstacle(self, gate) -> None:
+        for cell in self.gate_cells.pop(gate, []):
+            count = self.blocked.get(cell, 0) - 1
+            if count > 0:
+                self.blocked[cell] = count
+            else:
+                self.blocked.pop(cell, None)
+
+    def update_gate(self, gate) -> set[int]:
+        """Call when a gate is placed or moved. Re-rasterizes the gate and re-routes only the lines attached to it, the
+        lines passing through the area it now covers and the lines whose routes span the cells it freed, which may
+        have been going around it. Returns the ids of the re-routed lines"""
+        if self.dragging and gate in self.gate_cells:
+            self.drag_gate(gate)
+            return set()
+        old_cells = self.gate_cells.get(gate, [])
+        self.remove_obstacle(gate)
+        self.add_obstacle(gate)
+
+        dirty = set(self.gate_lines.get(gate, ()))
+        for cell in self.gate_cells[gate]:
+            dirty.update(self.cell_routes.get(cell, ()))
+        freed = set(old_cells).difference(self.gate_cells[gate])
+        if len(freed) > 0:
+            dirty.update(self.lines_spanning(freed))
+
+        for line_id in dirty:
+            self.reroute(line_id)
+        return dirty
+
+    def lines_spanning(self, cells: set[(int, int)]) -> list[int]:
+        """Returns the ids of the lines whose route's bounding box contains one of cells"""
+        x0, y0 = min(cell[0] for cell in cells), min(cell[1] for cell in cells)
+        x1, y1 = max(cell[0] for cell in cells), max(cell[1] for cell in cells)
+        return [line_id for line_id, (bx0, by0, bx1, by1) in self.route_bounds.items()
+                if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1 and
+                any(bx0 <= cell[0] <= bx1 and by0 <= cell[1] <= by1 for cell in cells)]
+
+    # Dragging #########################################################################################################
+    def begin_drag(self) -> None:
+        """Defers routing until end_drag, so moving a gate under the mouse doesn't run A* on every motion event"""
+        self.dragging = True
+
+    def drag_gate(self, gate) -> None:
+        """Draws the lines attached to a gate being dragged as Z shaped wires, without searching for a route"""
+        self.dragged[gate] = None
+        for line_id in self.gate_lines.get(gate, ()):
+            src_gate, dest_gate, _ = self.routes[line_id]
+            points = self.fallback_points(*self.pins(src_gate, dest_gate))
+            self.canvas.coords(line_id, *[coord for point in points for coord in point])
+
+    def end_drag(self) -> set[int]:
+        """Routes the gates moved since begin_drag, returns the ids of the re-routed lines"""
+        self.dragging = False
+        dirty = set()
+        for gate in self.dragged:
+            if gate in self.gate_cells:  # Not removed during the drag
+                dirty.update(self.update_gate(gate))
+        self.dragged.clear()
+        return dirty
+
+    def remove_gate(self, gate) -> None:
+        self.dragged.pop(gate, None)
+        self.remove_obstacle(gate)
+        self.gate_lines.pop(gate, None)
+
+    # Lines ############################################################################################################
+    def add_line(self, line_id: int, src_gate, dest_gate) -> None:
+        """Registers a line from the right edge of src_gate to the left edge of dest_gate and routes it"""
+        self.routes[line_id] = (src_gate, dest_gate, [])
+        self.gate_lines.setdefault(src_gate, set()).add(line_id)
+        self.gate_lines.setdefault(dest_gate, set()).add(line_id)
+        self.reroute(line_id)
+
+    def remove_line(self, line_id: int) -> None:
+        if line_id not in self.routes:
+            return
+        src_gate, dest_gate, _ = self.routes.pop(line_id)
+        self.unindex_route(line_id)
+        for gate in (src_gate, dest_gate):
+            if gate in self.gate_lines:
+                self.gate_lines[gate].discard(line_id)
+
+    def index_route(self, line_id: int, cells: list[(int, int)]) -> None:
+        cell_set = set(cells)
+        self.route_cells[line_id] = cell_set
+        for cell in cell_set:
+            self.cell_routes.setdefault(cell, set()).add(line_id)
+        if len(cell_set) > 0:
+            self.route_bounds[line_id] = (min(cell[0] for cell in cell_set), min(cell[1] for cell in cell_set),
+                                          max(cell[0] for cell in cell_set), max(cell[1] for cell in cell_set))
+
+    def unindex_route(self, line_id: int) -> None:
+        self.route_bounds.pop(line_id, None)
+        for cell in self.route_cells.pop(line_id, ()):
+            line_ids = self.cell_routes.get(cell)
+            if line_ids is not None:
+                line_ids.discard(line_id)
+                if len(line_ids) == 0:
+                    del self.cell_routes[cell]
+
+    def reroute(self, line_id: int) -> list[(int, int)]:
+        """Computes a new route for line_id, caches it and updates the line on the canvas"""
+        src_gate, dest_gate, _ = self.routes[line_id]
+        cells, points = self.route(*self.pins(src_gate, dest_gate))
+        self.unindex_route(line_id)
+        self.index_route(line_id, cells)
+        self.routes[line_id] = (src_gate, dest_gate, points)
+
+        self.canvas.coords(line_id, *[coord for point in points for coord in point])
+        return points
+
+    @staticmethod
+    def pins(src_gate, dest_gate) -> ((int, int), (int, int)):
+        """Returns the points a line leaves src_gate from and enters dest_gate at"""
+        return (src_gate.bottom_right()[0], src_gate.get_center()[1]), \
+            (dest_gate.top_left()[0], dest_gate.get_center()[1])
+
+    def get_route(self, line_id: int) -> Optional[list[(int, int)]]:
+        route = self.routes.get(line_id)
+        return route[2] if route is not None else None
+
+    def clear(self) -> None:
+        self.blocked.clear()
+        self.gate_cells.clear()
+        self.routes.clear()
+        self.route_cells.clear()
+        self.cell_routes.clear()
+        self.gate_lines.clear()
+        self.route_bounds.clear()
+        self.dragged.clear()
+
+    # Path finding #####################################################################################################
+    def route(self, src_pin: (int, int), dest_pin: (int, int)) -> (list[(int, int)], list[(int, int)]):
+        """Returns the grid cells and the canvas points of an orthogonal path from src_pin to dest_pin"""
+        # Start one cell to the right of the source pin and end one cell to the left of the destination pin, these
+        # cells sit just outside the gates' borders
+        start = (self.cell(*src_pin)[0] + 1, self.cell(*src_pin)[1])
+        goal = (max(self.cell(*dest_pin)[0] - 1, 0), self.cell(*dest_pin)[1])
+
+        cells = self.a_star(start, goal)
+        if cells is None:  # No path was found in time, fall back to a simple Z shaped wire
+            points = self.fallback_points(src_pin, dest_pin)
+            return self.cells_on_points(points), points
+
+        return cells, self.cells_to_points(cells, src_pin, dest_pin)
+
+    @staticmethod
+    def fallback_points(src_pin: (int, int), dest_pin: (int, int)) -> list[(int, int)]:
+        """Z shaped wire which ignores the gates, turning halfway between the pins"""
+        mid_x = (src_pin[0] + dest_pin[0]) // 2
+        return [src_pin, (mid_x, src_pin[1]), (mid_x, dest_pin[1]), dest_pin]
+
+    def a_star(self, start: (int, int), goal: (int, int)) -> Optional[list[(int, int)]]:
+        """A* search over the grid, each state is a cell and the direction it was entered from so that corners can be
+        penalized. The start and goal cells are always allowed even if a gate covers them"""
+        def heuristic(cell: (int, int)) -> int:
+            return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+        start_state = (start, 0)  # Wires leave the source travelling right
+        g_score = {start_state: 0}
+        came_from = {}
+        open_heap = [(heuristic(start), 0, start_state)]
+        expansions = 0
+
+        while open_heap:
+            _, g, state = heapq.heappop(open_heap)
+            if g > g_score.get(state, g):  # Stale heap entry
+                continue
+
+            cell, direction = state
+            if cell == goal:
+                path = [cell]
+                while state in came_from:
+                    state = came_from[state]
+                    path.append(state[0])
+                path.reverse()
+                return path
+
+            expansions += 1
+            if expansions > self.max_expansions:
+                return None
+
+            for new_direction, (dx, dy) in enumerate(DIRECTIONS):
+                if DIRECTIONS[direction] == (-dx, -dy):  # Never double back
+                    continue
+                neighbour = (cell[0] + dx, cell[1] + dy)
+                if neighbour[0] < 0 or neighbour[1] < 0:
+                    continue
+                if neighbour != goal and self.is_blocked(neighbour):
+                    continue
+
+                new_g = g + 1 + (self.bend_cost if new_direction != direction else 0)
+                new_state = (neighbour, new_direction)
+                if new_g < g_score.get(new_state, new_g + 1):
+                    g_score[new_state] = new_g
+                    came_from[new_state] = state
+                    heapq.heappush(open_heap, (new_g + heuristic(neighbour), new_g, new_state))
+
+        return None
+
+    def cells_to_points(self, cells: list[(int, int)], src_pin: (int, int),
+                        dest_pin: (int, int)) -> list[(int, int)]:
+        """Converts a path of grid cells to the corner points of a canvas line. The first and last horizontal runs
+        are snapped onto the pins' y coordinates so wires leave and enter gates without a jog"""
+        corners = [cells[0]]
+        for i in range(1, len(cells) - 1):
+            prev_cell, cell, next_cell = cells[i - 1], cells[i], cells[i + 1]
+            if (cell[0] - prev_cell[0], cell[1] - prev_cell[1]) != (next_cell[0] - cell[0], next_cell[1] - cell[1]):
+                corners.append(cell)
+        if len(cells) > 1:
+            corners.append(cells[-1])
+
+        start_row, goal_row = corners[0][1], corners[-1][1]
+        if len(corners) <= 2 and start_row == goal_row:  # Straight run, only needs a jog if the pins aren't level
+            mid_x = (src_pin[0] + dest_pin[0]) // 2
+            points = [src_pin, (mid_x, src_pin[1]), (mid_x, dest_pin[1]), dest_pin]
+            return [point for i, point in enumerate(points) if i == 0 or point != points[i - 1]]
+
+        points = [list(self.cell_center(corner)) for corner in corners]
+        for i in range(min(2, len(corners))):  # Leading run on the source's row
+            if corners[i][1] != start_row:
+                break
+            points[i][1] = src_pin[1]
+        for i in range(len(corners) - 1, max(len(corners) - 3, -1), -1):  # Trailing run on the destination's row
+            if corners[i][1] != goal_row:
+                break
+            points[i][1] = dest_pin[1]
+
+        return [src_pin] + [(x, y) for (x, y) in points] + [dest_pin]
+
+    def cells_on_points(self, points: list[(int, int)]) -> list[(int, int)]:
+        """Returns the grid cells covered by an orthogonal polyline"""
+        cells = []
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            (cx0, cy0), (cx1, cy1) = self.cell(x0, y0), self.cell(x1, y1)
+            for cx in range(min(cx0, cx1), max(cx0, cx1) + 1):
+                for cy in range(min(cy0, cy1), max(cy0, cy1) + 1):
+                    cells.append((cx, cy))
+        return cells